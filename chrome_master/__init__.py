@@ -19,35 +19,63 @@ https://chromedevtools.github.io/devtools-protocol/
 
 from __future__ import unicode_literals
 
-try:
-    import httplib
-except ImportError:
-    import http.client as httplib
 import copy
+import functools
+import importlib
 import json
-import re
-import socket
 import sys
+import threading
 import time
 
 from . import util
 
-from .dom_handler import DOMHandler, IDOMEventListener
-from .input_handler import InputHandler
-from .log_handler import LogHandler
-from .remote_debugger import RemoteDebugger
-from .network_handler import NetworkHandler
-from .runtime_handler import RuntimeHandler
-from .page_handler import PageHandler, IFrameEventListener
-from .target_handler import TargetHandler
+from .debugger_pool import DebuggerPool
+from .page_index import PageIndex
+
+# 处理器及其依赖（websocket、PIL等）在首次访问时才加载，以缩短导入包的时间
+_lazy_exports = {
+    "BrowserDebugger": "session_debugger",
+    "ChromeCluster": "cluster",
+    "DOMHandler": "dom_handler",
+    "HTTPConnectionPool": "http_pool",
+    "IDOMEventListener": "dom_handler",
+    "IFrameEventListener": "page_handler",
+    "InputHandler": "input_handler",
+    "LogHandler": "log_handler",
+    "NetworkHandler": "network_handler",
+    "PageHandler": "page_handler",
+    "Reactor": "reactor",
+    "RemoteDebugger": "remote_debugger",
+    "RuntimeHandler": "runtime_handler",
+    "SessionDebugger": "session_debugger",
+    "TabPool": "tab_pool",
+    "TargetHandler": "target_handler",
+    "TargetWatchHandler": "target_handler",
+}
+if sys.version_info >= (3, 5):
+    for _name in (
+        "AsyncChromeMaster",
+        "AsyncDebuggerHandler",
+        "AsyncEventStream",
+        "AsyncPageHandler",
+        "AsyncRemoteDebugger",
+        "AsyncRuntimeHandler",
+    ):
+        _lazy_exports[_name] = "async_debugger"
+
+__all__ = [
+    str(it)
+    for it in ["ChromeMaster", "DebuggerPool", "PageIndex", "set_logger"]
+    + sorted(_lazy_exports)
+]
 
 
 def set_logger(logger):
     util.logger = logger
 
 
-class ChromeMaster(object):
-    """Chrome控制端
+class _ChromeMasterBase(object):
+    """同步和asyncio控制端共用的页面列表解析和页面选择逻辑，不创建线程和连接池
     """
 
     instances = {}
@@ -56,11 +84,11 @@ class ChromeMaster(object):
         key = "%s:%d" % addr
         if key not in cls.instances:
             if sys.version_info[0] == 2:
-                cls.instances[key] = super(ChromeMaster, cls).__new__(
+                cls.instances[key] = super(_ChromeMasterBase, cls).__new__(
                     cls, addr, open_socket_func
                 )
             else:
-                cls.instances[key] = super(ChromeMaster, cls).__new__(cls)
+                cls.instances[key] = super(_ChromeMasterBase, cls).__new__(cls)
         return cls.instances[key]
 
     def __init__(self, addr, open_socket_func=None):
@@ -69,47 +97,28 @@ class ChromeMaster(object):
         :param open_socket_func: 创建socket函数
         """
         if not hasattr(self, "_addr"):  # not initiatized
-            self._addr = addr
-            self._open_socket = open_socket_func
-            self._pages = {}
+            self._init(addr, open_socket_func)
 
-    # def get_page_info(self, debugger_url, url, title):
-    #     result = {
-    #         'title': title,
-    #         'url': url,
-    #         'body': None
-    #     }
-    #     debugger = RemoteDebugger(debugger_url, self._open_socket)
-    #     debugger.register_handler(RuntimeHandler)
-    #     result['body'] = debugger.runtime.eval_script(
-    #         None, 'document.body.innerText')
-    #     if not result['body']:
-    #         debugger.close()
-    #         return result
-    #     if result['title'] == 'about:blank':
-    #         result['title'] = debugger.runtime.eval_script(
-    #             None, 'document.title')
-    #     if result['url'] == 'about:blank':
-    #         result['url'] = debugger.runtime.eval_script(None, 'location.href')
-    #     debugger.close()
-    #     return result
+    def _init(self, addr, open_socket_func):
+        self._addr = addr
+        self._open_socket = open_socket_func
+        self._pages = {}
+        self._page_index = PageIndex()
+        self._reserved_pages = set()  # 预创建的页面，不参与查找
 
-    def get_page_list(self, ignore_blank_page=True):
-        """获取打开的页面列表
+    def _on_pages_vanished(self, alive_ids):
+        """页面列表更新后的回调，子类在此清理已关闭页面的资源
+
+        :param alive_ids: 现存页面ID集合
+        :type  alive_ids: set
         """
-        conn = httplib.HTTPConnection(self._addr[0], self._addr[1], timeout=60)
-        if self._open_socket:
-            if hasattr(conn, "_create_connection"):
-                conn._create_connection = (
-                    lambda address, timeout, source_address: self._open_socket()
-                )
-            else:
-                # older 2.7 version
-                conn.sock = self._open_socket()
-        conn.request("GET", "/json")
-        result = conn.getresponse().read()
-        conn.close()
 
+    def _parse_page_list(self, result, ignore_blank_page=False):
+        """解析`/json`接口返回的页面列表
+
+        :param ignore_blank_page: 是否过滤空白页面
+        :type  ignore_blank_page: boolean
+        """
         try:
             page_list = json.loads(util.general_encode(result))
         except ValueError:
@@ -118,6 +127,12 @@ class ChromeMaster(object):
                 % result
             )
 
+        # 移除已关闭页面的记录和调试器
+        alive_ids = set(it["id"] for it in page_list) | self._reserved_pages
+        for page_id in [it for it in self._pages if it not in alive_ids]:
+            self._pages.pop(page_id, None)
+        self._on_pages_vanished(alive_ids)
+
         result = []
         for page in page_list:
             if page["type"] != "page":
@@ -133,6 +148,9 @@ class ChromeMaster(object):
                 if not page["description"]["visible"]:
                     continue
 
+            if ignore_blank_page and page["url"] == "about:blank":
+                continue
+
             if not page["url"]:
                 util.logger.warn(
                     "[%s] Page %s url is null" % (self.__class__.__name__, page["id"])
@@ -181,6 +199,28 @@ class ChromeMaster(object):
         result.sort(key=lambda page: page["timestamp"])
         return result
 
+    def _diff_page_list(self, prev_pages, page_list):
+        """对比页面列表的变化
+
+        :param prev_pages: 上次的页面信息，页面ID => (标题, url)，会被更新为当前页面信息
+        :type  prev_pages: dict
+        :return: (新增页面ID列表, 关闭页面ID列表, 标题或url变化的页面ID列表)
+        """
+        added, changed = [], []
+        curr_pages = {}
+        for page in page_list:
+            info = (page["title"], page["url"])
+            curr_pages[page["id"]] = info
+            prev_info = prev_pages.get(page["id"])
+            if prev_info is None:
+                added.append(page["id"])
+            elif prev_info != info:
+                changed.append(page["id"])
+        removed = [it for it in prev_pages if it not in curr_pages]
+        prev_pages.clear()
+        prev_pages.update(curr_pages)
+        return added, removed, changed
+
     def _is_page_debugged(self, page):
         if self._pages[page["id"]]["debugger"]:
             return True
@@ -188,19 +228,244 @@ class ChromeMaster(object):
             return False
         # return self._pages[page['id']]['debugger'] != None
 
+    def _filter_pages(self, page_list, title, url):
+        """filter pages with title is `title` and url is `url`
+        """
+        target_page_list = []
+        for page in self._page_index.filter(page_list, title, url):
+            if page["id"] in self._reserved_pages:
+                continue
+            ws_addr = page.get("webSocketDebuggerUrl")
+            if not ws_addr and not (
+                page["id"] in self._pages and self._pages[page["id"]].get("debugger")
+            ):
+                # 连接被其它调试器占用
+                raise RuntimeError(
+                    "Pls close the debugger of page: [%s] %s"
+                    % (page["id"], title or url)
+                )
+
+            target_page_list.append(page)
+        return target_page_list
+
+    def _select_new_page(self, page_list, prev_pages, last=True):
+        """select new page
+        """
+        new_page_list = []
+        for page in page_list:
+            if page["id"] not in prev_pages:
+                new_page_list.append(page)
+
+        if len(new_page_list) == 1:
+            return new_page_list[0]
+        elif len(new_page_list) > 1 and last:
+            return new_page_list[-1]
+        elif len(new_page_list) > 1:
+            raise RuntimeError("Multi new pages found")
+
+    def _select_exist_page(self, target_page_list, title, url, last=True):
+        """select page from exist pages
+        """
+        if len(target_page_list) > 1 and not last:
+            raise RuntimeError(
+                "Multi pages found match title=%s url=%s in address %s:%s"
+                % (
+                    util.unicode_decode(title),
+                    util.unicode_decode(url),
+                    util.unicode_decode(self._addr[0]),
+                    self._addr[1],
+                )
+            )
+        elif len(target_page_list) == 1:
+            util.logger.info(
+                "[%s] Select page %s"
+                % (self.__class__.__name__, target_page_list[0]["url"])
+            )
+            return target_page_list[0]
+        else:
+            util.logger.info(
+                "[%s] Select last page %s"
+                % (self.__class__.__name__, target_page_list[-1]["url"])
+            )
+            return target_page_list[-1]
+
+
+class ChromeMaster(_ChromeMasterBase):
+    """Chrome控制端
+    """
+
+    instances = {}
+    page_list_ttl = 0.2  # 页面列表缓存时间，单位：秒
+    use_target_events = True  # 是否通过浏览器级别的Target事件感知页面变化
+    use_flat_sessions = False  # 是否所有页面共用浏览器级别的连接
+    tab_pool_size = 2  # `new_page`预创建的空白页面数
+    browser_retry_interval = 5  # 连接浏览器失败后重试的间隔，连续失败时倍增，单位：秒
+    reactor = None  # 调试器共用的I/O线程，见`Reactor`
+    debugger_pool_size = None  # 最多保留的页面调试器数，超出时关闭最久未使用的
+    debugger_idle_timeout = None  # 页面调试器的最长空闲时间，超出时关闭，单位：秒
+
+    def _init(self, addr, open_socket_func):
+        super(ChromeMaster, self)._init(addr, open_socket_func)
+        self._tab_pool = None
+        self._tab_pool_lock = threading.Lock()
+        self._debugger_pool = DebuggerPool(
+            max_size=self.debugger_pool_size,
+            idle_timeout=self.debugger_idle_timeout,
+            get_alive_ids=self._get_alive_page_ids,
+            on_evict=self._on_debugger_evicted,
+        )
+        from .http_pool import HTTPConnectionPool
+
+        self._http_pool = HTTPConnectionPool(addr, open_socket_func)
+        self._page_list_lock = threading.Lock()
+        self._page_list_cache = None  # (时间, 原始页面列表数据)
+        self._browser_lock = threading.Lock()
+        self._browser_debugger = None
+        self._browser_failures = 0  # 连续连接浏览器失败的次数
+        self._browser_retry_time = 0  # 连接失败后，在此时间之前不再重试
+
+    # def get_page_info(self, debugger_url, url, title):
+    #     result = {
+    #         'title': title,
+    #         'url': url,
+    #         'body': None
+    #     }
+    #     debugger = RemoteDebugger(debugger_url, self._open_socket)
+    #     debugger.register_handler(RuntimeHandler)
+    #     result['body'] = debugger.runtime.eval_script(
+    #         None, 'document.body.innerText')
+    #     if not result['body']:
+    #         debugger.close()
+    #         return result
+    #     if result['title'] == 'about:blank':
+    #         result['title'] = debugger.runtime.eval_script(
+    #             None, 'document.title')
+    #     if result['url'] == 'about:blank':
+    #         result['url'] = debugger.runtime.eval_script(None, 'location.href')
+    #     debugger.close()
+    #     return result
+
+    def _request_page_list(self):
+        """请求`/json`接口获取原始页面列表数据
+
+        使用长连接请求，结果缓存`page_list_ttl`秒，缓存期内多个线程共用同一结果
+        """
+        with self._page_list_lock:
+            if (
+                self._page_list_cache
+                and time.time() - self._page_list_cache[0] < self.page_list_ttl
+            ):
+                return self._page_list_cache[1]
+            status, result = self._http_pool.request("GET", "/json")
+            if status != 200:
+                raise RuntimeError("Request /json failed: %d" % status)
+            self._page_list_cache = (time.time(), result)
+            return result
+
+    @property
+    def debugger_pool(self):
+        """页面调试器池，见`DebuggerPool`"""
+        return self._debugger_pool
+
+    def _get_alive_page_ids(self):
+        """获取现存的所有目标ID"""
+        result = self._request_page_list()
+        return set(it["id"] for it in json.loads(util.general_encode(result)))
+
+    def _on_pages_vanished(self, alive_ids):
+        self._debugger_pool.evict_vanished(alive_ids)
+
+    def _on_debugger_evicted(self, page_id, debugger):
+        page = self._pages.get(page_id)
+        if page and page["debugger"] is debugger:
+            page["debugger"] = None
+
+    def _invalidate_page_list(self):
+        with self._page_list_lock:
+            self._page_list_cache = None
+
+    def _get_target_watcher(self):
+        """获取浏览器级别连接上的Target处理器，浏览器不支持时返回None
+        """
+        debugger = self._get_browser_debugger()
+        return debugger.target if debugger else None
+
+    def _get_browser_debugger(self):
+        """获取浏览器级别的调试器，浏览器不支持或暂时不可用时返回None
+        """
+        with self._browser_lock:
+            if self._browser_debugger and not self._browser_debugger.connected:
+                self._browser_debugger.close()
+                self._browser_debugger = None
+            if self._browser_debugger is None:
+                if time.time() < self._browser_retry_time:
+                    return None
+                try:
+                    status, result = self._http_pool.request("GET", "/json/version")
+                    if status != 200:
+                        raise RuntimeError("Request /json/version failed: %d" % status)
+                    url = json.loads(util.general_encode(result))[
+                        "webSocketDebuggerUrl"
+                    ]
+                    from .session_debugger import BrowserDebugger
+                    from .target_handler import TargetWatchHandler
+
+                    debugger = BrowserDebugger(
+                        url, self._open_socket, reactor=self.reactor
+                    )
+                    debugger.logger = util.logger
+                    try:
+                        debugger.register_handler(TargetWatchHandler)
+                    except:
+                        debugger.close()
+                        raise
+                except Exception as e:
+                    self._browser_failures += 1
+                    delay = self.browser_retry_interval * min(
+                        2 ** (self._browser_failures - 1), 64
+                    )
+                    self._browser_retry_time = time.time() + delay
+                    util.logger.warn(
+                        "[%s] Connect to browser failed: %s, retry after %ds"
+                        % (self.__class__.__name__, e, delay)
+                    )
+                    return None
+                self._browser_failures = 0
+                self._browser_debugger = debugger
+            return self._browser_debugger
+
+    def _wait_for_page_change(self, watcher, version, timeout=0.5):
+        """等待页面列表变化，不支持Target事件时等待`timeout`秒
+        """
+        if watcher is None:
+            time.sleep(timeout)
+        elif watcher.wait_for_change(version, timeout) != version:
+            self._invalidate_page_list()
+
+    def get_page_list(self, ignore_blank_page=True):
+        """获取打开的页面列表
+        """
+        return self._parse_page_list(self._request_page_list())
+
     def wait_for_debugger(self, debugger):
-        debugger.register_handler(TargetHandler)
-        debugger.register_handler(RuntimeHandler)
-        timeout = 2
-        time0 = time.time()
-        while time.time() - time0 < timeout:
-            if debugger.runtime.get_main_context_id():
-                return True
-            time.sleep(0.2)
-        return False
+        from .runtime_handler import RuntimeHandler
+        from .target_handler import TargetHandler
 
-    def _get_debugger(self, page, timeout=10):
-        debugger = self._pages[page["id"]]["debugger"]
+        debugger.register_handlers([TargetHandler, RuntimeHandler])
+        return debugger.runtime.wait_for_context(timeout=2) is not None
+
+    def _get_debugger(self, page, timeout=10, handlers=None):
+        """获取页面的调试器
+
+        :param handlers: 附加成功后注册的处理器类列表，默认为Log和Network处理器
+        :type  handlers: list
+        """
+        if handlers is None:
+            from .log_handler import LogHandler
+            from .network_handler import NetworkHandler
+
+            handlers = [LogHandler, NetworkHandler]
+        debugger = self._debugger_pool.get(page["id"])
         if debugger:
             return debugger
         url = page.get("webSocketDebuggerUrl")
@@ -208,8 +473,7 @@ class ChromeMaster(object):
             raise RuntimeError("Pls close the page debugger")
         time0 = time.time()
         while time.time() - time0 < timeout:
-            debugger = RemoteDebugger(url, self._open_socket)
-            debugger.logger = util.logger
+            debugger = self._create_debugger(page, url)
             if not self.wait_for_debugger(debugger):
                 util.logger.warn(
                     "[%s] Test debugger of page [%s] %s failed"
@@ -221,9 +485,16 @@ class ChromeMaster(object):
                 )
                 debugger.close()
             else:
-                self._pages[page["id"]]["debugger"] = debugger
-                debugger.register_handler(LogHandler)
-                debugger.register_handler(NetworkHandler)
+                self._pages.setdefault(
+                    page["id"], {"debugger": None, "timestamp": time.time()}
+                )["debugger"] = debugger
+                self._debugger_pool.put(page["id"], debugger)
+                debugger.add_close_callback(
+                    functools.partial(
+                        self._debugger_pool.discard, page["id"], debugger
+                    )
+                )
+                debugger.register_handlers(handlers)
                 return debugger
         else:
             raise util.TimeoutError(
@@ -231,50 +502,55 @@ class ChromeMaster(object):
                 % (page["id"], page["title"] or page["url"])
             )
 
-    def _filter_pages(self, page_list, title, url):
-        """filter pages with title is `title` and url is `url`
+    def attach_all(
+        self, pages, handlers=None, parallelism=8, timeout=10, return_exceptions=False
+    ):
+        """并行附加到多个页面
+
+        :param pages:       页面列表，每项为`get_page_list`返回的页面
+        :type  pages:       list
+        :param handlers:    附加成功后注册的处理器类列表，默认为Log和Network处理器
+        :type  handlers:    list
+        :param parallelism: 同时附加的最大页面数
+        :type  parallelism: int
+        :param timeout:     单个页面的超时时间，单位：秒
+        :type  timeout:     float
+        :param return_exceptions: 是否在结果中返回异常，为False时抛出第一个异常
+        :type  return_exceptions: boolean
+        :return: 与页面顺序一致的调试器列表
         """
-        target_page_list = []
-        title = util.general_encode(title or "")
-        url = util.general_encode(url or "")
-        for page in page_list:
-            page["title"] = util.general_encode(page["title"])
-            if (
-                title
-                and title != page["title"]
-                and not re.match(title + "$", page["title"])
-            ):
-                continue
-            page["url"] = util.general_encode(page["url"])
-            if url and url != page["url"] and not re.match(url + "$", page["url"]):
-                continue
-            ws_addr = page.get("webSocketDebuggerUrl")
-            if not ws_addr and not (
-                page["id"] in self._pages and self._pages[page["id"]].get("debugger")
-            ):
-                # 连接被其它调试器占用
+        return util.run_in_parallel(
+            lambda page: self._get_debugger(page, timeout, handlers),
+            pages,
+            parallelism,
+            return_exceptions,
+        )
+
+    def _create_debugger(self, page, url):
+        """创建页面的调试器，共用浏览器连接时创建页面的会话调试器
+        """
+        if self.use_flat_sessions:
+            browser = self._get_browser_debugger()
+            if not browser:
                 raise RuntimeError(
-                    "Pls close the debugger of page: [%s] %s"
-                    % (page["id"], title or url)
+                    "Browser endpoint of %s:%s is unavailable" % self._addr
                 )
+            return browser.attach_session(page["id"])
+        from .remote_debugger import RemoteDebugger
 
-            target_page_list.append(page)
-        return target_page_list
+        debugger = RemoteDebugger(url, self._open_socket, reactor=self.reactor)
+        debugger.logger = util.logger
+        return debugger
 
-    def _select_new_page(self, page_list, prev_pages, last=True):
-        """select new page
-        """
-        new_page_list = []
-        for page in page_list:
-            if page["id"] not in prev_pages:
-                new_page_list.append(page)
+    def _reserve_page(self, page):
+        """预留页面，预留的页面不会被`find_page`选中"""
+        self._reserved_pages.add(page["id"])
+        if page["id"] not in self._pages:
+            self._pages[page["id"]] = {"debugger": None, "timestamp": time.time()}
+        self._invalidate_page_list()
 
-        if len(new_page_list) == 1:
-            return new_page_list[0]
-        elif len(new_page_list) > 1 and last:
-            return new_page_list[-1]
-        elif len(new_page_list) > 1:
-            raise RuntimeError("Multi new pages found")
+    def _release_page(self, page_id):
+        self._reserved_pages.discard(page_id)
 
     def find_page(self, title=None, url=None, last=True, timeout=5):
         """查找目标页面
@@ -292,30 +568,34 @@ class ChromeMaster(object):
         page_list = None
         target_page_list = []
         prev_pages = copy.copy(self._pages)
+        watcher = self._get_target_watcher() if self.use_target_events else None
         time0 = time.time()
-        prev_page_info = ""
+        page_info = {}
         while time.time() - time0 < timeout:
+            # 获取页面列表前记录版本，之后的页面变化都会唤醒等待
+            version = watcher.version if watcher else 0
             page_list = self.get_page_list(ignore_blank_page)
             if not page_list:
                 util.logger.warn(
                     "[%s] No page found in address %s:%s"
                     % (self.__class__.__name__, self._addr[0], self._addr[1])
                 )
-                time.sleep(0.5)
+                self._wait_for_page_change(watcher, version)
                 continue
 
-            curr_page_info = json.dumps(page_list)
-            if len(page_list) != len(prev_pages) or curr_page_info != prev_page_info:
+            added, removed, changed = self._diff_page_list(page_info, page_list)
+            if added or removed or changed:
                 util.logger.debug(
-                    "[%s] Page list: [%d][%d] %s"
+                    "[%s] Page list: [%d][%d] added=%s removed=%s changed=%s"
                     % (
                         self.__class__.__name__,
                         len(prev_pages),
                         len(page_list),
-                        json.dumps(page_list),
+                        added,
+                        removed,
+                        changed,
                     )
                 )
-                prev_page_info = curr_page_info
 
             target_page_list = self._filter_pages(page_list, title, url)
 
@@ -331,43 +611,68 @@ class ChromeMaster(object):
                         )
                     )
                     return self._get_debugger(page)
-            time.sleep(0.5)
+            self._wait_for_page_change(watcher, version)
         else:
             if not page_list:
                 raise RuntimeError("No page found in address %s:%s" % (self._addr))
             elif not target_page_list:
                 raise RuntimeError(
                     "Can't find page match title=%s url=%s in address %s:%s\nCurrent page list: %s"
-                    % (title, url, self._addr[0], self._addr[1], curr_page_info)
+                    % (title, url, self._addr[0], self._addr[1], json.dumps(page_list))
                 )
 
         # 未有新页面出现，在现有页面中选择
-        if len(target_page_list) > 1 and not last:
-            print(repr(self._addr[1]))
-            raise RuntimeError(
-                "Multi pages found match title=%s url=%s in address %s:%s"
-                % (
-                    util.unicode_decode(title),
-                    util.unicode_decode(url),
-                    util.unicode_decode(self._addr[0]),
-                    self._addr[1],
+        return self._get_debugger(
+            self._select_exist_page(target_page_list, title, url, last)
+        )
+
+    @property
+    def tab_pool(self):
+        """`new_page`使用的空白页面池，首次访问时创建"""
+        with self._tab_pool_lock:
+            if self._tab_pool is None:
+                from .log_handler import LogHandler
+                from .network_handler import NetworkHandler
+                from .page_handler import PageHandler
+                from .tab_pool import TabPool
+
+                self._tab_pool = TabPool(
+                    self,
+                    self.tab_pool_size,
+                    [PageHandler, LogHandler, NetworkHandler],
                 )
-            )
-        elif len(target_page_list) == 1:
-            util.logger.info(
-                "[%s] Select page %s"
-                % (self.__class__.__name__, target_page_list[0]["url"])
-            )
-            return self._get_debugger(target_page_list[0])
-        else:
-            util.logger.info(
-                "[%s] Select last page %s"
-                % (self.__class__.__name__, target_page_list[-1]["url"])
-            )
-            return self._get_debugger(target_page_list[-1])
+            return self._tab_pool
 
-    def new_page(self):
+    def new_page(self, url=None):
         """
-        打开新页面
+        打开新页面，从预创建的空白页面池中取出已附加的页面
+
+        :param url: 打开后导航到的url
+        :type  url: string
+        :return: 页面的调试器
         """
-        pass
+        return self.tab_pool.acquire(url)
+
+
+def _load_export(name):
+    module = importlib.import_module("." + _lazy_exports[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name in _lazy_exports:
+            return _load_export(name)
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_exports))
+
+
+else:
+    # 不支持模块级`__getattr__`时在导入时加载
+    for _name in _lazy_exports:
+        _load_export(_name)
@@ -0,0 +1,757 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""基于asyncio的远程调试器实现
+
+所有页面共用一个事件循环，不再为每个页面创建工作线程。依赖`websockets`库：
+
+    pip install chrome-master[async]
+"""
+
+from __future__ import unicode_literals
+import asyncio
+import json
+import logging
+import time
+
+from . import _ChromeMasterBase, codec, util
+from .handler import DebuggerHandler, build_event_table
+from .remote_debugger import get_response_result
+from .runtime_handler import EVAL_SCRIPT_PARAMS, parse_script_result, wrap_script
+from .tracer import EnumTraceDirection
+from .util import (
+    ChromeDebuggerProtocolError,
+    ConnectionClosedError,
+    IDNotFoundError,
+    JavaScriptError,
+    MessageNotHandledError,
+    TimeoutError,
+    logger,
+    unicode_decode,
+)
+
+
+class AsyncEventStream(object):
+    """协议事件的异步迭代器
+
+    使用方式：
+
+        async for method, params in debugger.events("Page.frameNavigated"):
+            ...
+    """
+
+    def __init__(self, debugger, methods, max_size=0):
+        """
+        :param methods:  关注的事件名或命名空间，为空时接收所有事件
+        :type  methods:  list
+        :param max_size: 缓存的最大事件数，超出时丢弃最早的事件，0表示不限制
+        :type  max_size: int
+        """
+        self._debugger = debugger
+        self._methods = set(methods)
+        self._queue = asyncio.Queue(max_size)
+        self._closed = False
+
+    def match(self, method):
+        """是否关注该事件"""
+        if not self._methods:
+            return True
+        return method in self._methods or method.split(".")[0] in self._methods
+
+    def put(self, item):
+        if self._queue.full():
+            self._queue.get_nowait()  # abandon old event
+        self._queue.put_nowait(item)
+
+    def close(self):
+        """停止接收事件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._debugger.remove_event_stream(self)
+        self.put(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+
+class AsyncRemoteDebugger(object):
+    """基于asyncio的远程调试器"""
+
+    def __init__(self, ws_addr, open_socket_func=None):
+        self._ws_addr = ws_addr
+        self._open_socket = open_socket_func
+        self._ws = None
+        self._seq = 0
+        self._connected = False
+        self._handlers = {}
+        self._event_table = {}
+        self._namespace_table = {}
+        self._futures = {}
+        self._streams = []
+        self._message_queue = None
+        self._tasks = []
+        self._logger = logger
+        self._tracer = None
+
+    @property
+    def logger(self):
+        return self._logger
+
+    @logger.setter
+    def logger(self, _logger):
+        self._logger = _logger
+
+    @property
+    def tracer(self):
+        """协议流量记录器，为None时不记录"""
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, _tracer):
+        self._tracer = _tracer
+
+    def __str__(self):
+        return "<%s object [%s] at 0x%.8X>" % (
+            self.__class__.__name__,
+            self._ws_addr,
+            id(self),
+        )
+
+    async def connect(self, timeout=10):
+        """建立WebSocket连接"""
+        import websockets
+
+        kwargs = {"max_size": None}
+        if self._open_socket:
+            kwargs["sock"] = self._open_socket()
+        try:
+            self._ws = await asyncio.wait_for(
+                websockets.connect(self._ws_addr, **kwargs), timeout
+            )
+        except (asyncio.TimeoutError, OSError) as e:
+            raise RuntimeError("Connect %s failed: %s" % (self._ws_addr, e))
+        self._connected = True
+        self._message_queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.ensure_future(self._recv_loop()),
+            asyncio.ensure_future(self._work_loop()),
+        ]
+        return self
+
+    async def __aenter__(self):
+        if not self._connected:
+            await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _recv_loop(self):
+        """接收消息"""
+        try:
+            async for message in self._ws:
+                self.on_message(message)
+        except Exception as e:
+            self.logger.info("[%s] Recv close: %s" % (self.__class__.__name__, e))
+        finally:
+            self.on_close()
+
+    def on_message(self, message):
+        """收到消息"""
+        if self._tracer is not None:
+            self._tracer.record(
+                EnumTraceDirection.RECV, message, codec.peek_session_id(message)
+            )
+        msg_id, method = codec.peek_message(message)
+        if method:
+            if not self.is_event_consumed(method) and not any(
+                stream.match(method) for stream in self._streams
+            ):
+                # 没有处理器和订阅者的通知消息直接丢弃，不做解码
+                return
+
+        data = message
+        message = codec.loads(data)
+        if "id" in message:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "[%s][%x][recv][%d] %s"
+                    % (self.__class__.__name__, id(self), message["id"], data[:200])
+                )
+            future = self._futures.get(message["id"])
+            if future and not future.done():
+                future.set_result(message)
+        else:
+            message["timestamp"] = time.time()
+            self._message_queue.put_nowait(message)
+            for stream in self._streams:
+                if stream.match(message["method"]):
+                    stream.put((message["method"], message.get("params", {})))
+
+    def on_close(self):
+        self._connected = False
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(
+                    ConnectionClosedError("Websocket connection %x is closed" % id(self))
+                )
+        for stream in list(self._streams):
+            stream.close()
+
+    def enqueue_delay_message(self, message, delay=0.5):
+        """延迟重新处理消息"""
+        timeout = 10
+        if time.time() - message["timestamp"] > timeout:
+            self.logger.warn(
+                "[%s] Abandon message %s" % (self.__class__.__name__, message)
+            )
+            return
+        asyncio.get_event_loop().call_later(
+            delay, self._message_queue.put_nowait, message
+        )
+
+    async def _work_loop(self):
+        """按顺序处理通知消息"""
+        while True:
+            message = await self._message_queue.get()
+            try:
+                await self.on_recv_notify_msg(
+                    message["method"],
+                    message.get("params", {}),
+                    message.get("sessionId", ""),
+                )
+            except MessageNotHandledError:
+                self.enqueue_delay_message(message, 2)
+            except ConnectionClosedError:
+                self.logger.warn(
+                    "[%s] Websocket connection closed" % self.__class__.__name__
+                )
+            except Exception:
+                self.logger.exception(
+                    "[%s] Handle %s message error"
+                    % (self.__class__.__name__, message["method"])
+                )
+
+    async def _post_request(self, method, session_id="", params=None):
+        """发送请求但不等待响应"""
+        if not self._connected:
+            raise ConnectionClosedError("Websocket connection %x is closed" % id(self))
+        self._seq += 1
+        request = {"id": self._seq, "method": method}
+        if params:
+            request["params"] = params
+        if session_id:
+            request["sessionId"] = session_id
+        self._futures[request["id"]] = asyncio.get_event_loop().create_future()
+        try:
+            data = codec.dumps(request)
+            await self._ws.send(data)
+        except Exception as e:
+            self._futures.pop(request["id"], None)
+            raise ConnectionClosedError(str(e))
+        if self._tracer is not None:
+            self._tracer.record(EnumTraceDirection.SEND, data, session_id)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "[%s][%x][send][%d][%s] %s"
+                % (self.__class__.__name__, id(self), request["id"], method, data[:400])
+            )
+        return request
+
+    async def _wait_for_response(self, request, timeout=120):
+        """等待返回数据"""
+        future = self._futures[request["id"]]
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Wait for response of request %s timeout" % request)
+        finally:
+            self._futures.pop(request["id"], None)
+        if "error" in result:
+            self.logger.warn(
+                "[%s] Response error: %s" % (self.__class__.__name__, json.dumps(result))
+            )
+        return get_response_result(result)
+
+    async def send_request(self, method, session_id="", **kwds):
+        """发送请求
+
+        :param method: 命令字
+        :type method:  string
+        """
+        request = await self._post_request(method, session_id, kwds)
+        return await self._wait_for_response(request)
+
+    async def send_requests(
+        self, requests, session_id="", timeout=120, return_exceptions=False
+    ):
+        """批量发送请求，参数与`RemoteDebugger.send_requests`一致"""
+        posted = []
+        for it in requests:
+            if isinstance(it, (tuple, list)):
+                method, params = it[0], it[1] if len(it) > 1 else None
+            else:
+                method, params = it, None
+            posted.append(await self._post_request(method, session_id, params))
+        return await asyncio.gather(
+            *[self._wait_for_response(request, timeout) for request in posted],
+            return_exceptions=return_exceptions
+        )
+
+    def events(self, *methods, **kwargs):
+        """订阅协议事件
+
+        :param methods:  事件名（如`Page.frameNavigated`）或命名空间（如`Network`）
+        :param max_size: 缓存的最大事件数
+        :rtype: AsyncEventStream
+        """
+        stream = AsyncEventStream(self, methods, kwargs.get("max_size", 0))
+        if not self._connected:
+            stream.close()
+        else:
+            self._streams.append(stream)
+        return stream
+
+    def remove_event_stream(self, stream):
+        if stream in self._streams:
+            self._streams.remove(stream)
+
+    async def on_recv_notify_msg(self, method, params, session_id=""):
+        """接收到通知消息
+
+        :param method: 消息方法名
+        :type  method: string
+        :param params: 参数字典
+        :type  params: dict
+        :param session_id: 消息所属的会话ID
+        :type  session_id: string
+        """
+        callback = self._event_table.get(method)
+        if callback:
+            await callback(params, session_id)
+            return
+        namespace, method = method.split(".", 1)
+        handler = self._namespace_table.get(namespace)
+        if handler:
+            await handler.on_recv_notify_msg(method, params)
+
+    def is_event_consumed(self, method):
+        """是否有处理器关注该事件"""
+        return (
+            method in self._event_table
+            or method.split(".", 1)[0] in self._namespace_table
+        )
+
+    def _update_event_table(self):
+        """根据已注册处理器声明的事件重建事件分发表"""
+        self._event_table, self._namespace_table = build_event_table(self._handlers)
+
+    async def register_handler(self, handler_cls, *args, **kwargs):
+        """注册处理器"""
+        namespace = handler_cls.namespace
+        if namespace in self._handlers:
+            self.logger.info(
+                "[%s] Namespace %s handler is realdy registered"
+                % (self.__class__.__name__, namespace)
+            )
+            return self._handlers[namespace]
+        self.logger.debug(
+            "[%s] Register handler %s" % (self.__class__.__name__, namespace)
+        )
+        handler = handler_cls(self, *args, **kwargs)
+        handler.logger = self.logger
+        self._handlers[namespace] = handler
+        self._update_event_table()
+        for dep in handler.__class__.dependencies:
+            if not dep.namespace in self._handlers:
+                await self.register_handler(dep)
+        await handler.on_attached()
+        return handler
+
+    def unregister_handler(self, handler_cls):
+        """移除处理器"""
+        namespace = handler_cls.namespace
+        if not namespace in self._handlers:
+            raise RuntimeError("Handler %s not registered" % (handler_cls))
+        self._handlers.pop(namespace)
+        self._update_event_table()
+
+    async def dispatch_event(self, event, *args, **kwargs):
+        for ns in list(self._handlers):
+            await self._handlers[ns].dispatch_event(event, *args, **kwargs)
+
+    def __getattr__(self, attr):
+        """根据命名空间获取已注册的处理器"""
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        for namespace in self._handlers:
+            if namespace == attr or namespace.lower() == attr:
+                return self._handlers[namespace]
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (self.__class__.__name__, attr)
+        )
+
+    async def close(self):
+        """关闭调试器"""
+        if self._ws:
+            self.logger.info(
+                "[%s] WebSocket connection closed" % self.__class__.__name__
+            )
+            ws, self._ws = self._ws, None
+            await ws.close()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self.on_close()
+
+
+class AsyncDebuggerHandler(DebuggerHandler):
+    """异步调试器处理器，通过属性调用发送的请求均为协程"""
+
+    async def dispatch_event(self, event, *args, **kwargs):
+        for evt, listener in self._event_listeners:
+            if event == evt:
+                result = listener(*args, **kwargs)
+                if asyncio.iscoroutine(result):
+                    await result
+
+    async def global_dispatch_event(self, event, *args, **kwargs):
+        await self._debugger.dispatch_event(event, *args, **kwargs)
+
+    async def on_attached(self):
+        """附加到调试器成功回调"""
+        pass
+
+    async def on_recv_notify_msg(self, method, params, session_id=""):
+        """接收到通知消息"""
+        callbacks = self.get_event_callbacks()
+        if callbacks and method in callbacks:
+            await callbacks[method](params, session_id)
+
+    on_recv_notify_msg.default_dispatch = True
+
+    def __getattr__(self, attr):
+        """允许通过直接调用的方式发送请求"""
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+
+        async def _wrap_func(*args, **kwargs):
+            """ """
+            return await self._debugger.send_request(
+                self.__class__.namespace + "." + attr, *args, **kwargs
+            )
+
+        return _wrap_func
+
+
+class AsyncPageHandler(AsyncDebuggerHandler):
+    """Page命名空间的异步处理器，仅维护顶层frame"""
+
+    namespace = "Page"
+    events = {"frameNavigated": "on_frame_navigated"}
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncPageHandler, self).__init__(*args, **kwargs)
+        self._main_frame_id = None
+
+    async def on_attached(self):
+        await self.enable()
+        resource_tree = await self.getResourceTree()
+        self._main_frame_id = resource_tree["frameTree"]["frame"].get("id")
+
+    async def on_frame_navigated(self, params, session_id=""):
+        if "parentId" not in params["frame"] and not session_id:
+            self._main_frame_id = params["frame"]["id"]
+            self.logger.info(
+                "[%s] Root frame [%s] %s loaded"
+                % (
+                    self.__class__.namespace,
+                    params["frame"]["id"],
+                    params["frame"]["url"],
+                )
+            )
+
+    def get_main_frame_id(self):
+        """获取顶层frame id"""
+        return self._main_frame_id
+
+
+class AsyncRuntimeHandler(AsyncDebuggerHandler):
+    """Runtime命名空间的异步处理器"""
+
+    namespace = "Runtime"
+    dependencies = [AsyncPageHandler]
+    events = {
+        "executionContextCreated": "on_execution_context_created",
+        "executionContextDestroyed": "on_execution_context_destroyed",
+        "executionContextsCleared": "on_execution_contexts_cleared",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncRuntimeHandler, self).__init__(*args, **kwargs)
+        self._context_dict = {}
+        self._session_dict = {}  # frame id => 执行上下文所属的会话ID
+        self._context_changed = asyncio.Condition()
+
+    async def on_attached(self):
+        await self.enable()
+
+    async def on_execution_context_created(self, params, session_id=""):
+        context = params["context"]
+        if "type" in context and context["type"] == "Extension":
+            return
+        aux_data = context.get("auxData", {})
+        if not aux_data.get("isDefault", True):
+            return
+        frame_id = context.get("frameId") or aux_data.get("frameId")
+        self._context_dict[frame_id] = context["id"]
+        self._session_dict[frame_id] = session_id
+        self.logger.info(
+            "[%s] Add context: %s(%s %s)"
+            % (
+                self.__class__.namespace,
+                context["id"],
+                frame_id,
+                context.get("origin"),
+            )
+        )
+        async with self._context_changed:
+            self._context_changed.notify_all()
+
+    async def on_execution_context_destroyed(self, params, session_id=""):
+        context_id = params["executionContextId"]
+        for frame_id in list(self._context_dict):
+            if (
+                self._context_dict[frame_id] == context_id
+                and self._session_dict.get(frame_id, "") == session_id
+            ):
+                self._context_dict.pop(frame_id)
+                self._session_dict.pop(frame_id, None)
+
+    async def on_execution_contexts_cleared(self, params, session_id=""):
+        for frame_id in list(self._context_dict):
+            if self._session_dict.get(frame_id, "") == session_id:
+                self._context_dict.pop(frame_id)
+                self._session_dict.pop(frame_id, None)
+
+    def get_main_context_id(self):
+        frame_id = self._debugger.page.get_main_frame_id()
+        if not frame_id:
+            return None
+        return self._context_dict.get(frame_id)
+
+    async def wait_for_context(self, frame_id=None, timeout=10):
+        """等待frame的执行上下文创建
+
+        :return: context id，超时返回None
+        """
+        time0 = time.time()
+        while True:
+            context_id = self._context_dict.get(
+                frame_id or self._debugger.page.get_main_frame_id()
+            )
+            if context_id:
+                return context_id
+            remaining = timeout - (time.time() - time0)
+            if remaining <= 0:
+                return None
+            async with self._context_changed:
+                try:
+                    await asyncio.wait_for(self._context_changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _eval_script(self, context_id, script, session_id=""):
+        script = unicode_decode(script)
+        self.logger.info(
+            "[%s][%s][eval][%d] %s"
+            % (self.__class__.namespace, context_id, len(script), script[:200].strip())
+        )
+        script = wrap_script(script)
+        try:
+            result = await self.evaluate(
+                contextId=context_id,
+                expression=script,
+                session_id=session_id,
+                **EVAL_SCRIPT_PARAMS
+            )
+        except IDNotFoundError:
+            raise
+        except ChromeDebuggerProtocolError:
+            result = await self.evaluate(
+                expression=script, session_id=session_id, **EVAL_SCRIPT_PARAMS
+            )
+        if "result" not in result:
+            raise RuntimeError("Invalid Response: %s" % result)
+        result = unicode_decode(result["result"]["value"])
+        self.logger.info(
+            "[%s][%s][retn] %s" % (self.__class__.namespace, context_id, result[:512])
+        )
+        return parse_script_result(result)
+
+    async def eval_script(self, frame_id, script, timeout=10):
+        """执行JavaScript"""
+        time0 = time.time()
+        while True:
+            remaining = timeout - (time.time() - time0)
+            context_id = await self.wait_for_context(frame_id, max(remaining, 0))
+            if not context_id:
+                raise TimeoutError(
+                    "Can't find context id of frame %s"
+                    % (frame_id or self._debugger.page.get_main_frame_id())
+                )
+            frame_id = frame_id or self._debugger.page.get_main_frame_id()
+            session_id = self._session_dict.get(frame_id, "")
+            try:
+                success, result = await self._eval_script(
+                    context_id, script, session_id
+                )
+                break
+            except IDNotFoundError:
+                # context已失效，等待新的context创建
+                if self._context_dict.get(frame_id) == context_id:
+                    self._context_dict.pop(frame_id)
+                    self._session_dict.pop(frame_id, None)
+                if time.time() - time0 >= timeout:
+                    raise
+        if not success:
+            raise JavaScriptError(frame_id, result)
+        return result
+
+
+class AsyncChromeMaster(_ChromeMasterBase):
+    """基于asyncio的Chrome控制端，不创建同步控制端的连接池和后台线程"""
+
+    instances = {}
+
+    async def _request_page_list_async(self):
+        """通过asyncio请求`/json`接口"""
+        if self._open_socket:
+            reader, writer = await asyncio.open_connection(sock=self._open_socket())
+        else:
+            reader, writer = await asyncio.open_connection(
+                self._addr[0], self._addr[1]
+            )
+        try:
+            request = "GET /json HTTP/1.1\r\nHost: %s:%d\r\nConnection: close\r\n\r\n" % (
+                self._addr[0],
+                self._addr[1],
+            )
+            writer.write(request.encode("utf8"))
+            data = await asyncio.wait_for(reader.read(), 60)
+        finally:
+            writer.close()
+        header, _, body = data.partition(b"\r\n\r\n")
+        for line in header.split(b"\r\n")[1:]:
+            key, _, value = line.partition(b":")
+            if key.strip().lower() == b"content-length":
+                body = body[: int(value.strip())]
+        return body
+
+    async def get_page_list(self, ignore_blank_page=True):
+        """获取打开的页面列表
+
+        :param ignore_blank_page: 是否过滤空白页面
+        :type  ignore_blank_page: boolean
+        """
+        return self._parse_page_list(
+            await self._request_page_list_async(), ignore_blank_page
+        )
+
+    async def wait_for_debugger(self, debugger):
+        runtime = await debugger.register_handler(AsyncRuntimeHandler)
+        return bool(await runtime.wait_for_context(timeout=2))
+
+    async def _get_debugger(self, page, timeout=10):
+        debugger = self._pages[page["id"]]["debugger"]
+        if debugger:
+            return debugger
+        url = page.get("webSocketDebuggerUrl")
+        if not url:
+            raise RuntimeError("Pls close the page debugger")
+        time0 = time.time()
+        while time.time() - time0 < timeout:
+            debugger = AsyncRemoteDebugger(url, self._open_socket)
+            debugger.logger = util.logger
+            await debugger.connect()
+            if not await self.wait_for_debugger(debugger):
+                util.logger.warn(
+                    "[%s] Test debugger of page [%s] %s failed"
+                    % (
+                        self.__class__.__name__,
+                        page["id"],
+                        page["title"] or page["url"],
+                    )
+                )
+                await debugger.close()
+            else:
+                self._pages[page["id"]]["debugger"] = debugger
+                return debugger
+        raise util.TimeoutError(
+            "Get debugger for page [%s] %s failed"
+            % (page["id"], page["title"] or page["url"])
+        )
+
+    async def find_page(self, title=None, url=None, last=True, timeout=5):
+        """查找目标页面，参数与`ChromeMaster.find_page`一致"""
+        page_list = None
+        target_page_list = []
+        prev_pages = dict(self._pages)
+        time0 = time.time()
+        while time.time() - time0 < timeout:
+            # 与`ChromeMaster.find_page`一致，查找时不过滤空白页面
+            page_list = await self.get_page_list(False)
+            if not page_list:
+                util.logger.warn(
+                    "[%s] No page found in address %s:%s"
+                    % (self.__class__.__name__, self._addr[0], self._addr[1])
+                )
+                await asyncio.sleep(0.5)
+                continue
+
+            target_page_list = self._filter_pages(page_list, title, url)
+            if target_page_list:
+                page = self._select_new_page(target_page_list, prev_pages, last)
+                if page:
+                    util.logger.info(
+                        "[%s] Select new page [%s] %s"
+                        % (
+                            self.__class__.__name__,
+                            util.unicode_decode(page["id"]),
+                            util.unicode_decode(page["title"] or page["url"]),
+                        )
+                    )
+                    return await self._get_debugger(page)
+            await asyncio.sleep(0.5)
+
+        if not page_list:
+            raise RuntimeError("No page found in address %s:%s" % (self._addr))
+        elif not target_page_list:
+            raise RuntimeError(
+                "Can't find page match title=%s url=%s in address %s:%s\nCurrent page list: %s"
+                % (title, url, self._addr[0], self._addr[1], json.dumps(page_list))
+            )
+        return await self._get_debugger(
+            self._select_exist_page(target_page_list, title, url, last)
+        )
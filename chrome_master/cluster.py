@@ -0,0 +1,230 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""多浏览器集群
+
+管理多个Chrome调试端口，按负载分配页面，不响应的浏览器不再分配新页面：
+
+    cluster = ChromeCluster([("localhost", 9222), ("localhost", 9223)])
+    debugger = cluster.new_page("https://www.qq.com/")
+"""
+
+from __future__ import unicode_literals
+import threading
+import time
+
+from . import ChromeMaster, util
+
+
+class _Endpoint(object):
+    """调试端口的状态"""
+
+    def __init__(self, master):
+        self.master = master
+        self.tab_count = 0  # 最近一次获取的页面数
+        self.pending = 0  # 正在分配的页面数
+        self.latency = None  # 请求耗时的指数移动平均值，单位：秒
+        self.failures = 0  # 连续失败次数
+        self.drained = False  # 因连续失败不再分配，探测成功后自动恢复
+        self.manually_drained = False  # 通过`drain`设置，只能通过`drain`恢复
+
+    @property
+    def available(self):
+        return not self.drained and not self.manually_drained
+
+    @property
+    def addr(self):
+        return self.master._addr
+
+    def update_latency(self, latency, factor=0.3):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = factor * latency + (1 - factor) * self.latency
+
+    def get_score(self):
+        """负载分数，越小越优先分配"""
+        return (self.tab_count + self.pending + 1) * ((self.latency or 0) + 0.01)
+
+
+class ChromeCluster(object):
+    """多个Chrome调试端口组成的集群
+    """
+
+    def __init__(self, addrs, open_socket_func=None, max_failures=3, check_interval=10):
+        """
+        :param addrs:            调试端口地址列表，每项为(ip, port)
+        :type  addrs:            list
+        :param open_socket_func: 创建socket函数
+        :type  open_socket_func: function
+        :param max_failures:     连续失败多少次后不再分配新页面
+        :type  max_failures:     int
+        :param check_interval:   探测间隔，单位：秒，为0时不在后台探测
+        :type  check_interval:   float
+        """
+        self._lock = threading.Lock()
+        self._endpoints = [
+            _Endpoint(ChromeMaster(addr, open_socket_func)) for addr in addrs
+        ]
+        self._max_failures = max_failures
+        self._check_interval = check_interval
+        self._stop_event = threading.Event()
+        self.refresh()
+        if check_interval:
+            t = threading.Thread(target=self._check_thread)
+            t.setDaemon(True)
+            t.start()
+
+    def _record_success(self, endpoint, latency):
+        with self._lock:
+            endpoint.update_latency(latency)
+            endpoint.failures = 0
+            if endpoint.drained:
+                endpoint.drained = False
+                util.logger.info(
+                    "[%s] Browser %s:%s recovered"
+                    % ((self.__class__.__name__,) + tuple(endpoint.addr))
+                )
+
+    def _record_failure(self, endpoint, error):
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures >= self._max_failures and not endpoint.drained:
+                endpoint.drained = True
+                util.logger.warn(
+                    "[%s] Browser %s:%s drained: %s"
+                    % ((self.__class__.__name__,) + tuple(endpoint.addr) + (error,))
+                )
+
+    def _probe(self, endpoint):
+        """获取页面列表，更新页面数和耗时
+
+        :return: 页面列表，失败时返回None
+        """
+        time0 = time.time()
+        try:
+            page_list = endpoint.master.get_page_list()
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            return None
+        self._record_success(endpoint, time.time() - time0)
+        endpoint.tab_count = len(page_list)
+        return page_list
+
+    def refresh(self):
+        """探测所有调试端口，不探测手动摘除的调试端口"""
+        with self._lock:
+            endpoints = [it for it in self._endpoints if not it.manually_drained]
+        util.run_in_parallel(self._probe, endpoints)
+
+    def _check_thread(self):
+        while not self._stop_event.wait(self._check_interval):
+            self.refresh()
+
+    def _get_live_endpoints(self):
+        """获取可分配页面的调试端口，按负载从低到高排序"""
+        with self._lock:
+            endpoints = [it for it in self._endpoints if it.available]
+            endpoints.sort(key=lambda it: it.get_score())
+            return endpoints
+
+    def drain(self, addr, drained=True):
+        """设置调试端口是否不再分配新页面，手动摘除的调试端口不会自动恢复
+
+        :param addr:    (ip, port)
+        :param drained: 为False时恢复调试端口，同时清除因失败导致的摘除状态
+        """
+        for endpoint in self._endpoints:
+            if tuple(endpoint.addr) == tuple(addr):
+                with self._lock:
+                    endpoint.manually_drained = drained
+                    if not drained:
+                        endpoint.drained = False
+                        endpoint.failures = 0
+                return
+        raise ValueError("Browser %s:%s not in cluster" % tuple(addr))
+
+    def new_page(self, url=None):
+        """在负载最低的浏览器中打开新页面
+
+        :param url: 打开后导航到的url
+        :type  url: string
+        :return: 页面的调试器
+        """
+        error = None
+        for endpoint in self._get_live_endpoints():
+            with self._lock:
+                endpoint.pending += 1
+            time0 = time.time()
+            try:
+                debugger = endpoint.master.new_page(url)
+            except Exception as e:
+                self._record_failure(endpoint, e)
+                error = e
+                continue
+            finally:
+                with self._lock:
+                    endpoint.pending -= 1
+            self._record_success(endpoint, time.time() - time0)
+            with self._lock:
+                endpoint.tab_count += 1
+            return debugger
+        raise RuntimeError("No browser available in cluster: %s" % error)
+
+    def find_page(self, title=None, url=None, last=True, timeout=5):
+        """在所有浏览器中查找目标页面，多个浏览器中都有匹配页面时选择负载最低的
+
+        参数同`ChromeMaster.find_page`
+        """
+        time0 = time.time()
+        while True:
+            for endpoint in self._get_live_endpoints():
+                page_list = self._probe(endpoint)
+                if page_list and endpoint.master._filter_pages(page_list, title, url):
+                    return endpoint.master.find_page(
+                        title, url, last, max(timeout - (time.time() - time0), 0.5)
+                    )
+            if time.time() - time0 >= timeout:
+                break
+            time.sleep(0.5)
+        raise RuntimeError(
+            "Can't find page match title=%s url=%s in cluster" % (title, url)
+        )
+
+    def stats(self):
+        """获取各调试端口的状态
+
+        :return: {"ip:port": {"tab_count", "pending", "latency", "failures",
+                               "drained", "manually_drained"}}
+        """
+        with self._lock:
+            return dict(
+                (
+                    "%s:%s" % tuple(it.addr),
+                    {
+                        "tab_count": it.tab_count,
+                        "pending": it.pending,
+                        "latency": it.latency,
+                        "failures": it.failures,
+                        "drained": it.drained,
+                        "manually_drained": it.manually_drained,
+                    },
+                )
+                for it in self._endpoints
+            )
+
+    def close(self):
+        """停止后台探测"""
+        self._stop_event.set()
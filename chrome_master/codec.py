@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""协议消息的JSON编解码
+
+优先使用已安装的orjson/ujson，未安装时使用标准库json
+"""
+
+from __future__ import unicode_literals
+import json
+import re
+
+
+_HEADER_PATTERN = re.compile(r'\{\s*"(id|method)"\s*:\s*(?:(\d+)|"([^"\\]*)")')
+_SESSION_PATTERN = re.compile(r'"sessionId"\s*:\s*"([^"\\]*)"\s*\}\s*$')
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode("utf8")
+
+    return orjson.loads, dumps
+
+
+def _load_ujson():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    return ujson.loads, dumps
+
+
+def _load_json():
+    return json.loads, json.dumps
+
+
+_codec_loaders = {
+    "orjson": _load_orjson,
+    "ujson": _load_ujson,
+    "json": _load_json,
+}
+
+_codec_name = None
+_loads = json.loads
+_dumps = json.dumps
+
+
+def set_codec(name=None):
+    """设置JSON编解码库
+
+    :param name: `orjson`、`ujson`或`json`，为None时自动选择已安装的最快实现
+    :type  name: string
+    """
+    global _codec_name, _loads, _dumps
+    if name:
+        names = [name]
+    else:
+        names = ["orjson", "ujson", "json"]
+    for it in names:
+        if it not in _codec_loaders:
+            raise ValueError("Unknown json codec %s" % it)
+        try:
+            _loads, _dumps = _codec_loaders[it]()
+        except ImportError:
+            if name:
+                raise
+            continue
+        _codec_name = it
+        break
+
+
+def get_codec():
+    """获取当前使用的JSON编解码库名称"""
+    return _codec_name
+
+
+def loads(data):
+    """解码JSON"""
+    return _loads(data)
+
+
+def dumps(obj):
+    """编码JSON，快速实现无法编码时回退到标准库"""
+    try:
+        return _dumps(obj)
+    except (TypeError, OverflowError):
+        return json.dumps(obj)
+
+
+def peek_message(data):
+    """不解码整个消息，从消息头部获取`id`或`method`字段
+
+    :return: (id, method)，无法识别时均为None
+    """
+    try:
+        match = _HEADER_PATTERN.match(data)
+    except TypeError:
+        match = None  # bytes
+    if not match:
+        return None, None
+    if match.group(1) == "id":
+        if match.group(2) is None:
+            return None, None
+        return int(match.group(2)), None
+    return None, match.group(3)
+
+
+def peek_session_id(data):
+    """不解码整个消息，获取顶层的`sessionId`字段
+
+    Chrome总是将`sessionId`放在消息末尾，只需检查消息尾部
+    """
+    try:
+        match = _SESSION_PATTERN.search(data[-128:])
+    except TypeError:
+        match = None  # bytes
+    if not match:
+        return ""
+    return match.group(1)
+
+
+set_codec()
@@ -0,0 +1,110 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""执行上下文索引
+
+维护frame与执行上下文的双向映射，并允许等待frame的执行上下文创建
+"""
+
+from __future__ import unicode_literals
+import threading
+import time
+
+
+class ContextIndex(object):
+    """frame与执行上下文的双向索引，可在多个线程中使用
+
+    不同会话中的context id可能重复，执行上下文以(会话ID, context id)标识。
+    每个frame有一个默认上下文，另有按名称区分的隔离上下文（isolated world）
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frames = {}  # (frame id, 隔离上下文名称) => (会话ID, context id)
+        self._contexts = {}  # (会话ID, context id) => (frame id, 隔离上下文名称)
+
+    def add(self, frame_id, context_id, session_id="", world_name=None):
+        """添加执行上下文，唤醒等待该frame的线程
+
+        :param world_name: 隔离上下文名称，默认上下文为None
+        """
+        key = (frame_id, world_name)
+        with self._cond:
+            prev_context = self._frames.get(key)
+            if prev_context is not None:
+                self._contexts.pop(prev_context, None)
+            self._frames[key] = (session_id, context_id)
+            self._contexts[(session_id, context_id)] = key
+            self._cond.notify_all()
+
+    def remove(self, context_id, session_id=""):
+        """移除执行上下文
+
+        :return: 上下文所属的frame id，不存在时返回None
+        """
+        with self._cond:
+            key = self._contexts.pop((session_id, context_id), None)
+            if key is None:
+                return None
+            if self._frames.get(key) == (session_id, context_id):
+                self._frames.pop(key)
+            return key[0]
+
+    def clear(self, session_id=""):
+        """移除会话中的所有执行上下文
+
+        :return: 被移除的(会话ID, context id)列表
+        """
+        with self._cond:
+            contexts = [it for it in self._contexts if it[0] == session_id]
+            for it in contexts:
+                self.remove(it[1], session_id)
+            return contexts
+
+    def get_context(self, frame_id, world_name=None):
+        """获取frame的执行上下文
+
+        :return: (会话ID, context id)，不存在时返回None
+        """
+        return self._frames.get((frame_id, world_name))
+
+    def get_frame(self, context_id, session_id=""):
+        """获取执行上下文所属的frame id，不存在时返回None"""
+        key = self._contexts.get((session_id, context_id))
+        return key[0] if key else None
+
+    def wait(self, timeout):
+        """等待新的执行上下文创建"""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def wait_for_context(self, frame_id, timeout, world_name=None):
+        """等待frame的执行上下文创建
+
+        :return: (会话ID, context id)，超时返回None
+        """
+        time0 = time.time()
+        with self._cond:
+            while True:
+                context = self._frames.get((frame_id, world_name))
+                if context is not None:
+                    return context
+                remaining = timeout - (time.time() - time0)
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def __len__(self):
+        return len(self._contexts)
@@ -0,0 +1,198 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""页面调试器池
+
+管理页面调试器的生命周期：定期探测连接，断开的连接自动重连，
+空闲过久、页面已关闭或超出数量上限的调试器被关闭
+"""
+
+from __future__ import unicode_literals
+import collections
+import threading
+import time
+
+from . import util
+
+
+class DebuggerPool(object):
+    """页面调试器池，超出数量上限时关闭最久未使用的调试器
+
+    默认不限制数量和空闲时间，被关闭的调试器可能仍被调用方持有，需要时再开启
+    """
+
+    def __init__(
+        self,
+        max_size=None,
+        idle_timeout=None,
+        check_interval=30,
+        get_alive_ids=None,
+        on_evict=None,
+    ):
+        """
+        :param max_size:       最多保留的调试器数，为None时不限制
+        :type  max_size:       int
+        :param idle_timeout:   调试器的最长空闲时间，单位：秒，为None时不限制
+        :type  idle_timeout:   float
+        :param check_interval: 探测间隔，单位：秒
+        :type  check_interval: float
+        :param get_alive_ids:  获取现存页面ID集合的函数
+        :type  get_alive_ids:  function
+        :param on_evict:       调试器被移除时的回调，参数为(页面ID, 调试器)
+        :type  on_evict:       function
+        """
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._get_alive_ids = get_alive_ids
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # 页面ID => [调试器, 最近使用时间]
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, page_id):
+        """获取页面的调试器
+
+        :return: 调试器，不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(page_id)
+            if entry is None:
+                return None
+            if not entry[0].closed:
+                self._entries.pop(page_id)
+                entry[1] = time.time()
+                self._entries[page_id] = entry
+                return entry[0]
+        self.discard(page_id, entry[0])
+        return None
+
+    def put(self, page_id, debugger):
+        """放入页面的调试器"""
+        evicted = []
+        with self._lock:
+            self._entries.pop(page_id, None)
+            self._entries[page_id] = [debugger, time.time()]
+            while self._max_size is not None and len(self._entries) > self._max_size:
+                evicted.append(self._entries.popitem(last=False))
+            if self._thread is None and self._check_interval:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.setDaemon(True)
+                self._thread.start()
+        for it, entry in evicted:
+            self._close(it, entry[0], "least recently used")
+
+    def remove(self, page_id, reason="removed"):
+        """移除并关闭页面的调试器"""
+        with self._lock:
+            entry = self._entries.pop(page_id, None)
+        if entry:
+            self._close(page_id, entry[0], reason)
+
+    def discard(self, page_id, debugger):
+        """移除已被调用方关闭的调试器，不再调用其`close`"""
+        with self._lock:
+            entry = self._entries.get(page_id)
+            if entry is None or entry[0] is not debugger:
+                return
+            self._entries.pop(page_id)
+        if self._on_evict:
+            self._on_evict(page_id, debugger)
+
+    def evict_vanished(self, alive_ids):
+        """关闭已关闭页面的调试器
+
+        :param alive_ids: 现存页面ID集合
+        :type  alive_ids: set
+        """
+        with self._lock:
+            page_ids = [it for it in self._entries if it not in alive_ids]
+        for page_id in page_ids:
+            self.remove(page_id, "page vanished")
+
+    def _close(self, page_id, debugger, reason):
+        util.logger.info(
+            "[%s] Close debugger of page %s: %s"
+            % (self.__class__.__name__, page_id, reason)
+        )
+        if self._on_evict:
+            self._on_evict(page_id, debugger)
+        try:
+            debugger.close()
+        except:
+            util.logger.exception(
+                "[%s] Close debugger of page %s failed"
+                % (self.__class__.__name__, page_id)
+            )
+
+    def check(self):
+        """探测所有调试器：移除页面已关闭或空闲过久的调试器，重连断开的调试器"""
+        alive_ids = None
+        if self._get_alive_ids:
+            try:
+                alive_ids = self._get_alive_ids()
+            except Exception as e:
+                util.logger.warn(
+                    "[%s] Get alive pages failed: %s" % (self.__class__.__name__, e)
+                )
+        if alive_ids is not None:
+            self.evict_vanished(alive_ids)
+        with self._lock:
+            entries = list(self._entries.items())
+        now = time.time()
+        probe_entries = []
+        for page_id, (debugger, last_used) in entries:
+            if self._idle_timeout is not None:
+                last_used = max(last_used, debugger.last_active_time)
+                if now - last_used > self._idle_timeout:
+                    self.remove(page_id, "idle timeout")
+                    continue
+            probe_entries.append((page_id, debugger))
+        # 并行探测，避免多个调试器的探测和重连超时累加
+        util.run_in_parallel(self._probe, probe_entries, return_exceptions=True)
+
+    def _probe(self, entry):
+        page_id, debugger = entry
+        if debugger.closed:
+            # 已被调用方关闭，不能重连
+            self.discard(page_id, debugger)
+            return
+        if debugger.ping():
+            return
+        try:
+            debugger.reconnect()
+        except Exception as e:
+            self.remove(page_id, "reconnect failed: %s" % e)
+
+    def _run(self):
+        while not self._stop_event.wait(self._check_interval):
+            try:
+                self.check()
+            except:
+                util.logger.exception(
+                    "[%s] Check debuggers failed" % self.__class__.__name__
+                )
+
+    def close(self):
+        """停止探测并关闭所有调试器"""
+        self._stop_event.set()
+        with self._lock:
+            entries, self._entries = self._entries, collections.OrderedDict()
+        for page_id, entry in entries.items():
+            self._close(page_id, entry[0], "pool closed")
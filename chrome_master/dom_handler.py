@@ -19,7 +19,6 @@
 
 from __future__ import unicode_literals
 import io
-import xml.dom.minidom as minidom
 
 from .handler import DebuggerHandler
 from .util import NodeNotFoundError
@@ -143,76 +142,61 @@ class DOMHandler(DebuggerHandler):
     """
 
     namespace = "DOM"
+    events = {
+        "attributeModified": "on_attribute_modified",
+        "childNodeInserted": "on_child_node_inserted",
+        "childNodeRemoved": "on_child_node_removed",
+        "documentUpdated": "on_document_updated",
+        "setChildNodes": "on_set_child_nodes",
+    }
 
     def on_attached(self):
         """附加到调试器成功回调
         """
+        import xml.dom.minidom as minidom
+
         self.enable()
         self._dom = minidom.getDOMImplementation()
         self._doc = None
         self.get_dom_tree()
 
-    def on_recv_notify_msg(self, method, params):
-        """接收到通知消息
+    def on_attribute_modified(self, params, session_id=""):
+        """节点属性被修改
+        """
+        self._on_node_attribute_modified(
+            params["nodeId"], params["name"], params["value"]
+        )
 
-        :param method: 消息方法名
-        :type  method: string
-        :param params: 参数字典
-        :type  params: dict
+    def on_child_node_inserted(self, params, session_id=""):
+        """插入子节点
         """
-        if method == "attributeModified":
-            self._on_node_attribute_modified(
-                params["nodeId"], params["name"], params["value"]
-            )
-        elif method == "attributeRemoved":
-            pass
-        elif method == "characterDataModified":
-            pass
-        elif method == "childNodeCountUpdated":
-            pass
-        elif method == "childNodeInserted":
-            self._on_node_inserted(params["parentNodeId"], params["node"])
-        elif method == "childNodeRemoved":
-            self._on_node_removed(params["parentNodeId"], params["nodeId"])
-        elif method == "distributedNodesUpdated":
-            pass
-        elif method == "documentUpdated":
-            self.logger.info("[%s] Document updated" % (self.__class__.__name__))
-            self._doc = None
-            self.get_dom_tree()
-            self._on_document_updated()
-        elif method == "inlineStyleInvalidated":
-            pass
-        elif method == "pseudoElementAdded":
-            pass
-        elif method == "pseudoElementRemoved":
-            pass
-        elif method == "setChildNodes":
-            root = self._get_node_by_id(self._doc, params["parentId"])
-            if not root:
-                self.logger.warn(
-                    "[%s] Node %d not found"
-                    % (self.__class__.namespace, params["parentId"])
-                )
-                return
-            tree = {"children": params["nodes"]}
-            self._build_dom_tree(root, tree)
-        elif method == "shadowRootPopped":
-            pass
-        elif method == "shadowRootPushed":
-            pass
-
-        elif method == "setNodeValue":
-            node_id = params["nodeId"]
-            if not node_id:
-                self.logger.warn("[%s] Get node failed." % self.__class__.namespace)
-                return
-            self.set_node_value(node_id, params["value"])
+        self._on_node_inserted(params["parentNodeId"], params["node"])
 
-        else:
+    def on_child_node_removed(self, params, session_id=""):
+        """移除子节点
+        """
+        self._on_node_removed(params["parentNodeId"], params["nodeId"])
+
+    def on_document_updated(self, params, session_id=""):
+        """文档更新
+        """
+        self.logger.info("[%s] Document updated" % (self.__class__.__name__))
+        self._doc = None
+        self.get_dom_tree()
+        self._on_document_updated()
+
+    def on_set_child_nodes(self, params, session_id=""):
+        """返回请求的子节点
+        """
+        root = self._get_node_by_id(self._doc, params["parentId"])
+        if not root:
             self.logger.warn(
-                "[%s] Unknown event %s" % (self.__class__.namespace, method)
+                "[%s] Node %d not found"
+                % (self.__class__.namespace, params["parentId"])
             )
+            return
+        tree = {"children": params["nodes"]}
+        self._build_dom_tree(root, tree)
 
     def _on_document_updated(self):
         for listener in self._event_listeners:
@@ -20,11 +20,34 @@ from __future__ import unicode_literals
 from .util import logger
 
 
+def build_event_table(handlers):
+    """根据处理器声明的事件构建事件分发表
+
+    :param handlers: 命名空间到处理器的映射
+    :type  handlers: dict
+    :return: (完整事件名到回调的映射, 未声明事件的命名空间到处理器的映射)
+    """
+    event_table = {}
+    namespace_table = {}
+    for namespace, handler in handlers.items():
+        callbacks = handler.get_event_callbacks()
+        if callbacks is None or handler.is_notify_overridden():
+            namespace_table[namespace] = handler
+            continue
+        for event, callback in callbacks.items():
+            event_table[namespace + "." + event] = callback
+    return event_table, namespace_table
+
+
 class DebuggerHandler(object):
     """调试器处理器"""
 
     namespace = ""  # 命名空间
     dependencies = []  # 依赖的Handler
+    # 处理的事件及对应的回调方法名，如：{"frameNavigated": "on_frame_navigated"}
+    # 回调参数为(params, session_id)；为None时该命名空间下的所有事件都交给`on_recv_notify_msg`处理。
+    # 子类重写了`on_recv_notify_msg`时同样交给它处理，可调用父类方法按`events`分发
+    events = None
 
     def __init__(self, debugger, event_listeners=None):
         self._debugger = debugger
@@ -59,15 +82,43 @@ class DebuggerHandler(object):
         """调试器分离回调"""
         pass
 
-    def on_recv_notify_msg(self, method, params):
+    def get_event_callbacks(self):
+        """获取事件回调表
+
+        :return: 事件名到回调函数的映射，未声明`events`时返回None
+        """
+        if self.__class__.events is None:
+            return None
+        callbacks = {}
+        for event, callback in self.__class__.events.items():
+            if not hasattr(self.__class__, callback):
+                # 避免被`__getattr__`当作请求
+                raise AttributeError(
+                    "%s has no event callback %s" % (self.__class__.__name__, callback)
+                )
+            callbacks[event] = getattr(self, callback)
+        return callbacks
+
+    def on_recv_notify_msg(self, method, params, session_id=""):
         """接收到通知消息
 
         :param method: 消息方法名
         :type  method: string
         :param params: 参数字典
         :type  params: dict
+        :param session_id: 消息所属的会话ID
+        :type  session_id: string
         """
-        pass
+        callbacks = self.get_event_callbacks()
+        if callbacks and method in callbacks:
+            callbacks[method](params, session_id)
+
+    on_recv_notify_msg.default_dispatch = True
+
+    @classmethod
+    def is_notify_overridden(cls):
+        """子类是否重写了`on_recv_notify_msg`"""
+        return not getattr(cls.on_recv_notify_msg, "default_dispatch", False)
 
     def __getattr__(self, attr):
         """允许通过直接调用的方式发送请求"""
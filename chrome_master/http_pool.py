@@ -0,0 +1,114 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""HTTP长连接池
+
+复用到调试端口的HTTP连接，避免每次请求`/json`接口都重新建立连接
+"""
+
+from __future__ import unicode_literals
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+import socket
+import threading
+
+
+class HTTPConnectionPool(object):
+    """HTTP长连接池，可在多个线程中使用
+    """
+
+    def __init__(self, addr, open_socket_func=None, max_size=4, timeout=60):
+        """
+        :param addr:             (ip, port)
+        :param open_socket_func: 创建socket函数
+        :type  open_socket_func: function
+        :param max_size:         最多保留的空闲连接数
+        :type  max_size:         int
+        :param timeout:          超时时间，单位：秒
+        :type  timeout:          float
+        """
+        self._addr = addr
+        self._open_socket = open_socket_func
+        self._max_size = max_size
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._idle_conns = []
+
+    def _create_connection(self):
+        conn = httplib.HTTPConnection(self._addr[0], self._addr[1], timeout=self._timeout)
+        if self._open_socket:
+            if hasattr(conn, "_create_connection"):
+                conn._create_connection = (
+                    lambda address, timeout, source_address: self._open_socket()
+                )
+            else:
+                # older 2.7 version
+                conn.sock = self._open_socket()
+        return conn
+
+    def _get_connection(self):
+        """获取连接
+
+        :return: (连接, 是否为复用的连接)
+        """
+        with self._lock:
+            if self._idle_conns:
+                return self._idle_conns.pop(), True
+        return self._create_connection(), False
+
+    def _release_connection(self, conn):
+        with self._lock:
+            if len(self._idle_conns) < self._max_size:
+                self._idle_conns.append(conn)
+                return
+        conn.close()
+
+    def _send(self, conn, method, path):
+        try:
+            conn.request(method, path)
+            response = conn.getresponse()
+            data = response.read()
+        except:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release_connection(conn)
+        return response.status, data
+
+    def request(self, method, path):
+        """发送请求
+
+        :return: (状态码, 响应数据)
+        """
+        conn, reused = self._get_connection()
+        try:
+            return self._send(conn, method, path)
+        except (httplib.HTTPException, socket.error):
+            if not reused:
+                raise
+        # 空闲连接可能已被服务端关闭，使用新连接重试一次
+        return self._send(self._create_connection(), method, path)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            conns, self._idle_conns = self._idle_conns, []
+        for conn in conns:
+            conn.close()
@@ -38,6 +38,7 @@ class InputHandler(DebuggerHandler):
     """Input命名空间的处理器"""
 
     namespace = "Input"
+    events = {}
 
     def hover(self, x_offset, y_offset):
         """mouse over"""
@@ -26,6 +26,7 @@ class LogHandler(DebuggerHandler):
     """
 
     namespace = "Log"
+    events = {"entryAdded": "on_entry_added"}
 
     def on_attached(self):
         """
@@ -48,19 +49,17 @@ class LogHandler(DebuggerHandler):
                 ]
             )
 
-    def on_recv_notify_msg(self, method, params):
+    def on_entry_added(self, params, session_id=""):
         """
-        接收到通知消息
-        :param  method: 消息方法名
-        :type   method: string
+        新增日志
         :param  params: 参数字典
         :type   params: dict
+        :param  session_id: 会话ID
+        :type   session_id: string
         """
-        if method == "entryAdded":
-            params = params["entry"]
-            level = params["level"]
-            self.logger.info(
-                "[%s][%s][%s] %s"
-                % (self.__class__.namespace, level, params.get("url", ""), params["text"])
-            )
-
+        params = params["entry"]
+        level = params["level"]
+        self.logger.info(
+            "[%s][%s][%s] %s"
+            % (self.__class__.namespace, level, params.get("url", ""), params["text"])
+        )
@@ -0,0 +1,322 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""通知消息队列
+"""
+
+from __future__ import unicode_literals
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+
+class EnumOverflowPolicy(object):
+    """队列满时的处理策略
+    """
+
+    DROP_OLDEST = "drop_oldest"  # 丢弃最早的消息
+    DROP_NEWEST = "drop_newest"  # 丢弃新到的消息
+    COALESCE = "coalesce"  # 按key合并，新消息替换未处理的同key消息
+
+
+def params_key(*names):
+    """生成按通知方法和参数合并消息的key函数
+
+    例如`params_key("nodeId", "name")`对`DOM.attributeModified`只保留每个节点属性的最新值
+    """
+
+    def key_func(message):
+        params = message.get("params", {})
+        return (message.get("method"),) + tuple(params.get(it) for it in names)
+
+    return key_func
+
+
+class _QueueLimit(object):
+    """命名空间的队列限制及统计"""
+
+    def __init__(self, max_size, policy, key_func):
+        self.max_size = max_size
+        self.policy = policy
+        self.key_func = key_func
+        self.entries = collections.deque()  # 按入队顺序排列，含已失效的条目
+        self.coalesce_index = {}  # (分区, 合并key) => 条目
+        self.size = 0
+        self.dropped = 0
+        self.merged = 0
+
+
+class MessageQueue(object):
+    """按分区保序、支持延迟投递的消息队列
+
+    消息按key（如会话ID）分区，同一分区的消息按顺序逐条取出，
+    取出后需调用`task_done`才会取出该分区的下一条消息，不同分区可被多个线程并行处理。
+
+    延迟消息按到期时间存放在最小堆中，到期后追加到所属分区的队尾；
+    取消息时阻塞等待，直到有可处理的消息或最早的延迟消息到期
+
+    可通过`set_limit`限制命名空间的待处理消息数，超出时按策略丢弃或合并消息。
+    队列中的消息以`[消息, 命名空间, 合并key, 分区]`条目存放，被丢弃的条目将消息置为None，
+    取出时跳过；分区中失效的条目多于有效的条目时重建分区，避免大量丢弃时内存无限增长
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._partitions = {}  # key => deque
+        self._dead = {}  # key => 分区中失效的条目数
+        self._ready = collections.deque()  # 有消息且未被处理的分区
+        self._busy = set()  # 正在被处理的分区
+        self._delayed = []  # (runat, seq, key, message)
+        self._counter = itertools.count()
+        self._size = 0
+        self._closed = False
+        self._limits = {}  # namespace => _QueueLimit
+
+    def set_limit(
+        self, namespace, max_size, policy=EnumOverflowPolicy.DROP_OLDEST, key_func=None
+    ):
+        """限制命名空间的待处理消息数
+
+        :param namespace: 命名空间
+        :type  namespace: string
+        :param max_size:  最大待处理消息数，为None时取消限制
+        :type  max_size:  int
+        :param policy:    超出限制时的处理策略，见`EnumOverflowPolicy`
+        :type  policy:    string
+        :param key_func:  合并策略下根据消息计算合并key的函数，返回None的消息不参与合并
+        :type  key_func:  function
+        """
+        if policy not in (
+            EnumOverflowPolicy.DROP_OLDEST,
+            EnumOverflowPolicy.DROP_NEWEST,
+            EnumOverflowPolicy.COALESCE,
+        ):
+            raise ValueError("Unsupported overflow policy %s" % policy)
+        if policy == EnumOverflowPolicy.COALESCE and key_func is None:
+            raise ValueError("key_func is required by coalesce policy")
+        with self._cond:
+            if max_size is None:
+                self._limits.pop(namespace, None)
+                return
+            limit = _QueueLimit(max_size, policy, key_func)
+            old_limit = self._limits.get(namespace)
+            if old_limit:
+                # 已入队的消息继续计入新的限制
+                limit.dropped, limit.merged = old_limit.dropped, old_limit.merged
+                for entry in old_limit.entries:
+                    if entry[0] is not None:
+                        entry[2] = None
+                        limit.entries.append(entry)
+                limit.size = len(limit.entries)
+            self._limits[namespace] = limit
+
+    def is_coalesced(self, namespace):
+        """命名空间是否按key合并消息"""
+        limit = self._limits.get(namespace)
+        return limit is not None and limit.policy == EnumOverflowPolicy.COALESCE
+
+    def _append(self, key, entry):
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = collections.deque()
+        partition.append(entry)
+        self._size += 1
+        if len(partition) == 1 and key not in self._busy:
+            self._ready.append(key)
+            self._cond.notify()
+
+    def _discard(self, entry):
+        """条目已取出或被丢弃，更新统计"""
+        limit = self._limits.get(entry[1])
+        if limit:
+            limit.size -= 1
+            if entry[2] is not None:
+                limit.coalesce_index.pop(entry[2], None)
+        entry[0] = None
+        self._size -= 1
+
+    def _drop(self, entry):
+        """丢弃条目，失效条目仍留在分区中，取出时跳过"""
+        self._discard(entry)
+        key = entry[3]
+        partition = self._partitions.get(key)
+        if partition is None:
+            return
+        dead = self._dead.get(key, 0) + 1
+        if dead * 2 > len(partition):
+            # 保留头部条目，分区不会变空，不影响分区的就绪状态
+            head = partition[0]
+            partition = collections.deque(
+                it for it in itertools.islice(partition, 1, None) if it[0] is not None
+            )
+            partition.appendleft(head)
+            self._partitions[key] = partition
+            dead = 1 if head[0] is None else 0
+        self._dead[key] = dead
+
+    def _drop_oldest(self, limit):
+        while limit.entries:
+            entry = limit.entries.popleft()
+            if entry[0] is not None:
+                self._drop(entry)
+                limit.dropped += 1
+                return
+
+    def put(self, message, key="", namespace=None):
+        """放入消息
+
+        :param key:       分区
+        :param namespace: 消息所属的命名空间，用于限制待处理消息数
+        :return: 消息是否放入队列，被丢弃时返回False
+        """
+        with self._cond:
+            limit = self._limits.get(namespace) if namespace else None
+            if limit is None:
+                self._append(key, [message, None, None, key])
+                return True
+            coalesce_key = None
+            if limit.policy == EnumOverflowPolicy.COALESCE:
+                coalesce_key = limit.key_func(message)
+                if coalesce_key is not None:
+                    coalesce_key = (key, coalesce_key)
+                    entry = limit.coalesce_index.get(coalesce_key)
+                    if entry is not None:
+                        entry[0] = message
+                        limit.merged += 1
+                        return True
+            if limit.size >= limit.max_size:
+                if limit.policy == EnumOverflowPolicy.DROP_NEWEST:
+                    limit.dropped += 1
+                    return False
+                self._drop_oldest(limit)
+            entry = [message, namespace, coalesce_key, key]
+            if coalesce_key is not None:
+                limit.coalesce_index[coalesce_key] = entry
+            # 消息大多按顺序取出，先清理头部已失效的条目，避免条目列表无限增长
+            while limit.entries and limit.entries[0][0] is None:
+                limit.entries.popleft()
+            if len(limit.entries) > 2 * limit.max_size:
+                limit.entries = collections.deque(
+                    it for it in limit.entries if it[0] is not None
+                )
+            limit.entries.append(entry)
+            limit.size += 1
+            self._append(key, entry)
+            return True
+
+    def put_delayed(self, message, delay, key=""):
+        """放入延迟消息
+
+        :param delay: 延迟时间，单位：秒
+        :type  delay: float
+        """
+        with self._cond:
+            heapq.heappush(
+                self._delayed, (time.time() + delay, next(self._counter), key, message)
+            )
+            self._cond.notify()
+
+    def _pop_due_messages(self):
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, key, message = heapq.heappop(self._delayed)
+            # 重试的消息已经计入过限制，不再参与丢弃和合并
+            self._append(key, [message, None, None, key])
+
+    def get(self, timeout=None):
+        """取出消息
+
+        :param timeout: 超时时间，None表示一直等待
+        :return: (分区, 消息)，超时或队列关闭时消息为None
+        """
+        time0 = time.time()
+        with self._cond:
+            while not self._closed:
+                self._pop_due_messages()
+                while self._ready:
+                    key = self._ready.popleft()
+                    partition = self._partitions[key]
+                    entry = partition.popleft()
+                    message = entry[0]
+                    if message is None:
+                        self._dead[key] -= 1
+                    if not partition:
+                        self._partitions.pop(key)
+                        self._dead.pop(key, None)
+                    elif message is None:
+                        self._ready.appendleft(key)
+                    if message is None:
+                        continue  # 已被丢弃
+                    self._discard(entry)
+                    self._busy.add(key)
+                    return key, message
+                wait_time = None
+                if self._delayed:
+                    wait_time = max(self._delayed[0][0] - time.time(), 0)
+                if timeout is not None:
+                    remaining = timeout - (time.time() - time0)
+                    if remaining <= 0:
+                        return None, None
+                    if wait_time is None or remaining < wait_time:
+                        wait_time = remaining
+                self._cond.wait(wait_time)
+            return None, None
+
+    def task_done(self, key):
+        """分区的当前消息处理完成，允许取出该分区的下一条消息"""
+        with self._cond:
+            self._busy.discard(key)
+            if key in self._partitions:
+                self._ready.append(key)
+                self._cond.notify()
+
+    def qsize(self):
+        """待处理的消息数"""
+        with self._cond:
+            return self._size
+
+    def delayed_size(self):
+        """等待重试的消息数"""
+        with self._cond:
+            return len(self._delayed)
+
+    def get_overflow_stats(self):
+        """获取各命名空间的限制及丢弃、合并的消息数
+
+        :return: {命名空间: {"max_size": 最大消息数, "policy": 策略, "size": 待处理消息数,
+                 "dropped": 丢弃数, "merged": 合并数}}
+        """
+        with self._cond:
+            return dict(
+                (
+                    namespace,
+                    {
+                        "max_size": limit.max_size,
+                        "policy": limit.policy,
+                        "size": limit.size,
+                        "dropped": limit.dropped,
+                        "merged": limit.merged,
+                    },
+                )
+                for namespace, limit in self._limits.items()
+            )
+
+    def close(self):
+        """关闭队列，唤醒所有等待的线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,228 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""调试器运行指标
+
+统计请求耗时、通知消息数量和处理耗时，用于分析时间消耗在Chrome、网络还是处理器中：
+
+    snapshot = debugger.stats()
+    debugger.start_stats_reporter(60)
+"""
+
+from __future__ import unicode_literals
+import bisect
+import threading
+
+from .tracer import monotonic
+
+
+# 耗时分桶上限，单位：秒
+LATENCY_BUCKETS = (
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1,
+    2,
+    5,
+    10,
+    30,
+    60,
+    120,
+)
+
+
+class Histogram(object):
+    """分桶统计耗时分布，非线程安全，由`DebuggerStats`加锁保护
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """估算百分位数，返回所在分桶的上限"""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        accumulated = 0
+        for index, count in enumerate(self._counts):
+            accumulated += count
+            if accumulated >= rank and count:
+                if index < len(self._buckets):
+                    return min(self._buckets[index], self.max)
+                return self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class _RequestStats(object):
+    def __init__(self):
+        self.errors = 0
+        self.timeouts = 0
+        self.latency = Histogram()
+
+
+class _EventStats(object):
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.discarded = 0  # 没有处理器关注而直接丢弃的消息数
+        self.queue_delay = Histogram()  # 从收到到开始处理的耗时
+        self.dispatch = Histogram()  # 处理器耗时
+
+
+class DebuggerStats(object):
+    """调试器运行指标，各记录方法可在任意线程中调用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_time = monotonic()
+        self._requests = {}  # method => _RequestStats
+        self._events = {}  # namespace => _EventStats
+
+    def _get_request_stats(self, method):
+        stats = self._requests.get(method)
+        if stats is None:
+            stats = self._requests[method] = _RequestStats()
+        return stats
+
+    def _get_event_stats(self, namespace):
+        stats = self._events.get(namespace)
+        if stats is None:
+            stats = self._events[namespace] = _EventStats()
+        return stats
+
+    def record_response(self, method, latency, error=False):
+        """记录请求从发送到收到响应的耗时"""
+        with self._lock:
+            stats = self._get_request_stats(method)
+            stats.latency.add(latency)
+            if error:
+                stats.errors += 1
+
+    def record_timeout(self, method):
+        """记录等待响应超时"""
+        with self._lock:
+            self._get_request_stats(method).timeouts += 1
+
+    def record_event(self, namespace, size, consumed=True):
+        """记录收到的通知消息"""
+        with self._lock:
+            stats = self._get_event_stats(namespace)
+            stats.count += 1
+            stats.bytes += size
+            if not consumed:
+                stats.discarded += 1
+
+    def record_dispatch(self, namespace, queue_delay, duration):
+        """记录通知消息的排队耗时和处理耗时"""
+        with self._lock:
+            stats = self._get_event_stats(namespace)
+            stats.queue_delay.add(queue_delay)
+            stats.dispatch.add(duration)
+
+    def snapshot(self, in_flight=None):
+        """生成指标快照
+
+        :param in_flight: 各命令字未收到响应的请求数
+        :type  in_flight: dict
+        """
+        in_flight = in_flight or {}
+        with self._lock:
+            requests = {}
+            for method in set(self._requests) | set(in_flight):
+                stats = self._requests.get(method) or _RequestStats()
+                requests[method] = {
+                    "in_flight": in_flight.get(method, 0),
+                    "errors": stats.errors,
+                    "timeouts": stats.timeouts,
+                    "latency": stats.latency.snapshot(),
+                }
+            events = {}
+            for namespace, stats in self._events.items():
+                events[namespace] = {
+                    "count": stats.count,
+                    "bytes": stats.bytes,
+                    "discarded": stats.discarded,
+                    "queue_delay": stats.queue_delay.snapshot(),
+                    "dispatch": stats.dispatch.snapshot(),
+                }
+            return {
+                "uptime": monotonic() - self._start_time,
+                "in_flight": sum(in_flight.values()),
+                "requests": requests,
+                "events": events,
+            }
+
+
+class StatsReporter(object):
+    """定期获取指标快照并回调
+    """
+
+    def __init__(self, get_snapshot, callback, interval=60):
+        """
+        :param get_snapshot: 获取指标快照的函数
+        :type  get_snapshot: function
+        :param callback:     快照回调函数
+        :type  callback:     function
+        :param interval:     回调间隔，单位：秒
+        :type  interval:     float
+        """
+        self._get_snapshot = get_snapshot
+        self._callback = callback
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            self._callback(self._get_snapshot())
+
+    def stop(self):
+        """停止回调"""
+        self._stop_event.set()
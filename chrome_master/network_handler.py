@@ -22,8 +22,6 @@ from collections import OrderedDict
 import json
 import time
 
-import six
-
 from .handler import DebuggerHandler
 
 
@@ -33,6 +31,10 @@ class NetworkHandler(DebuggerHandler):
     """
 
     namespace = "Network"
+    events = {
+        "requestWillBeSent": "on_request_will_be_sent",
+        "responseReceived": "on_response_received",
+    }
 
     def on_attached(self):
         """
@@ -45,52 +47,59 @@ class NetworkHandler(DebuggerHandler):
     def on_new_session(self, session_id):
         self.enable(session_id=session_id)
 
-    def on_recv_notify_msg(self, method, params):
+    def on_request_will_be_sent(self, params, session_id=""):
         """
-        接受到通知消息
-        :param  method: 消息方法名
-        :type   method: string
+        请求即将发送
         :param  params: 参数字典
         :type   params: dict
+        :param  session_id: 会话ID
+        :type   session_id: string
         """
-        if method == "requestWillBeSent":
-            if params["request"]["url"].startswith("data:image"):
-                return
-            self._packets.append(
-                {
-                    "start_time": time.time(),
-                    "request_id": params["requestId"],
-                    "request": params["request"],
-                }
-            )
-            self.logger.debug(
-                "[%s] Request [%s][%s][%s] will be sent"
-                % (
-                    self.__class__.namespace,
-                    params["requestId"],
-                    params["request"]["method"],
-                    params["request"]["url"],
-                )
+        if params["request"]["url"].startswith("data:image"):
+            return
+        self._packets.append(
+            {
+                "start_time": time.time(),
+                "request_id": params["requestId"],
+                "request": params["request"],
+            }
+        )
+        self.logger.debug(
+            "[%s] Request [%s][%s][%s] will be sent"
+            % (
+                self.__class__.namespace,
+                params["requestId"],
+                params["request"]["method"],
+                params["request"]["url"],
             )
-        elif method == "responseReceived":
-            if params["response"]["url"].startswith("data:image"):
-                return
-            for packet in self._packets:
-                if packet["request_id"] == params["requestId"]:
-                    packet["response"] = params["response"]
-                    packet["end_time"] = time.time()
-                    self.logger.info(
-                        "[%s] Request [%s][%s][%s] cost %.2fs, return code is %d"
-                        % (
-                            self.__class__.namespace,
-                            params["requestId"],
-                            packet["request"]["method"],
-                            packet["request"]["url"],
-                            packet["end_time"] - packet["start_time"],
-                            packet["response"]["status"],
-                        )
+        )
+
+    def on_response_received(self, params, session_id=""):
+        """
+        收到响应
+        :param  params: 参数字典
+        :type   params: dict
+        :param  session_id: 会话ID
+        :type   session_id: string
+        """
+        if params["response"]["url"].startswith("data:image"):
+            return
+        for packet in self._packets:
+            if packet["request_id"] == params["requestId"]:
+                packet["response"] = params["response"]
+                packet["end_time"] = time.time()
+                self.logger.info(
+                    "[%s] Request [%s][%s][%s] cost %.2fs, return code is %d"
+                    % (
+                        self.__class__.namespace,
+                        params["requestId"],
+                        packet["request"]["method"],
+                        packet["request"]["url"],
+                        packet["end_time"] - packet["start_time"],
+                        packet["response"]["status"],
                     )
-                    break
+                )
+                break
 
     def set_http_headers(self, session_id, **kwargs):
         """
@@ -99,7 +108,7 @@ class NetworkHandler(DebuggerHandler):
         :type   **kwargs: dict
         """
         headers = OrderedDict()
-        for key, value in six.iteritems(kwargs):
+        for key, value in kwargs.items():
             headers[key] = value
         self.setExtraHTTPHeaders(headers=headers, session_id=session_id)
         self.logger.info(
@@ -20,10 +20,9 @@ import base64
 import io
 import json
 import os
+import threading
 import time
 
-from PIL import Image
-
 from .handler import DebuggerHandler
 from .target_handler import TargetHandler
 from .util import MessageNotHandledError, MethodNotFoundError
@@ -50,6 +49,18 @@ class PageHandler(DebuggerHandler):
 
     namespace = "Page"
     dependencies = [TargetHandler]
+    events = {
+        "frameNavigated": "on_frame_navigated",
+        "frameAttached": "on_frame_attached",
+        "frameDetached": "on_frame_detached",
+        "screencastFrame": "on_screencast_frame",
+        "javascriptDialogOpening": "on_javascript_dialog_opening",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(PageHandler, self).__init__(*args, **kwargs)
+        # 不同会话的frame事件可能在不同线程中处理
+        self._frame_lock = threading.RLock()
 
     def on_attached(self, *args, **kwargs):
         """附加到调试器成功回调
@@ -122,16 +133,23 @@ class PageHandler(DebuggerHandler):
                     return result
         return False
 
-    def on_recv_notify_msg(self, method, params):
-        """接收到通知消息
-
-        :param method: 消息方法名
-        :type  method: string
-        :param params: 参数字典
-        :type  params: dict
+    def on_frame_navigated(self, params, session_id=""):
+        """frame导航完成
         """
-        if method == "frameNavigated":
+        with self._frame_lock:
             is_root_frame = "parentId" not in params["frame"]
+            if is_root_frame and session_id:
+                # 其它顶层目标（如弹出的新页面）的导航，不影响当前页面的frame树
+                self.logger.info(
+                    "[%s] Root frame [%s] %s of session %s loaded"
+                    % (
+                        self.__class__.namespace,
+                        params["frame"]["id"],
+                        params["frame"]["url"],
+                        session_id,
+                    )
+                )
+                return
             if is_root_frame:
                 self._resource_tree = {}
                 self._frame_tree = {
@@ -182,7 +200,11 @@ class PageHandler(DebuggerHandler):
                     )
                 )
                 self.dispatch_event("on_frame_created", parent_frame, frame)
-        elif method == "frameAttached":
+
+    def on_frame_attached(self, params, session_id=""):
+        """frame附加到父frame
+        """
+        with self._frame_lock:
             self.logger.info(
                 "[%s] Frame %s attached, parent frame is %s"
                 % (
@@ -214,7 +236,11 @@ class PageHandler(DebuggerHandler):
                 )
 
                 parent_frame["childFrames"].append(frame)
-        elif method == "frameDetached":
+
+    def on_frame_detached(self, params, session_id=""):
+        """frame被移除
+        """
+        with self._frame_lock:
             self.logger.info(
                 "[%s] Frame %s detached" % (self.__class__.namespace, params["frameId"])
             )
@@ -224,12 +250,18 @@ class PageHandler(DebuggerHandler):
                     % (self.__class__.namespace, params["frameId"], json.dumps(self._frame_tree))
                 )
                 raise MessageNotHandledError()
-        elif method == "screencastFrame":
-            data = base64.b64decode(params["data"])
-            self._screen_data.append((params["metadata"]["timestamp"], data))
-            self._last_recv_frame_time = time.time()
-        elif method == "javascriptDialogOpening":
-            self.handleJavaScriptDialog(accept=True)
+
+    def on_screencast_frame(self, params, session_id=""):
+        """收到录屏帧
+        """
+        data = base64.b64decode(params["data"])
+        self._screen_data.append((params["metadata"]["timestamp"], data))
+        self._last_recv_frame_time = time.time()
+
+    def on_javascript_dialog_opening(self, params, session_id=""):
+        """JavaScript弹框打开
+        """
+        self.handleJavaScriptDialog(accept=True)
 
     def get_screen_record_data(self):
         """get screen record data
@@ -245,9 +277,10 @@ class PageHandler(DebuggerHandler):
         try:
             import cv2
             import numpy as np
+            from PIL import Image
         except ImportError:
             self.logger.warn(
-                "[%s] opencv-python not installed" % self.__class__.__name__
+                "[%s] opencv-python or pillow not installed" % self.__class__.__name__
             )
             return False
 
@@ -0,0 +1,167 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""页面索引
+
+按标题和url索引页面，用于快速查找匹配的页面
+"""
+
+from __future__ import unicode_literals
+import re
+import threading
+
+from . import util
+
+
+_SPECIAL_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+_MAX_CACHED_PATTERNS = 256
+
+
+class PageMatcher(object):
+    """页面标题或url的匹配器，与目标值完全相等或能完整匹配正则表达式时匹配成功
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, pattern):
+        self._pattern = pattern
+        if _SPECIAL_CHARS.search(pattern):
+            self._regex = re.compile(pattern + "$")
+        else:
+            self._regex = None  # 普通字符串只需比较是否相等
+
+    @classmethod
+    def get(cls, pattern):
+        """获取匹配器，相同的模式共用同一个已编译的匹配器"""
+        matcher = cls._cache.get(pattern)
+        if matcher is None:
+            matcher = cls(pattern)
+            with cls._cache_lock:
+                if len(cls._cache) >= _MAX_CACHED_PATTERNS:
+                    cls._cache.clear()
+                cls._cache[pattern] = matcher
+        return matcher
+
+    @property
+    def pattern(self):
+        return self._pattern
+
+    @property
+    def is_literal(self):
+        """是否为普通字符串"""
+        return self._regex is None
+
+    def match(self, value):
+        if value == self._pattern:
+            return True
+        return self._regex is not None and self._regex.match(value) is not None
+
+
+class PageIndex(object):
+    """页面索引，按页面ID增量更新，可在多个线程中使用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}  # 页面ID => (标题, url, 原始标题, 原始url)
+        self._title_index = {}  # 标题 => 页面ID集合
+        self._url_index = {}  # url => 页面ID集合
+
+    @staticmethod
+    def _add_to_index(index, key, page_id):
+        ids = index.get(key)
+        if ids is None:
+            ids = index[key] = set()
+        ids.add(page_id)
+
+    @staticmethod
+    def _remove_from_index(index, key, page_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(page_id)
+            if not ids:
+                index.pop(key)
+
+    def _remove(self, page_id):
+        title, url = self._pages.pop(page_id)[:2]
+        self._remove_from_index(self._title_index, title, page_id)
+        self._remove_from_index(self._url_index, url, page_id)
+
+    def _update(self, page_list):
+        """更新索引，并将页面的标题和url替换为编码后的值
+
+        编码结果按页面ID缓存，只有新增或标题、url变化的页面才重新编码
+        """
+        curr_ids = set()
+        for page in page_list:
+            page_id = page["id"]
+            curr_ids.add(page_id)
+            raw_title, raw_url = page["title"], page["url"]
+            prev_info = self._pages.get(page_id)
+            if prev_info is not None:
+                if prev_info[2] == raw_title and prev_info[3] == raw_url:
+                    page["title"], page["url"] = prev_info[:2]
+                    continue
+                self._remove(page_id)
+            info = (
+                util.general_encode(raw_title),
+                util.general_encode(raw_url),
+                raw_title,
+                raw_url,
+            )
+            page["title"], page["url"] = info[:2]
+            self._pages[page_id] = info
+            self._add_to_index(self._title_index, info[0], page_id)
+            self._add_to_index(self._url_index, info[1], page_id)
+        for page_id in [it for it in self._pages if it not in curr_ids]:
+            self._remove(page_id)
+
+    def _match(self, index, field, pattern, candidates):
+        """查找匹配的页面ID集合
+
+        :param candidates: 已按其它条件筛选出的页面ID集合，为None表示所有页面
+        """
+        matcher = PageMatcher.get(pattern)
+        if matcher.is_literal:
+            ids = index.get(pattern, set())
+            return ids & candidates if candidates is not None else set(ids)
+        if candidates is None:
+            candidates = self._pages
+        return set(it for it in candidates if matcher.match(self._pages[it][field]))
+
+    def filter(self, page_list, title=None, url=None):
+        """更新索引并筛选标题和url匹配的页面
+
+        :param page_list: 当前的页面列表
+        :type  page_list: list
+        :param title:     标题，支持正则表达式
+        :type  title:     string
+        :param url:       url，支持正则表达式
+        :type  url:       string
+        :return: 匹配的页面列表，顺序与`page_list`一致
+        """
+        title = util.general_encode(title or "")
+        url = util.general_encode(url or "")
+        with self._lock:
+            self._update(page_list)
+            ids = None
+            if title:
+                ids = self._match(self._title_index, 0, title, ids)
+            if url and (ids is None or ids):
+                ids = self._match(self._url_index, 1, url, ids)
+        if ids is None:
+            return list(page_list)
+        return [page for page in page_list if page["id"] in ids]
@@ -0,0 +1,255 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""共用的WebSocket I/O线程
+
+一个I/O线程通过`selectors`读取所有调试器的连接，通知消息交给共用的处理线程，
+线程数不随页面数增加：
+
+    reactor = Reactor()
+    debugger = RemoteDebugger(ws_addr, reactor=reactor)
+"""
+
+from __future__ import unicode_literals
+import collections
+import socket
+import threading
+
+try:
+    import selectors
+
+    _select_error = OSError
+except ImportError:
+    selectors = None  # python2使用select
+    import select
+
+    _select_error = select.error
+
+import websocket
+
+from .message_queue import MessageQueue
+from .util import logger
+
+
+class _WebSocket(websocket.WebSocket):
+    """由I/O线程读取数据的WebSocket
+
+    帧解析只使用I/O线程已读取的数据，数据不足时抛出超时异常，不完整的帧留在缓冲区中
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_WebSocket, self).__init__(*args, **kwargs)
+        self._read_buffer = collections.deque()
+
+    def _recv(self, bufsize):
+        if not self._read_buffer:
+            raise websocket.WebSocketTimeoutException("Wait for more data")
+        data = self._read_buffer.popleft()
+        if len(data) > bufsize:
+            self._read_buffer.appendleft(data[bufsize:])
+            data = data[:bufsize]
+        return data
+
+    def feed(self):
+        """读取socket上已到达的数据，连接可读时调用"""
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return
+        if not data:
+            raise websocket.WebSocketConnectionClosedException(
+                "Connection closed by peer"
+            )
+        self._read_buffer.append(data)
+        # SSL连接可能有已解密但未读取的数据，select无法感知
+        pending = getattr(self.sock, "pending", None)
+        while pending and pending():
+            self._read_buffer.append(self.sock.recv(pending()))
+
+
+class Reactor(object):
+    """共用的I/O线程和通知消息处理线程
+
+    通知队列按(调试器, 会话ID)分区，同一会话的消息仍按顺序处理
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, worker_count=4):
+        """
+        :param worker_count: 处理通知消息的线程数
+        :type  worker_count: int
+        """
+        self._message_queue = MessageQueue()
+        self._lock = threading.Lock()
+        self._connections = {}  # socket => (WebSocket, 调试器)
+        self._changes = []  # (是否添加, socket, 完成事件)
+        self._closed = False
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        if selectors:
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._io_thread = threading.Thread(target=self._io_loop)
+        self._io_thread.setDaemon(True)
+        self._io_thread.start()
+        for _ in range(worker_count):
+            t = threading.Thread(target=self._work_thread)
+            t.setDaemon(True)
+            t.start()
+
+    @classmethod
+    def get_default(cls):
+        """获取进程内默认的Reactor"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def message_queue(self):
+        return self._message_queue
+
+    def __len__(self):
+        return len(self._connections)
+
+    def connect(self, debugger, timeout=10):
+        """为调试器建立WebSocket连接，并由I/O线程读取
+
+        :return: WebSocket对象
+        """
+        if self._closed:
+            raise RuntimeError("Reactor is closed")
+        options = {"timeout": timeout}
+        if debugger._open_socket:
+            options["socket"] = debugger._open_socket()
+        ws = _WebSocket()
+        ws.connect(debugger._ws_addr, **options)
+        self._change(True, ws, debugger)
+        return ws
+
+    def disconnect(self, ws):
+        """停止读取并关闭连接"""
+        self._change(False, ws)
+        try:
+            ws.send_close()
+        except Exception:
+            pass
+        ws.shutdown()
+
+    def _change(self, add, ws, debugger=None):
+        """由I/O线程修改监听的连接，在I/O线程之外调用时等待修改完成"""
+        done = threading.Event()
+        with self._lock:
+            self._changes.append((add, ws.sock, ws, debugger, done))
+        if threading.current_thread() is self._io_thread:
+            self._apply_changes()
+        else:
+            self._wakeup()
+            done.wait(5)
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except socket.error:
+            pass
+
+    def _apply_changes(self):
+        with self._lock:
+            changes, self._changes = self._changes, []
+        for add, sock, ws, debugger, done in changes:
+            if add and sock is not None:
+                self._connections[sock] = (ws, debugger)
+                if selectors:
+                    self._selector.register(sock, selectors.EVENT_READ)
+            elif self._connections.pop(sock, None) and selectors:
+                self._selector.unregister(sock)
+            done.set()
+
+    def _select(self):
+        if selectors:
+            return [key.fileobj for key, _ in self._selector.select()]
+        readable, _, _ = select.select(
+            list(self._connections) + [self._wakeup_recv], [], []
+        )
+        return readable
+
+    def _io_loop(self):
+        while not self._closed:
+            self._apply_changes()
+            try:
+                readable = self._select()
+            except (_select_error, ValueError):
+                continue  # 连接在select期间被关闭
+            for sock in readable:
+                if sock is self._wakeup_recv:
+                    self._wakeup_recv.recv(4096)
+                elif sock in self._connections:
+                    self._read(sock)
+
+    def _read(self, sock):
+        """读取连接上的数据帧，交给调试器处理"""
+        ws, debugger = self._connections[sock]
+        try:
+            ws.feed()
+            # 解析缓冲区中所有完整的帧，帧数据未到齐时抛出超时异常，下次可读时继续解析
+            while True:
+                opcode, data = ws.recv_data(True)
+                if opcode == websocket.ABNF.OPCODE_CLOSE:
+                    raise websocket.WebSocketConnectionClosedException(
+                        "Connection closed by peer"
+                    )
+                if opcode == websocket.ABNF.OPCODE_TEXT:
+                    debugger.on_message(ws, data.decode("utf8"))
+                elif opcode == websocket.ABNF.OPCODE_BINARY:
+                    debugger.on_message(ws, data)
+        except websocket.WebSocketTimeoutException:
+            pass
+        except Exception as e:
+            self._connections.pop(sock, None)
+            if selectors:
+                self._selector.unregister(sock)
+            logger.info(
+                "[%s] Connection %s closed: %s"
+                % (self.__class__.__name__, debugger._ws_addr, e)
+            )
+            try:
+                ws.shutdown()
+            except Exception:
+                pass
+            debugger.on_close(ws)
+
+    def _work_thread(self):
+        while not self._closed:
+            key, message = self._message_queue.get()
+            if not message:
+                continue
+            debugger = key[0]
+            try:
+                if debugger._running:
+                    debugger._process_message(message)
+            finally:
+                self._message_queue.task_done(key)
+
+    def close(self):
+        """关闭所有连接并停止线程"""
+        self._closed = True
+        self._message_queue.close()
+        self._wakeup()
+        for ws, debugger in list(self._connections.values()):
+            try:
+                ws.shutdown()
+            except Exception:
+                pass
@@ -18,15 +18,16 @@
 
 from __future__ import unicode_literals
 import json
+import logging
 import threading
 import time
 import websocket
 
-try:
-    import Queue as queue
-except ImportError:
-    import queue
-
+from . import codec
+from .handler import build_event_table
+from .message_queue import EnumOverflowPolicy, MessageQueue
+from .metrics import DebuggerStats, StatsReporter
+from .tracer import EnumTraceDirection, monotonic
 from .util import (
     ChromeDebuggerProtocolError,
     ConnectionClosedError,
@@ -34,37 +35,201 @@ from .util import (
     TimeoutError,
     hook_WebSocket_connect,
     logger,
+    run_in_parallel,
 )
 
 
+def get_response_result(response):
+    """获取响应结果，响应中包含错误时抛出对应的异常
+
+    :param response: 响应数据
+    :type  response: dict
+    """
+    if "error" in response:
+        raise ChromeDebuggerProtocolError(
+            response["error"]["code"],
+            response["error"]["message"],
+            response["error"].get("data"),
+        )
+    return response.get("result", {})
+
+
+PING_METHOD = "Browser.getVersion"  # 探测连接使用的命令
+
+
+class ResponseWaiter(object):
+    """请求响应等待器，收到响应或连接断开时唤醒等待线程"""
+
+    def __init__(self, request):
+        self._request = request
+        self._response = None
+        self._event = threading.Event()
+        self._send_time = monotonic()
+
+    @property
+    def request(self):
+        return self._request
+
+    @property
+    def send_time(self):
+        return self._send_time
+
+    @property
+    def response(self):
+        return self._response
+
+    def set_response(self, response):
+        """设置响应数据并唤醒等待线程"""
+        self._response = response
+        self._event.set()
+
+    def cancel(self):
+        """连接断开，唤醒等待线程"""
+        self._event.set()
+
+    def wait(self, timeout):
+        """等待响应
+
+        :return: 超时返回False
+        """
+        return self._event.wait(timeout)
+
+
 class RemoteDebugger(object):
     """远程调试器"""
 
-    def __init__(self, ws_addr, open_socket_func=None):
+    def __init__(self, ws_addr, open_socket_func=None, worker_count=4, reactor=None):
+        """
+        :param ws_addr:          WebSocket地址
+        :type  ws_addr:          string
+        :param open_socket_func: 创建socket函数
+        :type  open_socket_func: function
+        :param worker_count:     处理通知消息的最大线程数，同一会话的消息总是按顺序处理。
+                                 先只启动一个线程，连接上出现新的会话（如自动附加的
+                                 iframe和worker子会话）时再增加，避免一个会话阻塞其它会话
+        :type  worker_count:     int
+        :param reactor:          共用的I/O线程和消息处理线程，指定时不再创建自己的线程，
+                                 通知队列也由共用的调试器共享，见`Reactor`
+        :type  reactor:          Reactor
+        """
+        self._init_state(ws_addr, open_socket_func, reactor)
+        self._worker_count = worker_count
+        self._worker_lock = threading.Lock()
+        self._worker_sessions = set()  # 已为其增加工作线程的会话ID
+        self._add_worker("")
+        self._connect()
+        self._wait_for_ready()
+
+    def _init_state(self, ws_addr, open_socket_func=None, reactor=None):
+        """初始化与连接方式无关的状态，子类不建立自己的连接时也需调用"""
         self._ws_addr = ws_addr
         self._open_socket = open_socket_func
-        self._ws = websocket.WebSocketApp(
-            self._ws_addr,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-        )
+        self._reactor = reactor
+        self._ws = None
         self._seq = 0
+        self._send_lock = threading.RLock()
         self._connected = False
         self._handlers = {}
-        self._data_dict = {}
-        self._message_queue = queue.Queue()
-        self._retry_message_queue = queue.Queue()
+        self._event_table = {}  # 完整事件名 => 回调
+        self._namespace_table = {}  # 未声明事件的处理器，命名空间 => 处理器
+        self._waiters = {}
+        if reactor is not None:
+            self._message_queue = reactor.message_queue
+        else:
+            self._message_queue = MessageQueue()
         self._running = True
         self._logger = logger
+        self._tracer = None
+        self._stats = DebuggerStats()
+        self._reporters = []
+        self._close_callbacks = []
+        self._last_active_time = time.time()
+
+    def _add_worker(self, session_id):
+        """出现新的会话时增加工作线程，直到`worker_count`个"""
+        if (
+            self._reactor is not None
+            or session_id in self._worker_sessions
+            or len(self._worker_sessions) >= self._worker_count
+        ):
+            return
+        with self._worker_lock:
+            if (
+                session_id in self._worker_sessions
+                or len(self._worker_sessions) >= self._worker_count
+            ):
+                return
+            self._worker_sessions.add(session_id)
         t = threading.Thread(target=self.work_thread)
         t.setDaemon(True)
         t.start()
-        t = threading.Thread(target=self.websocket_thread)
+
+    def _connect(self):
+        """建立WebSocket连接"""
+        if self._reactor is not None:
+            try:
+                self._ws = self._reactor.connect(self)
+            except Exception as e:
+                raise RuntimeError("Connect %s failed: %s" % (self._ws_addr, e))
+            self.on_open(self._ws)
+        else:
+            self._ws = self._create_websocket()
+            self._start_websocket_thread()
+
+    def _close_websocket(self, ws):
+        if self._reactor is not None:
+            self._reactor.disconnect(ws)
+        else:
+            ws.close()
+
+    def _queue_key(self, session_id):
+        """通知队列的分区，共用队列时需区分调试器"""
+        if self._reactor is not None:
+            return self, session_id
+        return session_id
+
+    def _create_websocket(self):
+        return websocket.WebSocketApp(
+            self._ws_addr,
+            on_open=self.on_open,
+            on_message=self.on_message,
+            on_error=self.on_error,
+            on_close=self.on_close,
+        )
+
+    def _start_websocket_thread(self):
+        t = threading.Thread(target=self.websocket_thread, args=(self._ws,))
         t.setDaemon(True)
         t.start()
-        self._wait_for_ready()
+
+    @property
+    def connected(self):
+        """WebSocket连接是否可用"""
+        return self._connected and self._ws is not None
+
+    @property
+    def closed(self):
+        """是否已调用`close`关闭"""
+        return not self._running
+
+    def add_close_callback(self, callback):
+        """添加调用`close`关闭调试器时的回调，回调无参数"""
+        self._close_callbacks.append(callback)
+
+    def _run_close_callbacks(self):
+        callbacks, self._close_callbacks = self._close_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except:
+                self.logger.exception(
+                    "[%s] Run close callback failed" % self.__class__.__name__
+                )
+
+    @property
+    def last_active_time(self):
+        """最近一次发送请求或收到通知的时间"""
+        return self._last_active_time
 
     @property
     def logger(self):
@@ -74,41 +239,105 @@ class RemoteDebugger(object):
     def logger(self, _logger):
         self._logger = _logger
 
+    @property
+    def tracer(self):
+        """协议流量记录器，为None时不记录"""
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, _tracer):
+        self._tracer = _tracer
+
     # ================= WebSocket callback start ===========================
+    def _is_current_websocket(self, ws):
+        """重连后旧连接的回调不再影响连接状态"""
+        return (
+            not isinstance(ws, (websocket.WebSocketApp, websocket.WebSocket))
+            or ws is self._ws
+        )
+
     def on_open(self, ws=None):
         """WebSocket打开回调"""
-        self._connected = True
+        if self._is_current_websocket(ws):
+            self._connected = True
 
     def on_message(self, ws, message=None):
         """收到消息"""
         if message is None:
             message = ws  # 兼容新版本websocket_client
-        message = json.loads(message)
-
+        if self._tracer is not None:
+            self._tracer.record(
+                EnumTraceDirection.RECV, message, codec.peek_session_id(message)
+            )
+        msg_id, method = codec.peek_message(message)
+        if method:
+            namespace = method.split(".", 1)[0]
+            consumed = self.is_event_consumed(method)
+            self._stats.record_event(namespace, len(message), consumed)
+            # 没有处理器关注的通知消息直接丢弃，不做解码
+            if not consumed:
+                return
+            if self._message_queue.is_coalesced(namespace):
+                # 合并消息需要根据参数计算key，只能提前解码
+                message = codec.loads(message)
+                message["timestamp"] = time.time()
+                session_id = message.get("sessionId", "")
+            else:
+                session_id = codec.peek_session_id(message)
+                message = {
+                    "method": method,
+                    "data": message,
+                    "sessionId": session_id,
+                    "timestamp": time.time(),
+                }
+            self._add_worker(session_id)
+            self._message_queue.put(message, self._queue_key(session_id), namespace)
+            return
+
+        data = message
+        message = codec.loads(data)
         if "id" in message:
-            self.logger.debug(
-                "[%s][%x][recv][%d] %s"
-                % (
-                    self.__class__.__name__,
-                    id(self),
-                    message["id"],
-                    json.dumps(message.get("result", ""))[:200],
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "[%s][%x][recv][%d] %s"
+                    % (self.__class__.__name__, id(self), message["id"], data[:200])
+                )
+            waiter = self._waiters.get(message["id"])
+            if waiter:
+                self._stats.record_response(
+                    waiter.request["method"],
+                    monotonic() - waiter.send_time,
+                    "error" in message,
+                )
+                waiter.set_response(message)
+            else:
+                self.logger.warn(
+                    "[%s] Response of request %d is abandoned"
+                    % (self.__class__.__name__, message["id"])
                 )
-            )
-            self._data_dict[message["id"]] = message
         else:
+            namespace = message.get("method", "").split(".", 1)[0]
+            self._stats.record_event(namespace, len(data))
             message["timestamp"] = time.time()
-            self._message_queue.put(message)
+            session_id = message.get("sessionId", "")
+            self._add_worker(session_id)
+            self._message_queue.put(message, self._queue_key(session_id), namespace)
 
     def on_error(self, ws, error=None):
         if error is None:
             error = ws
+        if not self._is_current_websocket(ws):
+            return
         self._connected = False
         self.logger.error("[%s] Recv error: %s" % (self.__class__.__name__, error))
+        self._cancel_waiters()
 
-    def on_close(self, ws=None):
+    def on_close(self, ws=None, *args):
+        if not self._is_current_websocket(ws):
+            return
         self._connected = False
         self.logger.info("[%s] Recv close" % (self.__class__.__name__))
+        self._cancel_waiters()
 
     # =================== WebSocket callback end =============================
 
@@ -129,124 +358,289 @@ class RemoteDebugger(object):
         else:
             raise RuntimeError("Connect %s failed" % self._ws_addr)
 
-    def websocket_thread(self):
+    def websocket_thread(self, ws=None):
         """websocket working thread"""
         if self._open_socket:
             sock = self._open_socket()
             hook_WebSocket_connect(sock)
-        self._ws.run_forever()
+        (ws or self._ws).run_forever()
 
     def enqueue_delay_message(self, message, delay=0.5):
-        """放入重试队列"""
+        """放入重试队列，超过10秒仍未处理的消息将被丢弃"""
         timeout = 10
         if time.time() - message["timestamp"] > timeout:
             self.logger.warn(
                 "[%s] Abandon message %s" % (self.__class__.__name__, message)
             )
-        message["runat"] = time.time() + delay
-        self._retry_message_queue.put(message)
+            return
+        self._message_queue.put_delayed(
+            message, delay, self._queue_key(message.get("sessionId", ""))
+        )
 
     def work_thread(self):
-        """工作线程"""
+        """工作线程，多个工作线程并行处理不同会话的消息"""
         while self._running:
-            message = None
-            if self._message_queue.empty():
-                if not self._retry_message_queue.empty():
-                    if self._retry_message_queue.queue[0]["runat"] <= time.time():
-                        message = self._retry_message_queue.get()
-                        message.pop("runat")
-
-                if not message:
-                    time.sleep(0.01)
-                    continue
-            else:
-                message = self._message_queue.get()
+            session_id, message = self._message_queue.get()
+            if not message:
+                continue
             try:
-                self.on_recv_notify_msg(message["method"], message.get("params", {}))
-            except MessageNotHandledError:
-                self.enqueue_delay_message(message, 2)
-            except ConnectionClosedError:
-                self.logger.warn(
-                    "[%s] Websocket connection closed" % self.__class__.__name__
-                )
-            except:
-                self.logger.exception(
-                    "[%s] Handle %s message error"
-                    % (self.__class__.__name__, message["method"])
-                )
+                self._process_message(message)
+            finally:
+                self._message_queue.task_done(session_id)
+
+    def _process_message(self, message):
+        """处理队列中取出的通知消息并记录耗时"""
+        queue_delay = time.time() - message["timestamp"]
+        time0 = monotonic()
+        try:
+            self._handle_message(message)
+        finally:
+            self._stats.record_dispatch(
+                message["method"].split(".", 1)[0], queue_delay, monotonic() - time0
+            )
 
-    def _wait_for_response(self, request, timeout=120, interval=0.005):
-        """等待返回数据"""
-        time0 = time.time()
-        while time.time() - time0 < timeout:
-            if not self._connected:
-                raise ConnectionClosedError(
-                    "Connection closed when reading response of request %s" % request
-                )
+    def _handle_message(self, message):
+        """处理通知消息"""
+        if "data" in message:
+            # 延迟到工作线程中解码
+            message.update(codec.loads(message.pop("data")))
+        try:
+            self.on_recv_notify_msg(
+                message["method"],
+                message.get("params", {}),
+                message.get("sessionId", ""),
+            )
+        except MessageNotHandledError:
+            self.enqueue_delay_message(message, 2)
+        except ConnectionClosedError:
+            self.logger.warn(
+                "[%s] Websocket connection closed" % self.__class__.__name__
+            )
+        except:
+            self.logger.exception(
+                "[%s] Handle %s message error"
+                % (self.__class__.__name__, message["method"])
+            )
 
-            if request["id"] in self._data_dict:
-                result = self._data_dict.pop(request["id"])
-                if "result" in result:
-                    return result["result"]
-                elif "error" in result:
-                    self.logger.warn(
-                        "[%s] Response error: %s" % (self.__class__.__name__, json.dumps(result))
-                    )
-                    raise ChromeDebuggerProtocolError(
-                        result["error"]["code"],
-                        result["error"]["message"],
-                        result["error"].get("data"),
-                    )
+    def _cancel_waiters(self):
+        """连接断开时唤醒所有等待响应的线程"""
+        for waiter in list(self._waiters.values()):
+            waiter.cancel()
 
-            time.sleep(interval)
-        else:
-            raise TimeoutError("Wait for response of request %s timeout" % request)
+    def _wait_for_response(self, request, timeout=120):
+        """等待返回数据"""
+        waiter = self._waiters[request["id"]]
+        try:
+            if self._connected and not waiter.wait(timeout):
+                self._stats.record_timeout(request["method"])
+                raise TimeoutError("Wait for response of request %s timeout" % request)
+        finally:
+            self._waiters.pop(request["id"], None)
+
+        result = waiter.response
+        if result is None:
+            raise ConnectionClosedError(
+                "Connection closed when reading response of request %s" % request
+            )
+        if "error" in result:
+            self.logger.warn(
+                "[%s] Response error: %s" % (self.__class__.__name__, json.dumps(result))
+            )
+        return get_response_result(result)
 
-    def send_request(self, method, session_id='', **kwds):
-        """发送请求
+    def _post_request(self, method, session_id="", params=None):
+        """发送请求但不等待响应，调用方需使用`_wait_for_response`获取结果
 
         :param method: 命令字
         :type method:  string
+        :return: 请求数据
         """
         if not self._ws:
             raise ConnectionClosedError("Websocket connection %x is closed" % id(self))
-        self._seq += 1
-        request = {"id": self._seq, "method": method}
-        if kwds:
-            request["params"] = kwds
-        if session_id:
-            request['sessionId'] = session_id
-        data = json.dumps(request)
-        try:
-            self._ws.send(data)
-        except websocket.WebSocketConnectionClosedException as e:
-            raise ConnectionClosedError(e.message)
+        if method != PING_METHOD:
+            # 探测请求不算作使用，否则调试器池无法回收空闲的调试器
+            self._last_active_time = time.time()
+        with self._send_lock:
+            self._seq += 1
+            request = {"id": self._seq, "method": method}
+            if params:
+                request["params"] = params
+            if session_id:
+                request["sessionId"] = session_id
+            data = codec.dumps(request)
+            # 发送前注册等待器，避免响应先于注册到达
+            self._waiters[request["id"]] = ResponseWaiter(request)
+            try:
+                self._ws.send(data)
+            except websocket.WebSocketConnectionClosedException as e:
+                self._waiters.pop(request["id"], None)
+                raise ConnectionClosedError(str(e))
+
+        if self._tracer is not None:
+            self._tracer.record(EnumTraceDirection.SEND, data, session_id)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "[%s][%x][send][%d][%s] %s"
+                % (self.__class__.__name__, id(self), request["id"], method, data[:400])
+            )
+        return request
 
-        if "params" in request:
-            params = json.dumps(request["params"])
-        else:
-            params = ""
-        while params.find(" " * 2) >= 0:
-            # remove multi spaces
-            params = params.replace(" " * 2, " ")
-        self.logger.debug(
-            "[%s][%x][send][%d][%s] %s"
-            % (self.__class__.__name__, id(self), self._seq, method, params[:400])
-        )
+    def send_request(self, method, session_id='', **kwds):
+        """发送请求，多个线程可同时在同一连接上发送请求
+
+        :param method: 命令字
+        :type method:  string
+        """
+        request = self._post_request(method, session_id, kwds)
         return self._wait_for_response(request)
 
-    def on_recv_notify_msg(self, method, params):
+    def send_requests(self, requests, session_id="", timeout=120, return_exceptions=False):
+        """批量发送请求，所有请求连续发出后再统一等待响应
+
+        :param requests: 请求列表，每项为`(method, params)`或`method`
+        :type  requests: list
+        :param session_id: 会话ID
+        :type  session_id: string
+        :param return_exceptions: 是否在结果中返回异常，为False时抛出第一个异常
+        :type  return_exceptions: boolean
+        :return: 与请求顺序一致的结果列表
+        """
+        posted = []
+        with self._send_lock:
+            # 整批发送期间持有锁，保证请求连续写入
+            try:
+                for it in requests:
+                    if isinstance(it, (tuple, list)):
+                        method, params = it[0], it[1] if len(it) > 1 else None
+                    else:
+                        method, params = it, None
+                    posted.append(self._post_request(method, session_id, params))
+            except ConnectionClosedError:
+                for request in posted:
+                    self._waiters.pop(request["id"], None)
+                raise
+
+        time0 = time.time()
+        results = []
+        error = None
+        for request in posted:
+            try:
+                results.append(
+                    self._wait_for_response(
+                        request, max(timeout - (time.time() - time0), 0)
+                    )
+                )
+            except Exception as e:
+                if not return_exceptions and error is None:
+                    error = e
+                results.append(e)
+        if error:
+            raise error
+        return results
+
+    def on_recv_notify_msg(self, method, params, session_id=""):
         """接收到通知消息
 
         :param method: 消息方法名
         :type  method: string
         :param params: 参数字典
         :type  params: dict
+        :param session_id: 消息所属的会话ID，页面自身的消息为空
+        :type  session_id: string
         """
-        namespace, method = method.split(".")
-        for ns in list(self._handlers.keys()):
-            if ns == namespace:
-                self._handlers[ns].on_recv_notify_msg(method, params)
+        # 只监听通知的调试器也算作在使用
+        self._last_active_time = time.time()
+        callback = self._event_table.get(method)
+        if callback:
+            callback(params, session_id)
+            return
+        namespace, method = method.split(".", 1)
+        handler = self._namespace_table.get(namespace)
+        if handler:
+            handler.on_recv_notify_msg(method, params)
+
+    def is_event_consumed(self, method):
+        """是否有处理器关注该事件"""
+        return (
+            method in self._event_table
+            or method.split(".", 1)[0] in self._namespace_table
+        )
+
+    def set_queue_limit(
+        self, namespace, max_size, policy=EnumOverflowPolicy.DROP_OLDEST, key_func=None
+    ):
+        """限制命名空间的待处理通知消息数，如：
+
+            debugger.set_queue_limit("Page", 10)
+            debugger.set_queue_limit(
+                "DOM", 1000, EnumOverflowPolicy.COALESCE, params_key("nodeId", "name")
+            )
+
+        :param namespace: 命名空间
+        :type  namespace: string
+        :param max_size:  最大待处理消息数，为None时取消限制
+        :type  max_size:  int
+        :param policy:    超出限制时的处理策略，见`EnumOverflowPolicy`
+        :type  policy:    string
+        :param key_func:  合并策略下根据通知消息（含method、params）计算合并key的函数
+        :type  key_func:  function
+        """
+        self._message_queue.set_limit(namespace, max_size, policy, key_func)
+
+    def get_queue_stats(self):
+        """获取各命名空间待处理、丢弃和合并的通知消息数"""
+        return self._message_queue.get_overflow_stats()
+
+    def stats(self):
+        """获取运行指标快照
+
+        :return: {"uptime": 运行时间, "in_flight": 未收到响应的请求数,
+                  "requests": {命令字: 请求数据}, "events": {命名空间: 通知数据},
+                  "queue": 通知队列数据}，耗时单位为秒
+        """
+        in_flight = {}
+        for waiter in list(self._waiters.values()):
+            method = waiter.request["method"]
+            in_flight[method] = in_flight.get(method, 0) + 1
+        snapshot = self._stats.snapshot(in_flight)
+        snapshot["queue"] = {
+            "size": self._message_queue.qsize(),
+            "delayed": self._message_queue.delayed_size(),
+            "limits": self._message_queue.get_overflow_stats(),
+        }
+        return snapshot
+
+    def start_stats_reporter(self, interval=60, callback=None):
+        """定期输出运行指标
+
+        :param interval: 输出间隔，单位：秒
+        :type  interval: float
+        :param callback: 指标快照回调函数，为None时输出到日志
+        :type  callback: function
+        :return: `StatsReporter`对象，调用其`stop`方法停止输出
+        """
+
+        def report(snapshot):
+            try:
+                if callback:
+                    callback(snapshot)
+                else:
+                    self.logger.info(
+                        "[%s][%x] Stats: %s"
+                        % (self.__class__.__name__, id(self), codec.dumps(snapshot))
+                    )
+            except:
+                self.logger.exception(
+                    "[%s] Report stats error" % self.__class__.__name__
+                )
+
+        reporter = StatsReporter(self.stats, report, interval)
+        self._reporters.append(reporter)
+        return reporter
+
+    def _update_event_table(self):
+        """根据已注册处理器声明的事件重建事件分发表"""
+        self._event_table, self._namespace_table = build_event_table(self._handlers)
 
     def register_handler(self, handler_cls, *args, **kwargs):
         """注册处理器"""
@@ -257,16 +651,123 @@ class RemoteDebugger(object):
                 % (self.__class__.__name__, namespace)
             )
             return self._handlers[namespace]
-        self.logger.debug(
-            "[%s] Register handler %s" % (self.__class__.__name__, namespace)
-        )
-        handler = handler_cls(self, *args, **kwargs)
-        handler.logger = self.logger
-        self._handlers[namespace] = handler
+        handler = self._create_handler(handler_cls, *args, **kwargs)
+        self._update_event_table()
         for dep in handler.__class__.dependencies:
             if not dep.namespace in self._handlers:
                 self.register_handler(dep)
         handler.on_attached()
+        return handler
+
+    def _create_handler(self, handler_cls, *args, **kwargs):
+        self.logger.debug(
+            "[%s] Register handler %s"
+            % (self.__class__.__name__, handler_cls.namespace)
+        )
+        handler = handler_cls(self, *args, **kwargs)
+        handler.logger = self.logger
+        self._handlers[handler_cls.namespace] = handler
+        return handler
+
+    def register_handlers(self, handler_classes, max_workers=8):
+        """并行注册多个处理器
+
+        按依赖关系分层，同一层的处理器互不依赖，并行调用`on_attached`，
+        依赖的处理器所在的层先完成
+
+        :param handler_classes: 处理器类列表
+        :type  handler_classes: list
+        :param max_workers:     最大并行数
+        :type  max_workers:     int
+        :return: 与`handler_classes`顺序一致的处理器列表
+        """
+        levels = [
+            [self._create_handler(it) for it in handler_classes]
+            for handler_classes in self._get_handler_levels(handler_classes)
+        ]
+        self._update_event_table()
+        for handlers in levels:
+            run_in_parallel(lambda it: it.on_attached(), handlers, max_workers)
+        return [self._handlers[it.namespace] for it in handler_classes]
+
+    def _get_handler_levels(self, handler_classes, skip_registered=True):
+        """按依赖关系将处理器类分层，每层的处理器只依赖之前的层
+
+        :param skip_registered: 是否跳过已注册的处理器
+        :type  skip_registered: boolean
+        :return: 处理器类列表的列表
+        """
+        depths = {}  # namespace => (层, 处理器类)
+
+        def get_depth(handler_cls):
+            namespace = handler_cls.namespace
+            if (
+                skip_registered
+                and namespace in self._handlers
+                and namespace not in depths
+            ):
+                return -1
+            if namespace not in depths:
+                depth = 0
+                for dep in handler_cls.dependencies:
+                    depth = max(depth, get_depth(dep) + 1)
+                depths[namespace] = (depth, handler_cls)
+            return depths[namespace][0]
+
+        for handler_cls in handler_classes:
+            get_depth(handler_cls)
+        levels = []
+        for depth, handler_cls in depths.values():
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(handler_cls)
+        return levels
+
+    def _reattach_handlers(self, max_workers=8):
+        """按依赖顺序重新执行已注册处理器的`on_attached`"""
+        handler_classes = [it.__class__ for it in self._handlers.values()]
+        for level in self._get_handler_levels(handler_classes, False):
+            run_in_parallel(
+                lambda it: self._handlers[it.namespace].on_attached(),
+                level,
+                max_workers,
+            )
+
+    def reconnect(self, timeout=10):
+        """重新建立WebSocket连接，并重新执行已注册处理器的`on_attached`
+
+        等待中的请求会抛出`ConnectionClosedError`
+        """
+        if not self._running:
+            raise ConnectionClosedError("Debugger %x is closed" % id(self))
+        self.logger.info(
+            "[%s] Reconnect to %s" % (self.__class__.__name__, self._ws_addr)
+        )
+        with self._send_lock:
+            old_ws, self._ws = self._ws, None
+            self._connected = False
+            if old_ws:
+                self._close_websocket(old_ws)
+            self._cancel_waiters()
+            self._connect()
+        self._wait_for_ready(timeout)
+        self._reattach_handlers()
+
+    def ping(self, timeout=5):
+        """发送请求探测连接是否可用，命令不支持时返回错误也说明连接可用"""
+        if not self.connected:
+            return False
+        try:
+            request = self._post_request(PING_METHOD)
+        except ConnectionClosedError:
+            return False
+        waiter = self._waiters.get(request["id"])
+        try:
+            if not waiter or not waiter.wait(timeout):
+                return False
+        finally:
+            self._waiters.pop(request["id"], None)
+        return waiter.response is not None
 
     def unregister_handler(self, handler_cls):
         """移除处理器"""
@@ -274,6 +775,7 @@ class RemoteDebugger(object):
         if not namespace in self._handlers:
             raise RuntimeError("Handler %s not registered" % (handler_cls))
         self._handlers.pop(namespace)
+        self._update_event_table()
 
     def dispatch_event(self, event, *args, **kwargs):
         for ns in self._handlers:
@@ -291,9 +793,15 @@ class RemoteDebugger(object):
     def close(self):
         """关闭调试器"""
         self._running = False
+        if self._reactor is None:
+            self._message_queue.close()  # 共用的队列由Reactor关闭
+        for reporter in self._reporters:
+            reporter.stop()
         if self._ws:
             self.logger.info(
                 "[%s] WebSocket connection closed" % self.__class__.__name__
             )
-            self._ws.close()
-            self._ws = None
+            ws, self._ws = self._ws, None
+            self._close_websocket(ws)
+        self._cancel_waiters()
+        self._run_close_callbacks()
@@ -17,8 +17,10 @@
 """
 
 from __future__ import unicode_literals
+import hashlib
 import json
 import time
+from .context_index import ContextIndex
 from .handler import DebuggerHandler
 from .page_handler import PageHandler
 from .util import (
@@ -30,6 +32,161 @@ from .util import (
 )
 
 
+EVAL_SCRIPT_PARAMS = {
+    "objectGroup": "console",
+    "includeCommandLineAPI": True,
+    "doNotPauseOnExceptionsAndMuteConsole": False,
+    "returnByValue": False,
+    "generatePreview": True,
+}
+
+
+def wrap_script(script):
+    """将脚本包装为捕获异常并以字符串返回结果的形式"""
+    script = script.replace("\\", r"\\")
+    script = script.replace('"', r"\"")
+    script = script.replace("\r", r"\r")
+    script = script.replace("\n", r"\n")
+    return (
+        r"""(function(){
+            try{
+                var result = eval("%s");
+                if(result != undefined){
+                    return 'S' + result.toString();
+                }else{
+                    return 'Sundefined';
+                }
+            }catch(e){
+                var retVal = 'E[' + e.name + ']' + e.message;//toString()
+                retVal += '\n' + e.stack;
+                return retVal;
+            }
+        })();"""
+        % script
+    )
+
+
+def parse_script_result(result):
+    """解析`wrap_script`包装后的脚本执行结果
+
+    :return: (是否执行成功, 结果)
+    """
+    if result[0] == "E":
+        return False, result[1:]
+    elif result[0] == "S":
+        return True, result[1:]
+    else:
+        raise ChromeDebuggerProtocolError(result)
+
+
+# 按值返回结果，脚本返回Promise时等待其完成
+EVAL_VALUE_PARAMS = {
+    "objectGroup": "console",
+    "includeCommandLineAPI": True,
+    "returnByValue": True,
+    "awaitPromise": True,
+}
+
+# 调用辅助函数库中的函数，声明固定不变，便于V8复用编译结果
+HELPER_CALL_FUNCTION = """function(name) {
+    var helpers = window.__chrome_master_helpers__;
+    if (!helpers || !helpers[name]) {
+        throw new ReferenceError("Helper " + name + " not installed");
+    }
+    return helpers[name].apply(this, Array.prototype.slice.call(arguments, 1));
+}"""
+
+# 在一次调用中依次执行多个表达式，单个表达式出错或超时不影响其它表达式
+EVAL_MANY_FUNCTION = """function(scripts, timeout) {
+    function fail(e) {
+        var error = {name: null, message: String(e), stack: null};
+        if (e instanceof Error) {
+            error = {name: e.name, message: e.message, stack: e.stack};
+        }
+        return {success: false, error: error};
+    }
+    function succeed(value) {
+        // 逐项序列化，不可序列化的值只导致该项失败
+        var text = JSON.stringify(value);
+        return {success: true, value: text === undefined ? undefined : JSON.parse(text)};
+    }
+    function run(script) {
+        try {
+            return Promise.resolve((0, eval)(script)).then(succeed).then(null, fail);
+        } catch (e) {
+            return Promise.resolve(fail(e));
+        }
+    }
+    return Promise.all(scripts.map(function(script) {
+        // 每项单独计时，未完成的Promise不会阻塞整批结果
+        var timer = null;
+        var deadline = new Promise(function(resolve) {
+            timer = setTimeout(function() {
+                var error = {name: "TimeoutError", stack: null};
+                error.message = "Timeout after " + timeout + "s";
+                resolve({success: false, error: error});
+            }, timeout * 1000);
+        });
+        return Promise.race([run(script), deadline]).then(function(result) {
+            clearTimeout(timer);
+            return result;
+        });
+    }));
+}"""
+
+_UNSERIALIZABLE_VALUES = {
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+    "-0": -0.0,
+}
+
+
+def get_remote_object_value(remote_object):
+    """获取按值返回的RemoteObject的值，`undefined`返回None"""
+    if "unserializableValue" in remote_object:
+        value = remote_object["unserializableValue"]
+        if value in _UNSERIALIZABLE_VALUES:
+            return _UNSERIALIZABLE_VALUES[value]
+        if value.endswith("n"):
+            return int(value[:-1])  # BigInt
+        raise ValueError("Unsupported value %s" % value)
+    return remote_object.get("value")
+
+
+def make_call_argument(value):
+    """将Python对象转换为`Runtime.callFunctionOn`的CallArgument"""
+    if isinstance(value, float):
+        if value != value:
+            return {"unserializableValue": "NaN"}
+        if value in (float("inf"), float("-inf")):
+            return {"unserializableValue": "Infinity" if value > 0 else "-Infinity"}
+    return {"value": value}
+
+
+def parse_evaluate_result(result):
+    """解析按值执行脚本的结果
+
+    :return: (是否执行成功, 结果值或异常详情)
+    """
+    if "exceptionDetails" in result:
+        return False, result["exceptionDetails"]
+    if "result" not in result:
+        raise RuntimeError("Invalid Response: %s" % result)
+    return True, get_remote_object_value(result["result"])
+
+
+def get_exception_message(details):
+    """根据异常详情生成错误信息"""
+    exception = details.get("exception", {})
+    if exception.get("description"):
+        return exception["description"]
+    message = details.get("text", "Uncaught")
+    if "value" in exception:
+        message += " %s" % json.dumps(exception["value"])
+    return message
+
+
 class NodeRuntimeHandler(DebuggerHandler):
     """Node.js中的Runtime命名空间处理器
     https://chromedevtools.github.io/devtools-protocol/v8/
@@ -37,6 +194,7 @@ class NodeRuntimeHandler(DebuggerHandler):
 
     namespace = "Runtime"
     dependencies = []
+    events = {}
 
     def on_attached(self):
         """附加到调试器成功回调"""
@@ -53,7 +211,7 @@ class NodeRuntimeHandler(DebuggerHandler):
             return self._tags[context_id]
         return ""
 
-    def _eval_script(self, context_id, script):
+    def _eval_script(self, context_id, script, session_id=""):
         script = unicode_decode(script)
         tag = unicode_decode(self._get_tag(context_id))
         self.logger.info(
@@ -66,52 +224,60 @@ class NodeRuntimeHandler(DebuggerHandler):
                 script[:200].strip(),
             )
         )
-        script = script.replace("\\", r"\\")
-        script = script.replace('"', r"\"")
-        script = script.replace("\r", r"\r")
-        script = script.replace("\n", r"\n")
-        script = (
-            r"""(function(){
-            try{
-                var result = eval("%s");
-                if(result != undefined){
-                    return 'S' + result.toString();
-                }else{
-                    return 'Sundefined';
-                }
-            }catch(e){
-                var retVal = 'E[' + e.name + ']' + e.message;//toString()
-                retVal += '\n' + e.stack;
-                return retVal;
-            }
-        })();"""
-            % script
-        )
-        params = {
-            "objectGroup": "console",
-            "includeCommandLineAPI": True,
-            "doNotPauseOnExceptionsAndMuteConsole": False,
-            "returnByValue": False,
-            "generatePreview": True,
-        }
+        script = wrap_script(script)
         try:
-            result = self.evaluate(contextId=context_id, expression=script, **params)
+            result = self.evaluate(
+                contextId=context_id,
+                expression=script,
+                session_id=session_id,
+                **EVAL_SCRIPT_PARAMS
+            )
         # if not result:
         #     result = self.evaluate(expression=script, **params)
         except ChromeDebuggerProtocolError as e:
-            result = self.evaluate(expression=script, **params)
+            result = self.evaluate(
+                expression=script, session_id=session_id, **EVAL_SCRIPT_PARAMS
+            )
         if "result" not in result:
             raise RuntimeError("Invalid Response: %s" % result)
         result = unicode_decode(result["result"]["value"])
         self.logger.info(
             "[%s][%s][retn] %s" % (self.__class__.namespace, tag, result[:512])
         )
-        if result[0] == "E":
-            return False, result[1:]
-        elif result[0] == "S":
-            return True, result[1:]
-        else:
-            raise ChromeDebuggerProtocolError(result)
+        return parse_script_result(result)
+
+    def _eval_value(self, context_id, script, session_id="", await_promise=True):
+        script = unicode_decode(script)
+        tag = unicode_decode(self._get_tag(context_id))
+        self.logger.info(
+            "[%s][%s][%s][eval_value][%d] %s"
+            % (
+                self.__class__.namespace,
+                tag,
+                context_id,
+                len(script),
+                script[:200].strip(),
+            )
+        )
+        params = dict(EVAL_VALUE_PARAMS, awaitPromise=await_promise)
+        try:
+            result = self.evaluate(
+                contextId=context_id,
+                expression=script,
+                session_id=session_id,
+                **params
+            )
+        except IDNotFoundError as e:
+            if "context" in e.message.lower():
+                raise
+            # 与context无关的错误，如结果无法按值返回
+            return False, {"text": e.message}
+        success, result = parse_evaluate_result(result)
+        self.logger.info(
+            "[%s][%s][retn] %s"
+            % (self.__class__.namespace, tag, json.dumps(result)[:512])
+        )
+        return success, result
 
     def eval_script(self, script):
         """执行JavaScript"""
@@ -120,85 +286,120 @@ class NodeRuntimeHandler(DebuggerHandler):
             raise JavaScriptError("", result)
         return result
 
+    def eval_value(self, script, await_promise=True):
+        """执行JavaScript，按值返回结果
+
+        :param await_promise: 结果为Promise时是否等待其完成
+        :return: 结果转换为Python对象，`undefined`为None
+        """
+        success, result = self._eval_value(1, script, await_promise=await_promise)
+        if not success:
+            raise JavaScriptError("", get_exception_message(result), result)
+        return result
+
 
 class RuntimeHandler(NodeRuntimeHandler):
     """Runtime命名空间的处理器"""
 
     dependencies = [PageHandler]
+    events = {
+        "executionContextCreated": "on_execution_context_created",
+        "executionContextDestroyed": "on_execution_context_destroyed",
+        "executionContextsCleared": "on_execution_contexts_cleared",
+        "consoleAPICalled": "on_console_api_called",
+    }
     max_console_log_count = 100  # 最大存储的Console日志条数
+    max_cached_scripts = 256  # 每个执行上下文最多缓存的编译脚本数
 
     def __init__(self, *args):
         super(RuntimeHandler, self).__init__(*args)
-        self._context_dict = {}
+        self._contexts = ContextIndex()
+        self._script_cache = {}  # (会话ID, context id) => {脚本摘要: script id}
+        self._helpers = {}  # 辅助函数名 => 函数声明
+        self._helper_source = None
+        self._helper_script_id = None
+        self._helper_contexts = set()  # 已注入辅助函数库的(会话ID, context id)
         self._console_logs = []
         self._console_callback = None
 
-    def on_recv_notify_msg(self, method, params):
-        """接收到通知消息
+    def on_execution_context_created(self, params, session_id=""):
+        """有新的执行上下文创建"""
+        context = params["context"]
+        if "type" in context and context["type"] == "Extension":
+            return
+        if "frameId" in context:
+            frame_id = context["frameId"]
+        else:
+            frame_id = context["auxData"]["frameId"]
+        world_name = None
+        if not context.get("auxData", {}).get("isDefault", True):
+            world_name = context.get("name", "")
+        self._contexts.add(frame_id, context["id"], session_id, world_name)
+        self.logger.info(
+            "[%s] Add context: %s(%s %s)%s%s"
+            % (
+                self.__class__.namespace,
+                context["id"],
+                frame_id,
+                context.get("origin"),
+                " in world %s" % world_name if world_name is not None else "",
+                " in session %s" % session_id if session_id else "",
+            )
+        )
+        if self._helper_script_id and not session_id and world_name is None:
+            # 新文档创建时已执行过辅助函数库
+            self._helper_contexts.add((session_id, context["id"]))
+        self._tags[context["id"]] = self.__get_tag(context["id"])
 
-        :param method: 消息方法名
-        :type  method: string
-        :param params: 参数字典
-        :type  params: dict
-        """
-        if method == "executionContextCreated":
-            # 有新的frame创建
-            context = params["context"]
-            if "type" in context and context["type"] == "Extension":
-                return
-            if "frameId" in context:
-                frame_id = context["frameId"]
-            else:
-                frame_id = context["auxData"]["frameId"]
-            self._context_dict[frame_id] = context["id"]
+    def on_execution_context_destroyed(self, params, session_id=""):
+        """执行上下文被销毁"""
+        context_id = params["executionContextId"]
+        frame = self._contexts.remove(context_id, session_id)
+        if frame is None:
+            self.logger.warn(
+                "[%s] Context %s not found" % (self.__class__.namespace, context_id)
+            )
+        else:
             self.logger.info(
-                "[%s] Add context: %s(%s %s)"
-                % (
-                    self.__class__.namespace,
-                    context["id"],
-                    frame_id,
-                    context.get("origin"),
-                )
+                "[%s] Remove context: %s(%s)"
+                % (self.__class__.namespace, context_id, frame)
             )
-            self._tags[context["id"]] = self.__get_tag(context["id"])
-        elif method == "executionContextDestroyed":
-            context_id = params["executionContextId"]
-            for frame in self._context_dict:
-                if self._context_dict[frame] == context_id:
-                    self.logger.info(
-                        "[%s] Remove context: %s(%s)"
-                        % (self.__class__.namespace, context_id, frame)
-                    )
-                    self._context_dict.pop(frame)
-                    break
+        self._forget_context(context_id, session_id)
+
+    def on_execution_contexts_cleared(self, params, session_id=""):
+        """会话中的所有执行上下文被销毁"""
+        for _, context_id in self._contexts.clear(session_id):
+            self._forget_context(context_id, session_id)
+
+    def _forget_context(self, context_id, session_id=""):
+        """清除执行上下文相关的缓存"""
+        self._tags.pop(context_id, None)
+        self._script_cache.pop((session_id, context_id), None)
+        self._helper_contexts.discard((session_id, context_id))
+
+    def on_console_api_called(self, params, session_id=""):
+        """调用了console接口"""
+        for it in params["args"]:
+            value = None
+            if it["type"] == "object" and "objectId" in it:
+                value = {"object_id": it["objectId"]}
+            elif it.get("value"):
+                value = it["value"]
             else:
-                self.logger.warn(
-                    "[%s] Context %s not found" % (self.__class__.namespace, context_id)
-                )
-            if context_id in self._tags:
-                self._tags.pop(context_id)
-        elif method == "consoleAPICalled":
-            for it in params["args"]:
-                value = None
-                if it["type"] == "object" and "objectId" in it:
-                    value = {"object_id": it["objectId"]}
-                elif it.get("value"):
-                    value = it["value"]
-                else:
-                    return
-                log = {
-                    "timestamp": params["timestamp"],
-                    "function": params["type"],
-                    "frame": self._get_frame_id(params["executionContextId"]),
-                    "type": it["type"],
-                    "value": value,
-                }
-                if len(self._console_logs) >= self.max_console_log_count:
-                    self._console_logs.pop(0)  # abandon old log
-                self._console_logs.append(log)
-                if self._console_callback:
-                    self.handle_console_log(log)
-                    self._console_callback(log)
+                return
+            log = {
+                "timestamp": params["timestamp"],
+                "function": params["type"],
+                "frame": self._get_frame_id(params["executionContextId"], session_id),
+                "type": it["type"],
+                "value": value,
+            }
+            if len(self._console_logs) >= self.max_console_log_count:
+                self._console_logs.pop(0)  # abandon old log
+            self._console_logs.append(log)
+            if self._console_callback:
+                self.handle_console_log(log)
+                self._console_callback(log)
 
     def handle_console_log(self, log):
         """Lazy retrieve log data"""
@@ -218,17 +419,17 @@ class RuntimeHandler(NodeRuntimeHandler):
             self.handle_console_log(log)
             callback(log)
 
-    def _get_context_id(self, frame_id):
+    def _get_context_id(self, frame_id, world_name=None):
         """frame id to context id"""
-        return self._context_dict.get(frame_id)
+        context = self._contexts.get_context(frame_id, world_name)
+        return context[1] if context else None
 
-    def _get_frame_id(self, context_id):
+    def _get_frame_id(self, context_id, session_id=""):
         """context id to frame id"""
-        for frame_id in self._context_dict:
-            if self._context_dict[frame_id] == context_id:
-                return frame_id
-        else:
+        frame_id = self._contexts.get_frame(context_id, session_id)
+        if frame_id is None:
             raise RuntimeError("Context id %s not exist" % context_id)
+        return frame_id
 
     def _handle_object_value(self, value):
         if value["type"] in ("number", "string", "boolean"):
@@ -262,6 +463,37 @@ class RuntimeHandler(NodeRuntimeHandler):
             return None
         return self._get_context_id(frame_id)
 
+    def _wait_for_context(self, frame_id, timeout):
+        """等待frame的默认执行上下文创建，frame id为None时等待主frame
+
+        :return: (frame id, (会话ID, context id))，超时时上下文为None
+        """
+        time0 = time.time()
+        while True:
+            curr_frame_id = frame_id or self._get_main_frame_id()
+            remaining = max(timeout - (time.time() - time0), 0)
+            if curr_frame_id:
+                if not frame_id:
+                    # 主frame可能随导航变化，定期重新获取
+                    remaining = min(remaining, 0.5)
+                context = self._contexts.wait_for_context(curr_frame_id, remaining)
+                if context:
+                    return curr_frame_id, context
+            elif remaining > 0:
+                # 主frame未知，有新的执行上下文创建时重新获取
+                self._contexts.wait(min(remaining, 0.5))
+            if time.time() - time0 >= timeout:
+                return curr_frame_id, None
+
+    def wait_for_context(self, frame_id=None, timeout=10):
+        """等待frame的执行上下文创建
+
+        :param frame_id: frame id，为None时使用主frame
+        :return: context id，超时返回None
+        """
+        _, context = self._wait_for_context(frame_id, timeout)
+        return context[1] if context else None
+
     def __get_tag(self, context_id):
         return str(context_id)
         timeout = 5
@@ -292,40 +524,327 @@ class RuntimeHandler(NodeRuntimeHandler):
             )
             return str(context_id)
 
-    def eval_script(self, frame_id, script):
-        """执行JavaScript"""
+    def _run_in_frame(self, frame_id, func):
+        """在frame的执行上下文中调用`func(context_id, session_id)`，上下文失效时重试
+
+        :return: (frame id, `func`的返回值)
+        """
         timeout = 10
         time0 = time.time()
-        while time.time() - time0 < timeout:
-            exp = None
-            frame_id = frame_id or self._get_main_frame_id()
-            if not frame_id:
-                time.sleep(0.5)
-                continue
-            context_id = self._get_context_id(frame_id)
-            if not context_id:
-                time.sleep(0.5)
-                continue
-
+        exp = None
+        while True:
+            remaining = timeout - (time.time() - time0)
+            curr_frame_id, context = self._wait_for_context(frame_id, remaining)
+            if not context:
+                if exp:
+                    raise exp
+                elif not curr_frame_id:
+                    raise TimeoutError("Wait for root frame timeout")
+                else:
+                    raise TimeoutError(
+                        "Can't find context id of frame %s" % curr_frame_id
+                    )
+            session_id, context_id = context
             try:
-                success, result = self._eval_script(context_id, script)
-                break
+                return curr_frame_id, func(context_id, session_id)
             except IDNotFoundError as e:
-                # 重新获取context id
-                time.sleep(0.5)
+                if "context" not in e.message.lower():
+                    raise JavaScriptError(curr_frame_id, e.message, {"text": e.message})
+                # context已失效，等待新的context创建
+                self._contexts.remove(context_id, session_id)
+                self._forget_context(context_id, session_id)
                 exp = e
-        else:
-            if exp:
-                raise exp
-            elif not frame_id:
-                raise TimeoutError("Wait for root frame timeout")
-            else:
-                raise TimeoutError("Can't find context id of frame %s" % frame_id)
 
+    def eval_script(self, frame_id, script):
+        """执行JavaScript"""
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._eval_script(
+                context_id, script, session_id
+            ),
+        )
         if not success:
             raise JavaScriptError(frame_id, result)
         return result
 
+    def eval_value(self, frame_id, script, await_promise=True):
+        """执行JavaScript，按值返回结果
+
+        与`eval_script`不同，脚本不经过包装和二次解析，结果保留JSON类型，
+        异常时抛出带有异常详情的`JavaScriptError`
+
+        :param frame_id:      frame id，为None时使用主frame
+        :param script:        JavaScript表达式
+        :param await_promise: 结果为Promise时是否等待其完成
+        :return: 结果转换为Python对象，`undefined`为None
+        """
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._eval_value(
+                context_id, script, session_id, await_promise
+            ),
+        )
+        if not success:
+            raise JavaScriptError(frame_id, get_exception_message(result), result)
+        return result
+
+    def _compile_script(self, context_id, script, session_id=""):
+        """编译脚本并保留在执行上下文中
+
+        :return: (是否编译成功, script id或异常详情)
+        """
+        result = self.compileScript(
+            expression=script,
+            sourceURL="",
+            persistScript=True,
+            executionContextId=context_id,
+            session_id=session_id,
+        )
+        if "exceptionDetails" in result:
+            return False, result["exceptionDetails"]
+        return True, result["scriptId"]
+
+    def _run_script(
+        self, context_id, script, session_id="", await_promise=True, retry=True
+    ):
+        script = unicode_decode(script)
+        key = (session_id, context_id)
+        digest = hashlib.sha1(script.encode("utf8")).hexdigest()
+        scripts = self._script_cache.get(key, {})
+        script_id = scripts.get(digest)
+        if not script_id:
+            if len(scripts) >= self.max_cached_scripts:
+                return self._eval_value(context_id, script, session_id, await_promise)
+            success, result = self._compile_script(context_id, script, session_id)
+            if not success:
+                return success, result
+            script_id = result
+            self._script_cache.setdefault(key, {})[digest] = script_id
+        self.logger.info(
+            "[%s][%s][%s][run][%s] %s"
+            % (
+                self.__class__.namespace,
+                unicode_decode(self._get_tag(context_id)),
+                context_id,
+                script_id,
+                script[:200].strip(),
+            )
+        )
+        try:
+            result = self.runScript(
+                scriptId=script_id,
+                executionContextId=context_id,
+                objectGroup=EVAL_VALUE_PARAMS["objectGroup"],
+                includeCommandLineAPI=EVAL_VALUE_PARAMS["includeCommandLineAPI"],
+                returnByValue=True,
+                awaitPromise=await_promise,
+                session_id=session_id,
+            )
+        except IDNotFoundError as e:
+            self._script_cache.get(key, {}).pop(digest, None)
+            if retry and "script" in e.message.lower():
+                # 脚本已失效，重新编译
+                return self._run_script(
+                    context_id, script, session_id, await_promise, False
+                )
+            raise
+        return parse_evaluate_result(result)
+
+    def run_script(self, frame_id, script, await_promise=True):
+        """执行JavaScript，按值返回结果
+
+        脚本在每个执行上下文中只编译一次，之后按script id执行，适用于反复执行的辅助脚本。
+        执行上下文销毁时缓存随之失效
+
+        :param frame_id:      frame id，为None时使用主frame
+        :param script:        JavaScript表达式
+        :param await_promise: 结果为Promise时是否等待其完成
+        :return: 结果转换为Python对象，`undefined`为None
+        """
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._run_script(
+                context_id, script, session_id, await_promise
+            ),
+        )
+        if not success:
+            raise JavaScriptError(frame_id, get_exception_message(result), result)
+        return result
+
+    def _call_function(
+        self, context_id, function_decl, args, session_id="", await_promise=True
+    ):
+        function_decl = unicode_decode(function_decl)
+        self.logger.info(
+            "[%s][%s][%s][call][%d] %s"
+            % (
+                self.__class__.namespace,
+                unicode_decode(self._get_tag(context_id)),
+                context_id,
+                len(args),
+                function_decl[:200].strip(),
+            )
+        )
+        result = self.callFunctionOn(
+            functionDeclaration=function_decl,
+            arguments=[make_call_argument(it) for it in args],
+            executionContextId=context_id,
+            objectGroup=EVAL_VALUE_PARAMS["objectGroup"],
+            returnByValue=True,
+            awaitPromise=await_promise,
+            session_id=session_id,
+        )
+        return parse_evaluate_result(result)
+
+    def call_function(self, frame_id, function_decl, *args, **kwargs):
+        """在frame中调用JavaScript函数，按值返回结果
+
+        参数以CallArgument的形式传递，不拼接到脚本中，无需转义：
+
+            runtime.call_function(None, "function(a, b) { return a + b; }", 1, 2)
+
+        :param frame_id:      frame id，为None时使用主frame
+        :param function_decl: 函数声明
+        :param args:          函数参数，须可JSON序列化
+        :param await_promise: 结果为Promise时是否等待其完成，默认为True
+        :return: 结果转换为Python对象，`undefined`为None
+        """
+        await_promise = kwargs.pop("await_promise", True)
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._call_function(
+                context_id, function_decl, args, session_id, await_promise
+            ),
+        )
+        if not success:
+            raise JavaScriptError(frame_id, get_exception_message(result), result)
+        return result
+
+    def eval_many(self, frame_id, scripts, timeout=10):
+        """在一次请求中执行多个JavaScript表达式，按值返回结果
+
+        表达式依次在全局作用域中执行，结果为Promise时等待其完成
+
+        :param frame_id: frame id，为None时使用主frame
+        :param scripts:  JavaScript表达式列表
+        :type  scripts:  list
+        :param timeout:  等待单个Promise完成的超时时间，超时的项以`TimeoutError`失败，
+                         单位：秒
+        :type  timeout:  float
+        :return: 与`scripts`顺序一致的列表，每项为{"success": 是否执行成功,
+                 "value": 结果, "error": 执行失败时的`JavaScriptError`}
+        """
+        scripts = [unicode_decode(it) for it in scripts]
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._call_function(
+                context_id, EVAL_MANY_FUNCTION, (scripts, timeout), session_id
+            ),
+        )
+        if not success:
+            raise JavaScriptError(frame_id, get_exception_message(result), result)
+        items = []
+        for it in result:
+            error = None
+            if not it["success"]:
+                exception = it["error"]
+                details = {
+                    "text": "Uncaught",
+                    "exception": {
+                        "className": exception["name"],
+                        "description": exception["stack"] or exception["message"],
+                    },
+                }
+                error = JavaScriptError(
+                    frame_id, get_exception_message(details), details
+                )
+            items.append(
+                {"success": it["success"], "value": it.get("value"), "error": error}
+            )
+        return items
+
+    def install_helpers(self, helpers):
+        """安装辅助函数库，之后通过`call_helper`按名称调用
+
+        函数库通过`Page.addScriptToEvaluateOnNewDocument`在新文档中执行，
+        已存在的执行上下文在首次调用时注入
+
+        :param helpers: {函数名: 函数声明}
+        :type  helpers: dict
+        """
+        self._helpers.update(helpers)
+        lines = [
+            "(function() {",
+            "    var helpers = window.__chrome_master_helpers__ ="
+            " window.__chrome_master_helpers__ || {};",
+        ]
+        for name in sorted(self._helpers):
+            lines.append(
+                "    helpers[%s] = (%s);" % (json.dumps(name), self._helpers[name])
+            )
+        lines.append("})();")
+        self._helper_source = "\n".join(lines)
+        page = self._debugger.page
+        if self._helper_script_id:
+            page.removeScriptToEvaluateOnNewDocument(
+                identifier=self._helper_script_id
+            )
+        self._helper_script_id = page.addScriptToEvaluateOnNewDocument(
+            source=self._helper_source
+        )["identifier"]
+        self._helper_contexts.clear()
+
+    def _inject_helpers(self, context_id, session_id=""):
+        result = self.evaluate(
+            expression=self._helper_source,
+            contextId=context_id,
+            session_id=session_id,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise JavaScriptError("", get_exception_message(details), details)
+        self._helper_contexts.add((session_id, context_id))
+
+    def _call_helper(self, context_id, name, args, session_id="", await_promise=True):
+        key = (session_id, context_id)
+        for _ in range(2):
+            if key not in self._helper_contexts:
+                self._inject_helpers(context_id, session_id)
+            success, result = self._call_function(
+                context_id,
+                HELPER_CALL_FUNCTION,
+                (name,) + tuple(args),
+                session_id,
+                await_promise,
+            )
+            if success or "not installed" not in get_exception_message(result):
+                break
+            # 上下文中的函数库缺失，重新注入
+            self._helper_contexts.discard(key)
+        return success, result
+
+    def call_helper(self, frame_id, name, *args, **kwargs):
+        """调用`install_helpers`安装的辅助函数
+
+        :param frame_id:      frame id，为None时使用主frame
+        :param name:          函数名
+        :param args:          函数参数，须可JSON序列化
+        :param await_promise: 结果为Promise时是否等待其完成，默认为True
+        :return: 结果转换为Python对象，`undefined`为None
+        """
+        if name not in self._helpers:
+            raise ValueError("Helper %s not installed" % name)
+        await_promise = kwargs.pop("await_promise", True)
+        frame_id, (success, result) = self._run_in_frame(
+            frame_id,
+            lambda context_id, session_id: self._call_helper(
+                context_id, name, args, session_id, await_promise
+            ),
+        )
+        if not success:
+            raise JavaScriptError(frame_id, get_exception_message(result), result)
+        return result
+
     def read_console_log(self):
         """read one console log"""
         if not self._console_logs:
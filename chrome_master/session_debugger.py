@@ -0,0 +1,280 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""基于扁平会话的连接复用
+
+所有页面共用一个浏览器级别的WebSocket连接，每个页面通过`Target.attachToTarget(flatten=True)`
+获得会话，页面的处理器通过轻量的`SessionDebugger`收发消息：
+
+    browser = BrowserDebugger(browser_ws_addr)
+    debugger = browser.attach_session(target_id)
+    debugger.register_handler(RuntimeHandler)
+"""
+
+from __future__ import unicode_literals
+import threading
+import time
+
+from . import codec
+from .remote_debugger import PING_METHOD, RemoteDebugger
+from .util import ChromeDebuggerProtocolError, ConnectionClosedError
+
+
+class BrowserDebugger(RemoteDebugger):
+    """浏览器级别的调试器，按会话ID将通知消息路由到各页面的`SessionDebugger`
+    """
+
+    def __init__(self, ws_addr, open_socket_func=None, worker_count=4, reactor=None):
+        self._sessions = {}  # 会话ID => SessionDebugger，包括页面内子目标的会话
+        self._sessions_lock = threading.Lock()
+        self._session_events = set()  # 各会话关注的事件
+        self._session_namespaces = set()  # 各会话中未声明事件的处理器的命名空间
+        super(BrowserDebugger, self).__init__(
+            ws_addr, open_socket_func, worker_count, reactor
+        )
+
+    def attach_session(self, target_id):
+        """附加到目标，创建会话调试器
+
+        :param target_id: 目标ID，即页面ID
+        :type  target_id: string
+        :return: `SessionDebugger`对象
+        """
+        result = self.send_request(
+            "Target.attachToTarget", targetId=target_id, flatten=True
+        )
+        session = SessionDebugger(self, result["sessionId"], target_id)
+        with self._sessions_lock:
+            self._sessions[session.session_id] = session
+        return session
+
+    def detach_session(self, session):
+        """分离会话调试器"""
+        with self._sessions_lock:
+            for session_id, it in list(self._sessions.items()):
+                if it is session:
+                    self._sessions.pop(session_id)
+        self._update_session_events()
+        if not self.connected:
+            return
+        try:
+            self.send_request("Target.detachFromTarget", sessionId=session.session_id)
+        except (ChromeDebuggerProtocolError, ConnectionClosedError):
+            pass  # 目标已关闭
+
+    def get_sessions(self):
+        """获取所有页面的会话调试器"""
+        with self._sessions_lock:
+            return dict(
+                (session_id, session)
+                for session_id, session in self._sessions.items()
+                if session_id == session.session_id
+            )
+
+    def _update_session_events(self):
+        """重建各会话关注的事件集合"""
+        events = set(["Target.attachedToTarget", "Target.detachedFromTarget"])
+        namespaces = set()
+        for session in self.get_sessions().values():
+            events.update(session._event_table)
+            namespaces.update(session._namespace_table)
+        self._session_events, self._session_namespaces = events, namespaces
+
+    def on_message(self, ws, message=None):
+        """收到消息"""
+        if message is None:
+            message = ws  # 兼容新版本websocket_client
+        _, method = codec.peek_message(message)
+        if method in ("Target.attachedToTarget", "Target.detachedFromTarget"):
+            # 在WebSocket线程中更新会话路由，保证子会话的消息到达时已能路由
+            self._route_session(method, codec.loads(message))
+        super(BrowserDebugger, self).on_message(message)
+
+    def _route_session(self, method, message):
+        parent_id = message.get("sessionId", "")
+        session_id = message["params"]["sessionId"]
+        with self._sessions_lock:
+            if method == "Target.detachedFromTarget":
+                session = self._sessions.get(session_id)
+                if session and session.session_id == session_id:
+                    session.on_detached()
+                    # 移除页面会话及其子会话
+                    for it, value in list(self._sessions.items()):
+                        if value is session:
+                            self._sessions.pop(it)
+                elif session:
+                    self._sessions.pop(session_id)
+            elif parent_id in self._sessions:
+                self._sessions[session_id] = self._sessions[parent_id]
+
+    def is_event_consumed(self, method):
+        """是否有处理器关注该事件"""
+        return (
+            super(BrowserDebugger, self).is_event_consumed(method)
+            or method in self._session_events
+            or method.split(".", 1)[0] in self._session_namespaces
+        )
+
+    def on_recv_notify_msg(self, method, params, session_id=""):
+        """将会话的通知消息交给对应的会话调试器处理"""
+        if not session_id:
+            super(BrowserDebugger, self).on_recv_notify_msg(method, params)
+            return
+        session = self._sessions.get(session_id)
+        if session:
+            session.on_recv_notify_msg(method, params, session_id)
+        else:
+            self.logger.debug(
+                "[%s] Ignore %s message of unknown session %s"
+                % (self.__class__.__name__, method, session_id)
+            )
+
+    def _detach_all_sessions(self):
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.on_detached()
+        self._update_session_events()
+
+    def _reattach_session(self, session):
+        """为会话调试器重新附加到目标，返回新的会话ID"""
+        result = self.send_request(
+            "Target.attachToTarget", targetId=session.target_id, flatten=True
+        )
+        with self._sessions_lock:
+            for session_id, it in list(self._sessions.items()):
+                if it is session:
+                    self._sessions.pop(session_id)
+            self._sessions[result["sessionId"]] = session
+        self._update_session_events()
+        return result["sessionId"]
+
+    def reconnect(self, timeout=10):
+        """重新建立连接，原有会话全部失效，需调用会话调试器的`reconnect`重新附加"""
+        self._detach_all_sessions()
+        super(BrowserDebugger, self).reconnect(timeout)
+
+    def close(self):
+        """关闭调试器"""
+        self._detach_all_sessions()
+        super(BrowserDebugger, self).close()
+
+
+class SessionDebugger(RemoteDebugger):
+    """页面会话调试器，与其它页面共用`BrowserDebugger`的连接和工作线程
+
+    处理器看到的会话ID与独立连接时一致：页面自身的消息会话ID为空，子目标的消息为子会话ID
+    """
+
+    def __init__(self, browser, session_id, target_id):
+        # 不创建自己的WebSocket连接和线程，请求和通知消息都经由浏览器连接
+        self._browser = browser
+        self._session_id = session_id
+        self._target_id = target_id
+        self._detached = False
+        self._init_state("%s#%s" % (browser._ws_addr, session_id))
+        self._send_lock = browser._send_lock
+        self._waiters = browser._waiters
+        self._message_queue = browser._message_queue
+        self._stats = browser._stats
+        self._logger = browser.logger
+
+    @property
+    def session_id(self):
+        return self._session_id
+
+    @property
+    def target_id(self):
+        return self._target_id
+
+    @property
+    def browser(self):
+        return self._browser
+
+    @property
+    def connected(self):
+        """会话是否可用"""
+        return not self._detached and self._browser.connected
+
+    @property
+    def tracer(self):
+        return self._browser.tracer
+
+    @tracer.setter
+    def tracer(self, _tracer):
+        """所有会话的消息都经由浏览器连接收发，记录器设置在共用的连接上"""
+        self._browser.tracer = _tracer
+
+    def _post_request(self, method, session_id="", params=None):
+        if method != PING_METHOD:
+            self._last_active_time = time.time()
+        return self._browser._post_request(
+            method, session_id or self._session_id, params
+        )
+
+    def _wait_for_response(self, request, timeout=120):
+        if self._detached:
+            self._waiters.pop(request["id"], None)
+            raise ConnectionClosedError("Session %s is detached" % self._session_id)
+        return self._browser._wait_for_response(request, timeout)
+
+    def on_recv_notify_msg(self, method, params, session_id=""):
+        """接收到通知消息，页面自身的消息会话ID转换为空"""
+        if session_id == self._session_id:
+            session_id = ""
+        super(SessionDebugger, self).on_recv_notify_msg(method, params, session_id)
+
+    def _update_event_table(self):
+        super(SessionDebugger, self)._update_event_table()
+        self._browser._update_session_events()
+
+    def set_queue_limit(self, *args, **kwargs):
+        """通知队列由所有会话共用，见`BrowserDebugger.set_queue_limit`"""
+        self._browser.set_queue_limit(*args, **kwargs)
+
+    def get_queue_stats(self):
+        return self._browser.get_queue_stats()
+
+    def stats(self):
+        """获取共用连接的运行指标快照"""
+        return self._browser.stats()
+
+    def start_stats_reporter(self, *args, **kwargs):
+        return self._browser.start_stats_reporter(*args, **kwargs)
+
+    def on_detached(self):
+        """目标关闭或会话被分离"""
+        self._detached = True
+
+    def reconnect(self, timeout=10):
+        """重新附加到目标，并重新执行已注册处理器的`on_attached`"""
+        if not self._running:
+            raise ConnectionClosedError("Session %s is closed" % self._session_id)
+        if not self._browser.connected:
+            self._browser.reconnect(timeout)
+        self._session_id = self._browser._reattach_session(self)
+        self._detached = False
+        self._ws_addr = "%s#%s" % (self._browser._ws_addr, self._session_id)
+        self._reattach_handlers()
+
+    def close(self):
+        """分离会话，不关闭共用的连接"""
+        self._running = False
+        self._run_close_callbacks()
+        if self._detached:
+            return
+        self._detached = True
+        self._browser.detach_session(self)
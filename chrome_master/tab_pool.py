@@ -0,0 +1,189 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""预创建的空白页面池
+
+预先打开若干`about:blank`页面并完成附加、处理器注册和主上下文等待，
+需要新页面时直接取出，并在后台补充
+"""
+
+from __future__ import unicode_literals
+import collections
+import json
+import threading
+import time
+
+from . import util
+
+
+class TabPool(object):
+    """空白页面池
+    """
+
+    retry_interval = 1  # 创建页面失败后的首次重试间隔，之后每次失败翻倍，单位：秒
+    max_failures = 5  # 连续失败次数达到上限后暂停补充，直到下次`acquire`
+
+    def __init__(self, master, size=2, handlers=None, timeout=10):
+        """
+        :param master:   ChromeMaster对象
+        :type  master:   ChromeMaster
+        :param size:     预创建的页面数
+        :type  size:     int
+        :param handlers: 页面附加成功后注册的处理器类列表
+        :type  handlers: list
+        :param timeout:  准备单个页面的超时时间，单位：秒
+        :type  timeout:  float
+        """
+        self._master = master
+        self._size = size
+        self._handlers = handlers
+        self._timeout = timeout
+        self._cond = threading.Condition()
+        self._tabs = collections.deque()  # (页面, 调试器)
+        self._creating = 0
+        self._closed = False
+        self._failures = 0
+        self._refill_event = threading.Event()
+        self._thread = threading.Thread(target=self._refill_thread)
+        self._thread.setDaemon(True)
+        self._thread.start()
+        self._refill_event.set()
+
+    def __len__(self):
+        return len(self._tabs)
+
+    def _open_tab(self):
+        """通过`/json/new`接口打开空白页面"""
+        status, result = self._master._http_pool.request(
+            "PUT", "/json/new?about:blank"
+        )
+        if status != 200:
+            # 老版本Chrome只支持GET
+            status, result = self._master._http_pool.request(
+                "GET", "/json/new?about:blank"
+            )
+        if status != 200:
+            raise RuntimeError(
+                "Open new page failed: %d %s" % (status, util.general_encode(result))
+            )
+        return json.loads(util.general_encode(result))
+
+    def _close_tab(self, page):
+        try:
+            self._master._http_pool.request("GET", "/json/close/%s" % page["id"])
+        except Exception as e:
+            util.logger.warn(
+                "[%s] Close page %s failed: %s"
+                % (self.__class__.__name__, page["id"], e)
+            )
+
+    def _create_tab(self):
+        """打开空白页面并完成附加
+
+        :return: (页面, 调试器)
+        """
+        page = self._open_tab()
+        self._master._reserve_page(page)
+        try:
+            debugger = self._master._get_debugger(page, self._timeout, self._handlers)
+        except:
+            self._master._release_page(page["id"])
+            self._close_tab(page)
+            raise
+        return page, debugger
+
+    def _refill_thread(self):
+        while True:
+            self._refill_event.wait()
+            self._refill_event.clear()
+            while True:
+                with self._cond:
+                    if self._closed or len(self._tabs) + self._creating >= self._size:
+                        break
+                    self._creating += 1
+                tab = None
+                try:
+                    tab = self._create_tab()
+                    self._failures = 0
+                except Exception as e:
+                    self._failures += 1
+                    util.logger.warn(
+                        "[%s] Create page failed(%d): %s"
+                        % (self.__class__.__name__, self._failures, e)
+                    )
+                with self._cond:
+                    self._creating -= 1
+                    if tab and not self._closed:
+                        self._tabs.append(tab)
+                        self._cond.notify()
+                        tab = None
+                if tab:
+                    self._close_tab(tab[0])
+                if not self._failures:
+                    continue
+                if self._failures >= self.max_failures:
+                    # 暂停补充，`acquire`时再尝试，仍失败则继续暂停
+                    util.logger.warn(
+                        "[%s] Stop refilling until next acquire"
+                        % self.__class__.__name__
+                    )
+                    break
+                time.sleep(self.retry_interval * 2 ** (self._failures - 1))
+            if self._closed:
+                return
+
+    def acquire(self, url=None):
+        """取出页面，池中没有可用页面时立即创建
+
+        :param url: 打开页面后导航到的url
+        :type  url: string
+        :return: 页面的调试器
+        """
+        tab = None
+        broken_tabs = []
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Tab pool is closed")
+            while self._tabs:
+                page, debugger = self._tabs.popleft()
+                if debugger.connected:
+                    tab = page, debugger
+                    break
+                broken_tabs.append(page)
+        self._refill_event.set()
+        for page in broken_tabs:
+            util.logger.warn(
+                "[%s] Discard disconnected page %s"
+                % (self.__class__.__name__, page["id"])
+            )
+            self._master._release_page(page["id"])
+            self._close_tab(page)
+        if tab is None:
+            tab = self._create_tab()
+        page, debugger = tab
+        self._master._release_page(page["id"])
+        if url:
+            debugger.send_request("Page.navigate", url=url)
+        return debugger
+
+    def close(self):
+        """关闭池中的页面"""
+        with self._cond:
+            self._closed = True
+            tabs, self._tabs = list(self._tabs), collections.deque()
+        self._refill_event.set()
+        for page, debugger in tabs:
+            self._master._release_page(page["id"])
+            self._close_tab(page)
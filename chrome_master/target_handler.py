@@ -17,6 +17,7 @@
 
 from __future__ import unicode_literals
 import json
+import threading
 import time
 
 from .handler import DebuggerHandler
@@ -29,6 +30,11 @@ class TargetHandler(DebuggerHandler):
     """
 
     namespace = "Target"
+    events = {
+        "attachedToTarget": "on_attached_to_target",
+        "targetCreated": "on_target_created",
+        "targetInfoChanged": "on_target_info_changed",
+    }
 
     def on_attached(self):
         """
@@ -48,41 +54,44 @@ class TargetHandler(DebuggerHandler):
         else:
             self._enabled = True
 
-    def on_recv_notify_msg(self, method, params):
-        if method == "attachedToTarget":
-            self.logger.info(
-                "[%s] Target %s attached"
-                % (self.__class__.namespace, json.dumps(params))
+    def on_attached_to_target(self, params, session_id=""):
+        """附加到目标"""
+        self.logger.info(
+            "[%s] Target %s attached"
+            % (self.__class__.namespace, json.dumps(params))
+        )
+        if "sessionId" in params:
+            session_id = params["sessionId"]
+            self._session_map[params["targetInfo"]["targetId"]] = session_id
+            self.setAutoAttach(
+                autoAttach=True,
+                waitForDebuggerOnStart=False,
+                flatten=True,
+                sessionId=session_id,
             )
-            if "sessionId" in params:
-                session_id = params["sessionId"]
-                self._session_map[params["targetInfo"]["targetId"]] = session_id
-                self.setAutoAttach(
-                    autoAttach=True,
-                    waitForDebuggerOnStart=False,
-                    flatten=True,
-                    sessionId=session_id,
-                )
-                self.global_dispatch_event("on_new_session", session_id)
-
-        elif method == "targetCreated":
-            if "targetInfo" in params:
-                self.logger.info(
-                    "[%s] Target %s created"
-                    % (self.__class__.namespace, json.dumps(params["targetInfo"]))
-                )
-                if params["targetInfo"]["type"] == "page":
-                    target_id = params["targetInfo"]["targetId"]
-                    self._target_info[target_id] = params["targetInfo"]
-                    self.attach_to_target(target_id=target_id, flatten=True)
-        elif method == "targetInfoChanged":
+            self.global_dispatch_event("on_new_session", session_id)
+
+    def on_target_created(self, params, session_id=""):
+        """目标创建"""
+        if "targetInfo" in params:
             self.logger.info(
-                "[%s] Target info changed %s"
-                % (self.__class__.namespace, json.dumps(params))
+                "[%s] Target %s created"
+                % (self.__class__.namespace, json.dumps(params["targetInfo"]))
             )
-            if "targetInfo" in params and params["targetInfo"]["type"] == "page":
+            if params["targetInfo"]["type"] == "page":
                 target_id = params["targetInfo"]["targetId"]
                 self._target_info[target_id] = params["targetInfo"]
+                self.attach_to_target(target_id=target_id, flatten=True)
+
+    def on_target_info_changed(self, params, session_id=""):
+        """目标信息变化"""
+        self.logger.info(
+            "[%s] Target info changed %s"
+            % (self.__class__.namespace, json.dumps(params))
+        )
+        if "targetInfo" in params and params["targetInfo"]["type"] == "page":
+            target_id = params["targetInfo"]["targetId"]
+            self._target_info[target_id] = params["targetInfo"]
 
     def get_sessionid_list(self):
         return list(self._session_map.values())
@@ -111,3 +120,77 @@ class TargetHandler(DebuggerHandler):
                 time.sleep(0.5)
         else:
             return False
+
+
+class TargetWatchHandler(DebuggerHandler):
+    """
+    浏览器级别连接上的Target处理器，维护页面目标表，页面创建、变化或关闭时唤醒等待线程
+    """
+
+    namespace = "Target"
+    events = {
+        "targetCreated": "on_target_created",
+        "targetInfoChanged": "on_target_info_changed",
+        "targetDestroyed": "on_target_destroyed",
+    }
+
+    def on_attached(self):
+        """
+        附加到调试器成功回调
+        """
+        self._targets = {}
+        self._version = 0
+        self._cond = threading.Condition()
+        self.setDiscoverTargets(discover=True)
+
+    @property
+    def version(self):
+        """页面目标表的版本，每次变化加1"""
+        return self._version
+
+    def _update_target(self, target_info):
+        if target_info.get("type") != "page":
+            return
+        with self._cond:
+            self._targets[target_info["targetId"]] = target_info
+            self._version += 1
+            self._cond.notify_all()
+
+    def on_target_created(self, params, session_id=""):
+        """目标创建"""
+        self._update_target(params["targetInfo"])
+
+    def on_target_info_changed(self, params, session_id=""):
+        """目标信息变化"""
+        self._update_target(params["targetInfo"])
+
+    def on_target_destroyed(self, params, session_id=""):
+        """目标关闭"""
+        with self._cond:
+            if self._targets.pop(params["targetId"], None):
+                self._version += 1
+                self._cond.notify_all()
+
+    def get_targets(self):
+        """获取页面目标表
+
+        :return: {targetId: targetInfo}
+        """
+        with self._cond:
+            return dict(self._targets)
+
+    def wait_for_change(self, version, timeout):
+        """等待页面目标表变化
+
+        :param version: 上次获取的版本
+        :type  version: int
+        :return: 当前版本，超时未变化时与`version`相同
+        """
+        time0 = time.time()
+        with self._cond:
+            while self._version == version:
+                remaining = timeout - (time.time() - time0)
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._version
@@ -0,0 +1,210 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""协议流量记录
+
+将收发的每一帧连同方向、会话ID和单调时钟时间戳写入文件，用于离线分析：
+
+    tracer = ProtocolTracer('/tmp/cdp.jsonl')
+    debugger.tracer = tracer
+"""
+
+from __future__ import unicode_literals
+import base64
+import io
+import os
+import struct
+import threading
+import time
+
+from . import codec
+
+
+monotonic = getattr(time, "monotonic", time.time)
+
+
+class EnumTraceFormat(object):
+    """记录文件格式
+    """
+
+    JSONL = "jsonl"
+    BINARY = "binary"
+
+
+class EnumTraceDirection(object):
+    """帧方向
+    """
+
+    SEND = "send"
+    RECV = "recv"
+
+
+# 二进制格式：时间戳、方向、会话ID长度、帧长度，后接会话ID和帧数据
+_BINARY_HEADER = struct.Struct("<dBHI")
+_BINARY_DIRECTIONS = [EnumTraceDirection.SEND, EnumTraceDirection.RECV]
+
+
+class ProtocolTracer(object):
+    """协议流量记录器，文件大小超过`max_bytes`时滚动
+    """
+
+    def __init__(
+        self,
+        path,
+        format=EnumTraceFormat.JSONL,
+        max_bytes=64 * 1024 * 1024,
+        backup_count=5,
+    ):
+        """
+        :param path:         记录文件路径
+        :type  path:         string
+        :param format:       文件格式，见`EnumTraceFormat`
+        :type  format:       string
+        :param max_bytes:    单个文件的最大字节数，0表示不滚动
+        :type  max_bytes:    int
+        :param backup_count: 保留的历史文件数
+        :type  backup_count: int
+        """
+        if format not in (EnumTraceFormat.JSONL, EnumTraceFormat.BINARY):
+            raise ValueError("Unsupported trace format %s" % format)
+        self._path = path
+        self._format = format
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._lock = threading.Lock()
+        self._fp = None
+        self._size = 0
+        self._open()
+
+    @property
+    def path(self):
+        return self._path
+
+    def _open(self):
+        self._fp = io.open(self._path, "ab")
+        self._size = self._fp.tell()
+
+    def _rotate(self):
+        self._fp.close()
+        if self._backup_count > 0:
+            for i in range(self._backup_count - 1, 0, -1):
+                src = "%s.%d" % (self._path, i)
+                if os.path.exists(src):
+                    os.rename(src, "%s.%d" % (self._path, i + 1))
+            os.rename(self._path, self._path + ".1")
+        else:
+            os.remove(self._path)
+        self._open()
+
+    def _encode(self, timestamp, direction, session_id, data):
+        if self._format == EnumTraceFormat.BINARY:
+            session_id = session_id.encode("utf8")
+            return (
+                _BINARY_HEADER.pack(
+                    timestamp,
+                    _BINARY_DIRECTIONS.index(direction),
+                    len(session_id),
+                    len(data),
+                )
+                + session_id
+                + data
+            )
+        header = '{"t":%.6f,"d":"%s","s":"%s",' % (timestamp, direction, session_id)
+        if _is_json(data):
+            # 合法的JSON帧直接嵌入记录中，避免重新编码
+            return header.encode("utf8") + b'"m":' + data + b"}\n"
+        # 二进制帧或非JSON帧按base64编码嵌入
+        return header.encode("utf8") + b'"b":"' + base64.b64encode(data) + b'"}\n'
+
+    def record(self, direction, data, session_id=""):
+        """记录一帧数据
+
+        :param direction: 帧方向，见`EnumTraceDirection`
+        :type  direction: string
+        :param data:      帧数据
+        :type  data:      string
+        :param session_id: 会话ID
+        :type  session_id: string
+        """
+        timestamp = monotonic()
+        if not isinstance(data, bytes):
+            data = data.encode("utf8")
+        record = self._encode(timestamp, direction, session_id or "", data)
+        with self._lock:
+            if not self._fp:
+                return
+            if self._max_bytes and self._size + len(record) > self._max_bytes:
+                self._rotate()
+            self._fp.write(record)
+            self._size += len(record)
+
+    def flush(self):
+        with self._lock:
+            if self._fp:
+                self._fp.flush()
+
+    def close(self):
+        """关闭记录文件"""
+        with self._lock:
+            if self._fp:
+                self._fp.close()
+                self._fp = None
+
+
+def _is_json(data):
+    """帧数据是否是单个合法的JSON值"""
+    try:
+        codec.loads(data)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _load_frame(data):
+    """解码帧数据，非JSON帧返回原始的字节串"""
+    try:
+        return codec.loads(data)
+    except (ValueError, TypeError):
+        return data
+
+
+def read_trace(path, format=EnumTraceFormat.JSONL):
+    """读取记录文件
+
+    :return: 生成器，每项为(时间戳, 方向, 会话ID, 帧数据)，非JSON帧的数据为字节串
+    """
+    with io.open(path, "rb") as fp:
+        if format == EnumTraceFormat.BINARY:
+            while True:
+                header = fp.read(_BINARY_HEADER.size)
+                if len(header) < _BINARY_HEADER.size:
+                    break
+                timestamp, direction, session_len, data_len = _BINARY_HEADER.unpack(
+                    header
+                )
+                session_id = fp.read(session_len).decode("utf8")
+                data = _load_frame(fp.read(data_len))
+                yield timestamp, _BINARY_DIRECTIONS[direction], session_id, data
+        else:
+            for line in fp:
+                line = line.strip()
+                if not line:
+                    continue
+                record = codec.loads(line)
+                if "b" in record:
+                    data = base64.b64decode(record["b"])
+                else:
+                    data = record["m"]
+                yield record["t"], record["d"], record["s"], data
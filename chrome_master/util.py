@@ -19,10 +19,11 @@
 from __future__ import unicode_literals
 import logging
 import sys
+import threading
 
 
 logger = logging.getLogger('chrome_master')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(logging.INFO)  # 调试日志开销较大，需要时由使用方调低级别
 logger.addHandler(logging.StreamHandler(sys.stdout))
 fmt = logging.Formatter('%(asctime)s %(thread)d %(message)s')  # %(filename)s %(funcName)s
 logger.handlers[0].setFormatter(fmt)
@@ -98,10 +99,11 @@ class JavaScriptError(RuntimeError):
     '''执行JavaScript报错
     '''
 
-    def __init__(self, frame, err_msg):
+    def __init__(self, frame, err_msg, details=None):
         super(JavaScriptError, self).__init__(err_msg)
         self._frame = frame
         self._err_msg = err_msg
+        self._details = details or {}
 
     @property
     def frame(self):
@@ -113,6 +115,32 @@ class JavaScriptError(RuntimeError):
     def message(self):
         return self._err_msg
 
+    @property
+    def details(self):
+        '''协议返回的异常详情（ExceptionDetails），按值执行脚本时才有
+        '''
+        return self._details
+
+    @property
+    def name(self):
+        '''异常类型，如`TypeError`
+        '''
+        return self._details.get('exception', {}).get('className')
+
+    @property
+    def line_number(self):
+        return self._details.get('lineNumber')
+
+    @property
+    def column_number(self):
+        return self._details.get('columnNumber')
+
+    @property
+    def stack_trace(self):
+        '''调用栈，每项包含`functionName`、`url`、`lineNumber`和`columnNumber`
+        '''
+        return self._details.get('stackTrace', {}).get('callFrames', [])
+
     def __str__(self):
         return '[%s] %s' % (self.frame, self._err_msg)
 
@@ -162,3 +190,46 @@ def hook_WebSocket_connect(sock):
         return result
 
     websocket.WebSocket.connect = new_connect
+
+
+def run_in_parallel(func, args_list, max_workers=8, return_exceptions=False):
+    '''使用多个线程并行执行函数
+
+    :param func:      执行的函数，以`args_list`中的每一项为参数调用
+    :param args_list: 参数列表
+    :param max_workers: 最大并行数
+    :param return_exceptions: 是否在结果中返回异常，为False时抛出第一个异常
+    :return: 与参数顺序一致的结果列表
+    '''
+    args_list = list(args_list)
+    results = [None] * len(args_list)
+    errors = [None] * len(args_list)
+    indexes = iter(range(len(args_list)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+            try:
+                results[index] = func(args_list[index])
+            except Exception as e:
+                errors[index] = e
+
+    threads = []
+    for _ in range(min(max_workers, len(args_list)) - 1):
+        t = threading.Thread(target=worker)
+        t.setDaemon(True)
+        t.start()
+        threads.append(t)
+    worker()  # 当前线程也参与执行
+    for t in threads:
+        t.join()
+    for index, error in enumerate(errors):
+        if error is not None:
+            if not return_exceptions:
+                raise error
+            results[index] = error
+    return results
@@ -42,5 +42,5 @@ if __name__ == "__main__":
         author="Tencent",
         license="Copyright(c)2010-2022 Tencent All Rights Reserved. ",
         install_requires=parse_requirements(),
-        extras_require={'dom': ['py-dom-xpath-six']},
+        extras_require={'dom': ['py-dom-xpath-six'], 'async': ['websockets']},
     )
@@ -0,0 +1,122 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""async_debugger模块单元测试
+
+不使用async语法，以便在python2中导入本模块时不报语法错误
+"""
+
+try:
+    from unittest import mock
+except:
+    import mock
+import json
+import random
+import sys
+import unittest
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+import chrome_master
+
+try:
+    from test import test_chrome_master
+except ImportError:
+    import test_chrome_master
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "asyncio requires python 3.5")
+@unittest.skipIf(websockets is None, "websockets not installed")
+class TestAsyncChromeMaster(unittest.TestCase):
+    """AsyncChromeMaster类测试用例
+    """
+
+    def _create_mock_server_in_thread(self, port):
+        test_chrome_master.TestChromeMaster._create_mock_server_in_thread(self, port)
+
+    def _create_mock_http_server(self, port):
+        test_chrome_master.TestChromeMaster._create_mock_http_server(self, port)
+
+    def _create_mock_websocket_server(self, port):
+        test_chrome_master.TestChromeMaster._create_mock_websocket_server(self, port)
+
+    def test_find_page(self):
+        import asyncio
+
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.AsyncChromeMaster(("127.0.0.1", port))
+        loop = asyncio.new_event_loop()
+        try:
+            debugger = loop.run_until_complete(
+                client.find_page("测试", "http://www.qq.com/")
+            )
+            self.assertEqual(
+                debugger._ws_addr,
+                "ws://localhost:%(server_port)d/devtools/page/2"
+                % {"server_port": port + 1},
+            )
+            result = loop.run_until_complete(
+                debugger.runtime.eval_script(None, "document.body.innerText")
+            )
+            self.assertEqual(result, "mock server body")
+            results = loop.run_until_complete(
+                debugger.send_requests(["Page.enable", "Log.enable"])
+            )
+            self.assertEqual(results, [{}, {}])
+            loop.run_until_complete(debugger.close())
+        finally:
+            loop.close()
+
+    def test_get_page_list(self):
+        import asyncio
+
+        port = random.randint(10000, 60000)
+        client = chrome_master.AsyncChromeMaster(("127.0.0.1", port))
+        # 不创建同步控制端的连接池和后台线程
+        self.assertFalse(hasattr(client, "_http_pool"))
+        self.assertFalse(hasattr(client, "_debugger_pool"))
+        pages = [
+            {"id": "1", "title": "测试", "url": "http://www.qq.com/"},
+            {"id": "2", "title": "about:blank", "url": "about:blank"},
+        ]
+        for page in pages:
+            page.update(
+                type="page",
+                description="",
+                webSocketDebuggerUrl="ws://localhost:%d/devtools/page/%s"
+                % (port + 1, page["id"]),
+            )
+        loop = asyncio.new_event_loop()
+        try:
+            for ignore_blank_page, page_ids in [(True, ["1"]), (False, ["1", "2"])]:
+                result = loop.create_future()
+                result.set_result(json.dumps(pages).encode("utf8"))
+                with mock.patch.object(
+                    client, "_request_page_list_async", lambda: result
+                ):
+                    page_list = loop.run_until_complete(
+                        client.get_page_list(ignore_blank_page)
+                    )
+                self.assertEqual([it["id"] for it in page_list], page_ids)
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,7 +25,9 @@ try:
 except:
     import mock
 import json
+import logging
 import random
+import subprocess
 import threading
 import time
 import unittest
@@ -76,9 +78,69 @@ class ChromeDevToolHTTPRequestHandler(httpserver.BaseHTTPRequestHandler):
             self.send_header("Content-Length", len(content))
             self.end_headers()
             self.wfile.write(content)
+        elif self.path == "/json/version":
+            content = json.dumps(
+                {
+                    "Browser": "HeadlessChrome/99.0.4844.51",
+                    "Protocol-Version": "1.3",
+                    "webSocketDebuggerUrl": "ws://localhost:%d/devtools/browser/1"
+                    % server_port,
+                }
+            ).encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", len(content))
+            self.end_headers()
+            self.wfile.write(content)
+        elif self.path == "/json/new?about:blank":
+            self.server.new_page_count = getattr(self.server, "new_page_count", 0) + 1
+            page_id = "new-%d" % self.server.new_page_count
+            content = json.dumps(
+                {
+                    "description": "",
+                    "id": page_id,
+                    "title": "about:blank",
+                    "type": "page",
+                    "url": "about:blank",
+                    "webSocketDebuggerUrl": "ws://localhost:%d/devtools/page/%s"
+                    % (server_port, page_id),
+                }
+            ).encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", len(content))
+            self.end_headers()
+            self.wfile.write(content)
         else:
             self.send_response(404)
 
+    do_PUT = do_GET
+
+
+MOCK_EVAL_VALUES = {
+    "1 + 1": {"result": {"type": "number", "value": 2}},
+    "({a: [1, 'b']})": {"result": {"type": "object", "value": {"a": [1, "b"]}}},
+    "-Infinity": {"result": {"type": "number", "unserializableValue": "-Infinity"}},
+    "2n ** 64n": {
+        "result": {"type": "bigint", "unserializableValue": "18446744073709551616n"}
+    },
+    "undefined": {"result": {"type": "undefined"}},
+    "null.x": {
+        "result": {"type": "object", "subtype": "error"},
+        "exceptionDetails": {
+            "text": "Uncaught",
+            "lineNumber": 0,
+            "columnNumber": 5,
+            "exception": {
+                "type": "object",
+                "subtype": "error",
+                "className": "TypeError",
+                "description": "TypeError: Cannot read properties of null",
+            },
+        },
+    },
+}
+
 
 class ChromeDevToolWebSocket(WebSocket):
     """mock websocket server
@@ -98,10 +160,63 @@ class ChromeDevToolWebSocket(WebSocket):
             "Target.setDiscoverTargets",
             "Log.enable",
             "Log.startViolationsReport",
+            "Target.detachFromTarget",
         ):
             response["result"] = {}
+        elif method == "Target.attachToTarget":
+            response["result"] = {"sessionId": "session-%s" % params["targetId"]}
         elif method == "Page.getResourceTree":
             response["result"] = {"frameTree": {"frame": {"id": 12345}}}
+        elif method == "Runtime.callFunctionOn" and "scripts.map" in params[
+            "functionDeclaration"
+        ]:
+            items = []
+            for script in params["arguments"][0]["value"]:
+                result = MOCK_EVAL_VALUES.get(script, {})
+                if "exceptionDetails" in result:
+                    exception = result["exceptionDetails"]["exception"]
+                    error = {
+                        "name": exception["className"],
+                        "message": exception["description"],
+                        "stack": None,
+                    }
+                    items.append({"success": False, "error": error})
+                else:
+                    value = result.get("result", {}).get("value")
+                    items.append({"success": True, "value": value})
+            response["result"] = {"result": {"type": "object", "value": items}}
+        elif method == "Runtime.callFunctionOn":
+            response["result"] = {
+                "result": {
+                    "type": "object",
+                    "value": {
+                        "function": params["functionDeclaration"],
+                        "arguments": params["arguments"],
+                    },
+                }
+            }
+        elif method == "Page.addScriptToEvaluateOnNewDocument":
+            response["result"] = {"identifier": "1"}
+        elif method == "Runtime.compileScript":
+            if params["expression"] not in MOCK_EVAL_VALUES:
+                response["result"] = {
+                    "exceptionDetails": {
+                        "text": "Uncaught SyntaxError: Unexpected end of input"
+                    }
+                }
+            else:
+                response["result"] = {"scriptId": params["expression"]}
+        elif method == "Runtime.runScript":
+            response["result"] = MOCK_EVAL_VALUES[params["scriptId"]]
+        elif method == "Runtime.evaluate" and params.get("returnByValue"):
+            result = MOCK_EVAL_VALUES.get(params["expression"])
+            if result is None:
+                response["error"] = {
+                    "code": -32000,
+                    "message": "Object couldn't be returned by value",
+                }
+            else:
+                response["result"] = result
         elif method == "Runtime.evaluate":
             script = params["expression"]
             value = ""
@@ -121,13 +236,18 @@ class ChromeDevToolWebSocket(WebSocket):
                 },
             }
         else:
-            raise NotImplementedError(method)
+            response["error"] = {
+                "code": -32601,
+                "message": "'%s' wasn't found" % method,
+            }
         self.sendMessage(json.dumps(response))
         if method == "Runtime.enable":
             message = {
                 "method": "Runtime.executionContextCreated",
                 "params": {"context": {"id": 12345, "frameId": 12345}},
             }
+            if "sessionId" in request:
+                message["sessionId"] = request["sessionId"]
             self.sendMessage(json.dumps(message))
 
 
@@ -160,8 +280,22 @@ class TestChromeMaster(unittest.TestCase):
         port = random.randint(10000, 60000)
         self._create_mock_server_in_thread(port)
         client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        client.page_list_ttl = 60
         result = client.get_page_list()
         self.assertTrue(len(result) > 0)
+        # 缓存期内不重复请求
+        with mock.patch.object(
+            client._http_pool, "request", side_effect=RuntimeError
+        ):
+            self.assertEqual(len(client.get_page_list()), len(result))
+
+        page_info = {}
+        added, removed, changed = client._diff_page_list(page_info, result)
+        self.assertEqual(len(added), len(result))
+        result[0]["title"] = "changed"
+        added, removed, changed = client._diff_page_list(page_info, result[:-1])
+        self.assertEqual((added, removed), ([], [result[-1]["id"]]))
+        self.assertEqual(changed, [result[0]["id"]])
 
     def test_find_page(self):
         port = random.randint(10000, 60000)
@@ -174,6 +308,263 @@ class TestChromeMaster(unittest.TestCase):
             % {"server_port": port + 1},
         )
 
+    def test_attach_all(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        pages = client.get_page_list()
+        debuggers = client.attach_all(
+            pages, [chrome_master.LogHandler, chrome_master.NetworkHandler], 2
+        )
+        self.assertEqual(len(debuggers), len(pages))
+        for page, debugger in zip(pages, debuggers):
+            self.assertTrue(debugger._ws_addr.endswith("/" + page["id"]))
+            self.assertIsNotNone(debugger.network)
+            self.assertIsNotNone(debugger.target)
+        # 已附加的页面直接返回调试器
+        self.assertEqual(client.attach_all(pages), debuggers)
+
+    def test_browser_retry(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        with mock.patch.object(
+            client._http_pool, "request", side_effect=RuntimeError("timeout")
+        ) as request:
+            self.assertIsNone(client._get_browser_debugger())
+            # 退避期间不再重试
+            self.assertIsNone(client._get_browser_debugger())
+            self.assertEqual(request.call_count, 1)
+        client._browser_retry_time = 0
+        self.assertIsNotNone(client._get_browser_debugger())
+        self.assertEqual(client._browser_failures, 0)
+
+    def test_flat_sessions(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        client.use_flat_sessions = True
+        debuggers = client.attach_all(client.get_page_list())
+        browser = client._get_browser_debugger()
+        self.assertEqual(len(browser.get_sessions()), len(debuggers))
+        for debugger in debuggers:
+            self.assertIsInstance(debugger, chrome_master.SessionDebugger)
+            self.assertIs(debugger.browser, browser)
+            self.assertEqual(debugger.runtime.get_main_context_id(), 12345)
+        result = debuggers[0].send_request(
+            "Runtime.evaluate", expression="document.title || location.href"
+        )
+        self.assertEqual(result, {"result": {"value": "Smock server"}})
+        session = debuggers[0]
+        self.assertIs(session._message_queue, browser._message_queue)
+        self.assertIs(session._stats, browser._stats)
+        self.assertEqual(session._reporters, [])
+        self.assertTrue(session._running)
+        tracer = object()
+        session.tracer = tracer
+        self.assertIs(browser.tracer, tracer)
+        session.tracer = None
+        debuggers[0].close()
+        self.assertFalse(debuggers[0].connected)
+        self.assertEqual(len(browser.get_sessions()), len(debuggers) - 1)
+
+    def test_reconnect(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        last_active_time = debugger.last_active_time
+        self.assertTrue(debugger.ping())
+        self.assertEqual(debugger.last_active_time, last_active_time)
+        debugger._last_active_time = 0
+        debugger.on_recv_notify_msg("Page.loadEventFired", {})
+        self.assertGreater(debugger.last_active_time, 0)
+        # 默认不回收调用方可能仍持有的调试器
+        self.assertIsNone(client.debugger_pool._max_size)
+        self.assertIsNone(client.debugger_pool._idle_timeout)
+        debugger.reconnect()
+        self.assertTrue(debugger.ping())
+        self.assertEqual(debugger.runtime.get_main_context_id(), 12345)
+        page = [it for it in client.get_page_list() if it["id"] == "2"][0]
+        self.assertIs(client._get_debugger(page), debugger)
+        # 关闭后不能重连，并从调试器池中移除
+        debugger.close()
+        self.assertTrue(debugger.closed)
+        self.assertRaises(chrome_master.util.ConnectionClosedError, debugger.reconnect)
+        self.assertNotIn("2", client.debugger_pool._entries)
+
+    def test_new_page(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.new_page()
+        self.assertIn("/devtools/page/new-", debugger._ws_addr)
+        self.assertIsNotNone(debugger.page)
+        self.assertEqual(debugger.runtime.get_main_context_id(), 12345)
+        # 后台补充空白页面，补充后可直接取出
+        time0 = time.time()
+        while len(client.tab_pool) < client.tab_pool_size and time.time() - time0 < 10:
+            time.sleep(0.1)
+        self.assertEqual(len(client.tab_pool), client.tab_pool_size)
+        # 预创建的页面不会被查找到
+        page_list = [
+            {
+                "id": it,
+                "title": "about:blank",
+                "url": "about:blank",
+                "webSocketDebuggerUrl": "ws://localhost/devtools/page/" + it,
+            }
+            for it in client._reserved_pages
+        ]
+        self.assertEqual(len(page_list), client.tab_pool_size)
+        self.assertEqual(client._filter_pages(page_list, None, "about:blank"), [])
+        time0 = time.time()
+        self.assertIsNot(client.new_page(), debugger)
+        self.assertTrue(time.time() - time0 < 0.5)
+        client.tab_pool.close()
+
+    def test_cluster(self):
+        ports = [random.randint(10000, 60000) for _ in range(2)]
+        for port in ports:
+            self._create_mock_server_in_thread(port)
+        bad_addr = ("127.0.0.1", 1)
+        cluster = chrome_master.ChromeCluster(
+            [("127.0.0.1", port) for port in ports] + [bad_addr],
+            max_failures=1,
+            check_interval=0,
+        )
+        stats = cluster.stats()
+        self.assertTrue(stats["127.0.0.1:1"]["drained"])
+        self.assertEqual(stats["127.0.0.1:%d" % ports[0]]["tab_count"], 2)
+
+        debuggers = [cluster.new_page() for _ in range(2)]
+        ws_ports = set(
+            int(it._ws_addr.split(":")[2].split("/")[0]) for it in debuggers
+        )
+        self.assertEqual(ws_ports, set(port + 1 for port in ports))
+
+        cluster.drain(("127.0.0.1", ports[0]))
+        debugger = cluster.find_page("测试", "http://www.baidu.com/", timeout=1)
+        self.assertIn(":%d/" % (ports[1] + 1), debugger._ws_addr)
+        # 手动摘除的调试端口不会因探测成功而恢复
+        cluster.refresh()
+        stats = cluster.stats()["127.0.0.1:%d" % ports[0]]
+        self.assertTrue(stats["manually_drained"])
+        self.assertEqual(len(cluster._get_live_endpoints()), 1)
+        cluster.drain(("127.0.0.1", ports[0]), False)
+        self.assertEqual(len(cluster._get_live_endpoints()), 2)
+        for port in ports:
+            chrome_master.ChromeMaster(("127.0.0.1", port)).tab_pool.close()
+        cluster.close()
+
+    def test_reactor(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        reactor = chrome_master.Reactor(worker_count=2)
+        client.reactor = reactor
+        client.use_target_events = False
+        pages = client.get_page_list()
+        debugger = client.attach_all(pages[:1])[0]
+        thread_count = threading.active_count()
+        debuggers = client.attach_all(pages[1:])
+        self.assertEqual(threading.active_count(), thread_count)
+        self.assertEqual(len(reactor), len(pages))
+        for it in [debugger] + debuggers:
+            self.assertEqual(it.runtime.get_main_context_id(), 12345)
+            result = it.send_request(
+                "Runtime.evaluate", expression="document.title || location.href"
+            )
+            self.assertEqual(result, {"result": {"value": "Smock server"}})
+        debugger.close()
+        self.assertEqual(len(reactor), len(pages) - 1)
+        debuggers[0].reconnect()
+        self.assertTrue(debuggers[0].ping())
+        self.assertEqual(len(reactor), len(pages) - 1)
+        reactor.close()
+
+    def test_target_events(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        watcher = client._get_target_watcher()
+        self.assertIsNotNone(watcher)
+        version = watcher.version
+        target_info = {
+            "targetId": "4",
+            "type": "page",
+            "title": "new page",
+            "url": "about:blank",
+        }
+
+        def create_target():
+            time.sleep(0.1)
+            client._browser_debugger.on_message(
+                json.dumps(
+                    {
+                        "method": "Target.targetCreated",
+                        "params": {"targetInfo": target_info},
+                    }
+                )
+            )
+
+        t = threading.Thread(target=create_target)
+        t.start()
+        time0 = time.time()
+        self.assertNotEqual(watcher.wait_for_change(version, 5), version)
+        self.assertTrue(time.time() - time0 < 2)
+        t.join()
+        self.assertEqual(watcher.get_targets(), {"4": target_info})
+
+    def test_event_table(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        self.assertTrue(debugger.is_event_consumed("Page.frameNavigated"))
+        self.assertTrue(debugger.is_event_consumed("Network.responseReceived"))
+        self.assertFalse(debugger.is_event_consumed("Network.dataReceived"))
+        self.assertFalse(debugger.is_event_consumed("DOM.attributeModified"))
+
+        # 重写了`on_recv_notify_msg`的处理器接收命名空间下的所有事件
+        received = []
+
+        class MyLogHandler(chrome_master.LogHandler):
+            def on_recv_notify_msg(self, method, params):
+                received.append(method)
+
+        self.assertFalse(chrome_master.LogHandler.is_notify_overridden())
+        self.assertTrue(MyLogHandler.is_notify_overridden())
+        debugger.unregister_handler(chrome_master.LogHandler)
+        debugger.register_handler(MyLogHandler)
+        self.assertTrue(debugger.is_event_consumed("Log.entryAdded"))
+        debugger.on_recv_notify_msg("Log.entryAdded", {"entry": {}})
+        self.assertEqual(received, ["entryAdded"])
+
+    def test_blocked_child_session(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        unblock = threading.Event()
+        done = threading.Event()
+
+        def on_recv_notify_msg(method, params, session_id=""):
+            if session_id:
+                unblock.wait(5)
+            else:
+                done.set()
+
+        debugger.on_recv_notify_msg = on_recv_notify_msg
+        message = {"method": "Log.entryAdded", "params": {"entry": {}}}
+        debugger.on_message(json.dumps(dict(message, sessionId="child")))
+        debugger.on_message(json.dumps(message))
+        # 子会话的处理器阻塞时，页面自身的消息仍能被处理
+        try:
+            self.assertTrue(done.wait(2))
+        finally:
+            unblock.set()
+
     def test_multi_pages(self):
         port = random.randint(10000, 60000)
         self._create_mock_server_in_thread(port)
@@ -185,3 +576,238 @@ class TestChromeMaster(unittest.TestCase):
             % {"server_port": port + 1},
         )
         self.assertRaises(RuntimeError, client.find_page, "测试", last=False)
+
+    def test_debug_log(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        logger = chrome_master.util.logger
+        # 默认不输出调试日志，收发消息时不格式化调试日志
+        self.assertFalse(logger.isEnabledFor(logging.DEBUG))
+        with mock.patch.object(logger, "debug") as debug:
+            debugger.send_request("Page.enable")
+            self.assertFalse(debug.called)
+            logger.setLevel(logging.DEBUG)
+            try:
+                debugger.send_request("Page.enable")
+            finally:
+                logger.setLevel(logging.INFO)
+            self.assertTrue(debug.called)
+
+    def test_send_requests(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        requests = [
+            ("Runtime.evaluate", {"expression": "document.title || location.href"}),
+            ("Runtime.evaluate", {"expression": "document.body.innerText"}),
+            "Page.enable",
+        ]
+        results = debugger.send_requests(requests)
+        self.assertEqual(
+            results,
+            [
+                {"result": {"value": "Smock server"}},
+                {"result": {"value": "Smock server body"}},
+                {},
+            ],
+        )
+        results = debugger.send_requests(
+            ["Page.enable", "Page.notExist"], return_exceptions=True
+        )
+        self.assertEqual(results[0], {})
+        self.assertIsInstance(results[1], chrome_master.util.MethodNotFoundError)
+        stats = debugger.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["requests"]["Runtime.evaluate"]["latency"]["count"], 2)
+        self.assertEqual(stats["requests"]["Page.notExist"]["errors"], 1)
+
+    def test_eval_value(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        runtime = debugger.runtime
+        self.assertEqual(runtime.eval_value(None, "1 + 1"), 2)
+        self.assertEqual(runtime.eval_value(None, "({a: [1, 'b']})"), {"a": [1, "b"]})
+        self.assertEqual(runtime.eval_value(None, "-Infinity"), float("-inf"))
+        self.assertEqual(runtime.eval_value(None, "2n ** 64n"), 2 ** 64)
+        self.assertIsNone(runtime.eval_value(None, "undefined"))
+        with self.assertRaises(chrome_master.util.JavaScriptError) as cm:
+            runtime.eval_value(None, "null.x")
+        self.assertEqual(cm.exception.frame, 12345)
+        self.assertEqual(cm.exception.name, "TypeError")
+        self.assertEqual(cm.exception.column_number, 5)
+        self.assertIn("Cannot read properties of null", cm.exception.message)
+        with self.assertRaises(chrome_master.util.JavaScriptError) as cm:
+            runtime.eval_value(None, "document.body")
+        self.assertIn("returned by value", cm.exception.message)
+
+    def test_run_script(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        runtime = debugger.runtime
+
+        def compile_count():
+            stats = debugger.stats()["requests"].get("Runtime.compileScript")
+            return stats["latency"]["count"] if stats else 0
+
+        for _ in range(3):
+            result = runtime.run_script(None, "({a: [1, 'b']})")
+            self.assertEqual(result, {"a": [1, "b"]})
+        self.assertEqual(compile_count(), 1)
+        with self.assertRaises(chrome_master.util.JavaScriptError) as cm:
+            runtime.run_script(None, "null.x")
+        self.assertEqual(cm.exception.name, "TypeError")
+        with self.assertRaises(chrome_master.util.JavaScriptError) as cm:
+            runtime.run_script(None, "1 +")
+        self.assertIn("SyntaxError", cm.exception.message)
+        self.assertEqual(compile_count(), 3)
+
+        # 执行上下文销毁后重新编译
+        runtime.on_execution_context_destroyed({"executionContextId": 12345})
+        runtime.on_execution_context_created(
+            {"context": {"id": 12345, "frameId": 12345}}
+        )
+        self.assertEqual(runtime.run_script(None, "1 + 1"), 2)
+        self.assertEqual(runtime.run_script(None, "({a: [1, 'b']})"), {"a": [1, "b"]})
+        self.assertEqual(compile_count(), 5)
+
+    def test_call_function(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        runtime = debugger.runtime
+
+        def request_count(method):
+            stats = debugger.stats()["requests"].get(method)
+            return stats["latency"]["count"] if stats else 0
+
+        function_decl = "function(a, b, c) { return [a, b, c]; }"
+        result = runtime.call_function(
+            None, function_decl, 1, {"text": 'a"b\\c\n'}, float("nan")
+        )
+        self.assertEqual(result["function"], function_decl)
+        self.assertEqual(
+            result["arguments"],
+            [
+                {"value": 1},
+                {"value": {"text": 'a"b\\c\n'}},
+                {"unserializableValue": "NaN"},
+            ],
+        )
+
+        with self.assertRaises(ValueError):
+            runtime.call_helper(None, "sum", 1, 2)
+        runtime.install_helpers({"sum": "function(a, b) { return a + b; }"})
+        self.assertEqual(request_count("Page.addScriptToEvaluateOnNewDocument"), 1)
+        evaluate_count = request_count("Runtime.evaluate")
+        for _ in range(2):
+            result = runtime.call_helper(None, "sum", 1, 2)
+            self.assertEqual(
+                result["arguments"], [{"value": "sum"}, {"value": 1}, {"value": 2}]
+            )
+        # 已存在的上下文只注入一次
+        self.assertEqual(request_count("Runtime.evaluate"), evaluate_count + 1)
+
+        # 新文档创建时已执行函数库，无需注入
+        runtime.on_execution_context_destroyed({"executionContextId": 12345})
+        runtime.on_execution_context_created(
+            {"context": {"id": 12345, "frameId": 12345}}
+        )
+        evaluate_count = request_count("Runtime.evaluate")
+        runtime.call_helper(None, "sum", 3, 4)
+        self.assertEqual(request_count("Runtime.evaluate"), evaluate_count)
+
+    def test_wait_for_context(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        runtime = debugger.runtime
+        self.assertEqual(runtime.wait_for_context(), 12345)
+        runtime.on_execution_context_created(
+            {
+                "context": {
+                    "id": 2,
+                    "name": "isolated",
+                    "auxData": {"frameId": 12345, "isDefault": False},
+                }
+            }
+        )
+        self.assertEqual(runtime.get_main_context_id(), 12345)
+        self.assertEqual(runtime._get_context_id(12345, "isolated"), 2)
+
+        # 执行上下文销毁后，新的上下文创建时立即继续执行
+        runtime.on_execution_context_destroyed({"executionContextId": 12345})
+        self.assertIsNone(runtime.wait_for_context(timeout=0.1))
+
+        def create_context():
+            time.sleep(0.2)
+            runtime.on_execution_context_created(
+                {"context": {"id": 12345, "frameId": 12345}}
+            )
+
+        t = threading.Thread(target=create_context)
+        t.start()
+        time0 = time.time()
+        self.assertEqual(runtime.eval_value(None, "1 + 1"), 2)
+        self.assertLess(time.time() - time0, 2)
+        t.join()
+
+        runtime.on_execution_contexts_cleared({})
+        self.assertIsNone(runtime.get_main_context_id())
+
+    def test_eval_many(self):
+        port = random.randint(10000, 60000)
+        self._create_mock_server_in_thread(port)
+        client = chrome_master.ChromeMaster(("127.0.0.1", port))
+        debugger = client.find_page("测试", "http://www.qq.com/")
+        results = debugger.runtime.eval_many(
+            None, ["1 + 1", "null.x", "({a: [1, 'b']})"]
+        )
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], {"success": True, "value": 2, "error": None})
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["error"].name, "TypeError")
+        self.assertEqual(results[1]["error"].frame, 12345)
+        self.assertIn("Cannot read properties of null", results[1]["error"].message)
+        self.assertEqual(results[2]["value"], {"a": [1, "b"]})
+        stats = debugger.stats()["requests"]["Runtime.callFunctionOn"]
+        self.assertEqual(stats["latency"]["count"], 1)
+
+    def test_eval_many_function(self):
+        from chrome_master.runtime_handler import EVAL_MANY_FUNCTION
+
+        scripts = [
+            "1 + 1",
+            "var a = {}; a.self = a; a",
+            "10n",
+            "({b: 'c'})",
+            "new Promise(function() {})",
+            "Promise.resolve(3)",
+        ]
+        code = "(%s)(%s, 0.2).then(function(r) { console.log(JSON.stringify(r)); })" % (
+            EVAL_MANY_FUNCTION,
+            json.dumps(scripts),
+        )
+        try:
+            output = subprocess.check_output(["node", "-e", code])
+        except OSError:
+            self.skipTest("node is not installed")
+        results = json.loads(output.decode("utf8"))
+        # 不可序列化的值只导致该项失败
+        self.assertEqual(results[0], {"success": True, "value": 2})
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["error"]["name"], "TypeError")
+        self.assertFalse(results[2]["success"])
+        self.assertEqual(results[3], {"success": True, "value": {"b": "c"}})
+        # 未完成的Promise只导致该项超时
+        self.assertFalse(results[4]["success"])
+        self.assertEqual(results[4]["error"]["name"], "TimeoutError")
+        self.assertEqual(results[5], {"success": True, "value": 3})
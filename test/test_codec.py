@@ -0,0 +1,45 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""codec模块单元测试
+"""
+
+import unittest
+
+from chrome_master import codec
+
+
+class TestCodec(unittest.TestCase):
+    """codec模块测试用例
+    """
+
+    def test_peek_message(self):
+        self.assertEqual(codec.peek_message('{"id":12,"result":{}}'), (12, None))
+        self.assertEqual(
+            codec.peek_message('{"method":"DOM.attributeModified","params":{}}'),
+            (None, "DOM.attributeModified"),
+        )
+        self.assertEqual(codec.peek_message('{"result":{},"id":12}'), (None, None))
+
+    def test_set_codec(self):
+        name = codec.get_codec()
+        try:
+            codec.set_codec("json")
+            self.assertEqual(codec.get_codec(), "json")
+            data = {"id": 1, "method": "Runtime.evaluate", "params": {"expression": "测试"}}
+            self.assertEqual(codec.loads(codec.dumps(data)), data)
+            self.assertRaises(ValueError, codec.set_codec, "unknown")
+        finally:
+            codec.set_codec(name)
@@ -0,0 +1,73 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""context_index模块单元测试
+"""
+
+import threading
+import time
+import unittest
+
+from chrome_master.context_index import ContextIndex
+
+
+class TestContextIndex(unittest.TestCase):
+    """ContextIndex类测试用例
+    """
+
+    def test_index(self):
+        index = ContextIndex()
+        index.add("frame1", 1)
+        index.add("frame1", 2, world_name="isolated")
+        index.add("frame2", 1, "session1")
+        self.assertEqual(index.get_context("frame1"), ("", 1))
+        self.assertEqual(index.get_context("frame1", "isolated"), ("", 2))
+        self.assertEqual(index.get_context("frame2"), ("session1", 1))
+        self.assertEqual(index.get_frame(1), "frame1")
+        self.assertEqual(index.get_frame(2), "frame1")
+        self.assertEqual(index.get_frame(1, "session1"), "frame2")
+        self.assertEqual(len(index), 3)
+
+        # 导航后新的上下文替换旧的上下文
+        index.add("frame1", 3)
+        self.assertEqual(index.get_context("frame1"), ("", 3))
+        self.assertIsNone(index.get_frame(1))
+        self.assertIsNone(index.remove(1))
+        self.assertEqual(index.remove(3), "frame1")
+        self.assertIsNone(index.get_context("frame1"))
+        self.assertEqual(index.get_context("frame1", "isolated"), ("", 2))
+
+        self.assertEqual(index.clear("session1"), [("session1", 1)])
+        self.assertIsNone(index.get_context("frame2"))
+        self.assertEqual(len(index), 1)
+
+    def test_wait_for_context(self):
+        index = ContextIndex()
+        self.assertIsNone(index.wait_for_context("frame1", 0.1))
+
+        def add_context():
+            time.sleep(0.1)
+            index.add("frame1", 1)
+
+        t = threading.Thread(target=add_context)
+        t.start()
+        time0 = time.time()
+        self.assertEqual(index.wait_for_context("frame1", 5), ("", 1))
+        self.assertLess(time.time() - time0, 1)
+        t.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""debugger_pool模块单元测试
+"""
+
+import time
+import unittest
+
+from chrome_master.debugger_pool import DebuggerPool
+
+
+class FakeDebugger(object):
+    def __init__(self, healthy=True, reconnectable=True, delay=0):
+        self.healthy = healthy
+        self.delay = delay
+        self.reconnectable = reconnectable
+        self.last_active_time = time.time()
+        self.closed = False
+        self.reconnected = False
+
+    def ping(self):
+        time.sleep(self.delay)
+        return self.healthy
+
+    def reconnect(self):
+        if not self.reconnectable:
+            raise RuntimeError("connect failed")
+        self.reconnected = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestDebuggerPool(unittest.TestCase):
+    """DebuggerPool类测试用例
+    """
+
+    def test_lru(self):
+        evicted = []
+        pool = DebuggerPool(
+            max_size=2, on_evict=lambda page_id, debugger: evicted.append(page_id)
+        )
+        debuggers = [FakeDebugger() for _ in range(3)]
+        pool.put("1", debuggers[0])
+        pool.put("2", debuggers[1])
+        self.assertIs(pool.get("1"), debuggers[0])
+        pool.put("3", debuggers[2])
+        self.assertEqual(evicted, ["2"])
+        self.assertTrue(debuggers[1].closed)
+        self.assertIsNone(pool.get("2"))
+        self.assertEqual(len(pool), 2)
+        pool.close()
+
+    def test_check(self):
+        alive_ids = set(["1", "2", "3"])
+        pool = DebuggerPool(idle_timeout=60, get_alive_ids=lambda: alive_ids)
+        idle = FakeDebugger()
+        broken = FakeDebugger(healthy=False)
+        dead = FakeDebugger(healthy=False, reconnectable=False)
+        vanished = FakeDebugger()
+        pool.put("1", idle)
+        pool.put("2", broken)
+        pool.put("3", dead)
+        pool.put("4", vanished)
+        pool._entries["1"][1] = idle.last_active_time = time.time() - 120
+        pool.check()
+        self.assertTrue(idle.closed)
+        self.assertTrue(broken.reconnected)
+        self.assertFalse(broken.closed)
+        self.assertTrue(dead.closed)
+        self.assertTrue(vanished.closed)
+        self.assertEqual(len(pool), 1)
+        pool.close()
+
+    def test_check_in_parallel(self):
+        pool = DebuggerPool(check_interval=None)
+        debuggers = [FakeDebugger(healthy=False, delay=0.5) for _ in range(4)]
+        for i, debugger in enumerate(debuggers):
+            pool.put(str(i), debugger)
+        time0 = time.time()
+        pool.check()
+        self.assertLess(time.time() - time0, 1.5)
+        self.assertTrue(all(it.reconnected for it in debuggers))
+        pool.close()
+
+    def test_check_closed(self):
+        evicted = []
+        pool = DebuggerPool(
+            check_interval=None,
+            on_evict=lambda page_id, debugger: evicted.append(page_id),
+        )
+        debugger = FakeDebugger(healthy=False)
+        pool.put("1", debugger)
+        debugger.closed = True
+        self.assertIsNone(pool.get("1"))
+        pool.put("1", debugger)
+        pool.check()
+        # 调用方关闭的调试器只移除，不重连
+        self.assertFalse(debugger.reconnected)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(evicted, ["1", "1"])
+        pool.close()
@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""http_pool模块单元测试
+"""
+
+try:
+    import BaseHTTPServer as httpserver
+except ImportError:
+    import http.server as httpserver
+import socket
+import threading
+import unittest
+
+from chrome_master.http_pool import HTTPConnectionPool
+
+
+class KeepAliveHTTPRequestHandler(httpserver.BaseHTTPRequestHandler):
+    """支持长连接的mock http server
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.clients.add(self.client_address)
+        content = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BrokenConnection(object):
+    """已被服务端关闭的连接"""
+
+    def request(self, method, path):
+        raise socket.error("Connection reset by peer")
+
+    def close(self):
+        pass
+
+
+class TestHTTPConnectionPool(unittest.TestCase):
+    """HTTPConnectionPool类测试用例
+    """
+
+    def setUp(self):
+        self.server = httpserver.HTTPServer(("127.0.0.1", 0), KeepAliveHTTPRequestHandler)
+        self.server.clients = set()
+        t = threading.Thread(target=self.server.serve_forever)
+        t.setDaemon(True)
+        t.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        pool = HTTPConnectionPool(("127.0.0.1", self.server.server_port))
+        for _ in range(3):
+            self.assertEqual(pool.request("GET", "/json"), (200, b"[]"))
+        self.assertEqual(len(self.server.clients), 1)
+        pool.close()
+        self.assertEqual(pool.request("GET", "/json"), (200, b"[]"))
+        self.assertEqual(len(self.server.clients), 2)
+
+    def test_retry_once(self):
+        pool = HTTPConnectionPool(("127.0.0.1", self.server.server_port))
+        broken_conns = [BrokenConnection(), BrokenConnection()]
+        pool._idle_conns = list(broken_conns)
+        self.assertEqual(pool.request("GET", "/json"), (200, b"[]"))
+        # 只使用新连接重试一次，不会逐个尝试其它空闲连接
+        self.assertIn(broken_conns[0], pool._idle_conns)
+        self.assertEqual(len(self.server.clients), 1)
+
+        pool.close()
+
+        # 新连接也失败时抛出异常
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        pool = HTTPConnectionPool(("127.0.0.1", port))
+        pool._idle_conns = [BrokenConnection()]
+        with self.assertRaises(socket.error):
+            pool.request("GET", "/json")
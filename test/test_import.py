@@ -0,0 +1,83 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""包导入单元测试
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+_IMPORT_SCRIPT = """
+import json, sys
+import chrome_master
+sys.stdout.write(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+
+def _run_script(script):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=root)
+    return json.loads(output.decode("utf8"))
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "lazy import requires python 3.7")
+class TestImport(unittest.TestCase):
+    """包导入测试用例
+    """
+
+    def test_lazy_modules(self):
+        modules = _run_script(_IMPORT_SCRIPT)["modules"]
+        for it in [
+            "PIL",
+            "asyncio",
+            "six",
+            "websocket",
+            "xml.dom.minidom",
+            "chrome_master.async_debugger",
+            "chrome_master.cluster",
+            "chrome_master.page_handler",
+            "chrome_master.remote_debugger",
+            "chrome_master.tracer",
+        ]:
+            self.assertNotIn(it, modules)
+
+    def test_lazy_exports(self):
+        import chrome_master
+
+        self.assertIs(
+            chrome_master.RuntimeHandler,
+            sys.modules["chrome_master.runtime_handler"].RuntimeHandler,
+        )
+        self.assertIn("PageHandler", dir(chrome_master))
+        self.assertIn("PageHandler", chrome_master.__all__)
+        with self.assertRaises(AttributeError):
+            chrome_master.NotExistHandler
+
+    def test_pil_not_loaded_by_handlers(self):
+        result = _run_script(
+            "import chrome_master, json, sys\n"
+            "chrome_master.PageHandler, chrome_master.DOMHandler\n"
+            "sys.stdout.write(json.dumps({'modules': sorted(sys.modules)}))"
+        )
+        self.assertIn("chrome_master.page_handler", result["modules"])
+        self.assertNotIn("PIL", result["modules"])
+        self.assertNotIn("xml.dom.minidom", result["modules"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""message_queue模块单元测试
+"""
+
+import threading
+import time
+import unittest
+
+from chrome_master.message_queue import EnumOverflowPolicy, MessageQueue, params_key
+
+
+class TestMessageQueue(unittest.TestCase):
+    """MessageQueue类测试用例
+    """
+
+    def test_delayed_order(self):
+        queue = MessageQueue()
+        queue.put_delayed("late", 10)
+        queue.put_delayed("soon", 0.05)
+        queue.put("now")
+        self.assertEqual(queue.get(1), ("", "now"))
+        queue.task_done("")
+        time0 = time.time()
+        self.assertEqual(queue.get(1), ("", "soon"))
+        queue.task_done("")
+        self.assertTrue(time.time() - time0 < 0.5)
+        self.assertEqual(queue.get(0.1), (None, None))
+        self.assertEqual(queue.delayed_size(), 1)
+
+    def test_partition(self):
+        queue = MessageQueue()
+        queue.put("a1", "A")
+        queue.put("a2", "A")
+        queue.put("b1", "B")
+        self.assertEqual(queue.get(1), ("A", "a1"))
+        # 分区A的消息未处理完时，只能取出其它分区的消息
+        self.assertEqual(queue.get(1), ("B", "b1"))
+        self.assertEqual(queue.get(0.1), (None, None))
+        queue.task_done("A")
+        self.assertEqual(queue.get(1), ("A", "a2"))
+        self.assertEqual(queue.qsize(), 0)
+
+    def test_close(self):
+        queue = MessageQueue()
+        result = []
+        t = threading.Thread(target=lambda: result.append(queue.get()))
+        t.start()
+        time.sleep(0.1)
+        queue.close()
+        t.join(1)
+        self.assertEqual(result, [(None, None)])
+
+    def test_drop_oldest(self):
+        queue = MessageQueue()
+        queue.set_limit("Page", 2)
+        for i in range(4):
+            queue.put({"method": "Page.test", "index": i}, "", "Page")
+        queue.put({"method": "DOM.test"}, "", "DOM")
+        self.assertEqual(queue.qsize(), 3)
+        self.assertEqual(queue.get(1)[1]["index"], 2)
+        queue.task_done("")
+        self.assertEqual(queue.get(1)[1]["index"], 3)
+        queue.task_done("")
+        self.assertEqual(queue.get(1)[1]["method"], "DOM.test")
+        stats = queue.get_overflow_stats()["Page"]
+        self.assertEqual(stats["dropped"], 2)
+        self.assertEqual(stats["size"], 0)
+
+    def test_drop_bounded_memory(self):
+        queue = MessageQueue()
+        queue.set_limit("DOM", 100)
+        for i in range(20000):
+            queue.put({"method": "DOM.test", "index": i}, "session%d" % (i % 2), "DOM")
+        self.assertEqual(queue.qsize(), 100)
+        # 被丢弃的条目不会在分区中无限累积
+        self.assertLessEqual(sum(len(it) for it in queue._partitions.values()), 202)
+        indexes = []
+        for _ in range(100):
+            key, message = queue.get(1)
+            indexes.append(message["index"])
+            queue.task_done(key)
+        self.assertEqual(sorted(indexes), list(range(19900, 20000)))
+        self.assertEqual(queue.get(0.1), (None, None))
+        self.assertEqual(queue._partitions, {})
+
+    def test_drop_newest(self):
+        queue = MessageQueue()
+        queue.set_limit("Page", 1, EnumOverflowPolicy.DROP_NEWEST)
+        self.assertTrue(queue.put("first", "", "Page"))
+        self.assertFalse(queue.put("second", "", "Page"))
+        self.assertEqual(queue.get(1), ("", "first"))
+        self.assertEqual(queue.get_overflow_stats()["Page"]["dropped"], 1)
+
+    def test_coalesce(self):
+        queue = MessageQueue()
+        queue.set_limit(
+            "DOM", 10, EnumOverflowPolicy.COALESCE, params_key("nodeId", "name")
+        )
+        for value in ("1", "2", "3"):
+            queue.put(
+                {
+                    "method": "DOM.attributeModified",
+                    "params": {"nodeId": 1, "name": "class", "value": value},
+                },
+                "",
+                "DOM",
+            )
+        queue.put(
+            {
+                "method": "DOM.attributeModified",
+                "params": {"nodeId": 2, "name": "class", "value": "4"},
+            },
+            "S1",
+            "DOM",
+        )
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(queue.get(1)[1]["params"]["value"], "3")
+        self.assertEqual(queue.get(1)[1]["params"]["value"], "4")
+        self.assertEqual(queue.get_overflow_stats()["DOM"]["merged"], 2)
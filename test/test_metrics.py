@@ -0,0 +1,70 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""metrics模块单元测试
+"""
+
+import threading
+import unittest
+
+from chrome_master.metrics import DebuggerStats, Histogram, StatsReporter
+
+
+class TestMetrics(unittest.TestCase):
+    """metrics模块测试用例
+    """
+
+    def test_histogram(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.snapshot()["p50"], None)
+        for _ in range(98):
+            histogram.add(0.003)
+        histogram.add(0.3)
+        histogram.add(0.4)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["p50"], 0.005)
+        self.assertEqual(snapshot["p99"], 0.4)
+        self.assertEqual(snapshot["max"], 0.4)
+
+    def test_snapshot(self):
+        stats = DebuggerStats()
+        stats.record_response("Page.enable", 0.01)
+        stats.record_response("Page.enable", 0.02, error=True)
+        stats.record_timeout("Runtime.evaluate")
+        stats.record_event("DOM", 100)
+        stats.record_event("DOM", 50, consumed=False)
+        stats.record_dispatch("DOM", 0.001, 0.002)
+        snapshot = stats.snapshot({"Runtime.evaluate": 1})
+        self.assertEqual(snapshot["in_flight"], 1)
+        self.assertEqual(snapshot["requests"]["Page.enable"]["errors"], 1)
+        self.assertEqual(snapshot["requests"]["Runtime.evaluate"]["timeouts"], 1)
+        self.assertEqual(snapshot["requests"]["Runtime.evaluate"]["in_flight"], 1)
+        self.assertEqual(snapshot["events"]["DOM"]["bytes"], 150)
+        self.assertEqual(snapshot["events"]["DOM"]["discarded"], 1)
+        self.assertEqual(snapshot["events"]["DOM"]["dispatch"]["count"], 1)
+
+    def test_reporter(self):
+        event = threading.Event()
+        snapshots = []
+
+        def callback(snapshot):
+            snapshots.append(snapshot)
+            event.set()
+
+        reporter = StatsReporter(lambda: "snapshot", callback, 0.05)
+        self.assertTrue(event.wait(1))
+        reporter.stop()
+        self.assertEqual(snapshots[0], "snapshot")
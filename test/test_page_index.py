@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""page_index模块单元测试
+"""
+
+try:
+    from unittest import mock
+except:
+    import mock
+import unittest
+
+from chrome_master import util
+from chrome_master.page_index import PageIndex, PageMatcher
+
+
+class TestPageIndex(unittest.TestCase):
+    """PageIndex类测试用例
+    """
+
+    def _create_page(self, page_id, title, url):
+        return {"id": page_id, "title": title, "url": url}
+
+    def test_matcher(self):
+        matcher = PageMatcher.get("http://www.qq.com/.*")
+        self.assertIs(PageMatcher.get("http://www.qq.com/.*"), matcher)
+        self.assertFalse(matcher.is_literal)
+        self.assertTrue(matcher.match("http://www.qq.com/index.html"))
+        self.assertFalse(matcher.match("https://www.qq.com/"))
+        self.assertTrue(PageMatcher.get("测试").is_literal)
+
+    def test_filter(self):
+        index = PageIndex()
+        page_list = [
+            self._create_page("1", "测试", "http://www.qq.com/"),
+            self._create_page("2", "测试", "http://www.baidu.com/"),
+            self._create_page("3", "其它", "http://www.qq.com/a.html"),
+        ]
+        result = index.filter(page_list, "测试", None)
+        self.assertEqual([it["id"] for it in result], ["1", "2"])
+        result = index.filter(page_list, None, "http://www.qq.com/.*")
+        self.assertEqual([it["id"] for it in result], ["1", "3"])
+        result = index.filter(page_list, "测试", "http://www.qq.com/")
+        self.assertEqual([it["id"] for it in result], ["1"])
+        self.assertEqual(len(index.filter(page_list)), 3)
+
+        # 页面变化后增量更新索引
+        page_list = [
+            self._create_page("2", "测试", "http://www.baidu.com/"),
+            self._create_page("3", "测试", "http://www.qq.com/a.html"),
+        ]
+        result = index.filter(page_list, "测试", "http://www.qq.com/.*")
+        self.assertEqual([it["id"] for it in result], ["3"])
+        self.assertEqual(index.filter(page_list, "其它", None), [])
+
+    def test_encode_cache(self):
+        index = PageIndex()
+        page_list = [
+            self._create_page("1", "测试", "http://www.qq.com/"),
+            self._create_page("2", "其它", "http://www.baidu.com/"),
+        ]
+        index.filter(page_list)
+        page_list = [
+            self._create_page("1", "测试", "http://www.qq.com/"),
+            self._create_page("2", "其它", "http://www.baidu.com/a.html"),
+        ]
+        with mock.patch.object(
+            util, "general_encode", side_effect=util.general_encode
+        ) as encode:
+            result = index.filter(page_list, "其它", None)
+        # 查询条件2次，仅url变化的页面2次
+        self.assertEqual(encode.call_count, 4)
+        self.assertEqual([it["id"] for it in result], ["2"])
+        self.assertEqual(result[0]["url"], "http://www.baidu.com/a.html")
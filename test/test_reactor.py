@@ -0,0 +1,53 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+
+"""reactor模块单元测试
+"""
+
+import socket
+import unittest
+
+import websocket
+
+from chrome_master.reactor import _WebSocket
+
+
+class TestWebSocket(unittest.TestCase):
+    """_WebSocket类测试用例
+    """
+
+    def test_partial_frame(self):
+        server, client = socket.socketpair()
+        ws = _WebSocket()
+        ws.sock = client
+        ws.connected = True
+        try:
+            frame = websocket.ABNF.create_frame(
+                "x" * 1000, websocket.ABNF.OPCODE_TEXT
+            ).format()
+            server.sendall(frame[:10])
+            ws.feed()
+            # 帧数据未到齐时立即返回，已读取的数据保留在缓冲区中
+            self.assertRaises(websocket.WebSocketTimeoutException, ws.recv_data, True)
+            server.sendall(frame[10:] + frame)
+            ws.feed()
+            self.assertEqual(ws.recv_data(True)[1], b"x" * 1000)
+            self.assertEqual(ws.recv_data(True)[1], b"x" * 1000)
+            self.assertRaises(websocket.WebSocketTimeoutException, ws.recv_data, True)
+            server.close()
+            self.assertRaises(websocket.WebSocketConnectionClosedException, ws.feed)
+        finally:
+            client.close()
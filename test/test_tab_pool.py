@@ -0,0 +1,75 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+
+"""tab_pool模块单元测试
+"""
+
+import threading
+import time
+import unittest
+
+from chrome_master.tab_pool import TabPool
+
+
+class FakeHTTPPool(object):
+    def __init__(self):
+        self.requests = []
+        self.cond = threading.Condition()
+
+    def request(self, method, path):
+        with self.cond:
+            self.requests.append((method, path))
+            self.cond.notify_all()
+        raise RuntimeError("connect failed")
+
+    def wait_for_count(self, count, timeout=5):
+        time0 = time.time()
+        with self.cond:
+            while len(self.requests) < count and time.time() - time0 < timeout:
+                self.cond.wait(0.1)
+        return len(self.requests)
+
+
+class FakeMaster(object):
+    def __init__(self):
+        self._http_pool = FakeHTTPPool()
+
+
+class FastRetryTabPool(TabPool):
+    retry_interval = 0.05
+    max_failures = 3
+
+
+class TestTabPool(unittest.TestCase):
+    """TabPool类测试用例
+    """
+
+    def test_refill_backoff(self):
+        master = FakeMaster()
+        pool = FastRetryTabPool(master)
+        try:
+            self.assertEqual(master._http_pool.wait_for_count(3), 3)
+            # 连续失败后暂停补充
+            time.sleep(0.5)
+            self.assertEqual(len(master._http_pool.requests), 3)
+            self.assertRaises(RuntimeError, pool.acquire)
+            # acquire自身创建1次，补充线程再尝试1次后继续暂停
+            self.assertEqual(master._http_pool.wait_for_count(5), 5)
+            time.sleep(0.5)
+            self.assertEqual(len(master._http_pool.requests), 5)
+        finally:
+            pool.close()
+
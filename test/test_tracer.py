@@ -0,0 +1,80 @@
+# -*- coding: UTF-8 -*-
+#
+# Tencent is pleased to support the open source community by making QTA available.
+# Copyright (C) 2016THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the BSD 3-Clause License (the "License"); you may not use this
+# file except in compliance with the License. You may obtain a copy of the License at
+#
+# https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software distributed
+# under the License is distributed on an "AS IS" basis, WITHOUT WARRANTIES OR CONDITIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+#
+
+"""tracer模块单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from chrome_master.tracer import EnumTraceFormat, ProtocolTracer, read_trace
+
+
+class TestProtocolTracer(unittest.TestCase):
+    """ProtocolTracer类测试用例
+    """
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _test_format(self, format):
+        path = os.path.join(self._temp_dir, "trace.%s" % format)
+        tracer = ProtocolTracer(path, format)
+        tracer.record("send", '{"id":1,"method":"Page.enable"}')
+        tracer.record("recv", '{"method":"Page.frameNavigated","params":{}}', "S1")
+        tracer.close()
+        records = list(read_trace(path, format))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0][1:], ("send", "", {"id": 1, "method": "Page.enable"}))
+        self.assertEqual(records[1][1:3], ("recv", "S1"))
+        self.assertTrue(records[0][0] <= records[1][0])
+
+    def _test_non_json(self, format):
+        path = os.path.join(self._temp_dir, "trace.%s" % format)
+        tracer = ProtocolTracer(path, format)
+        tracer.record("recv", b"\x00\xff\x01")
+        tracer.record("recv", "not json")
+        tracer.record("recv", '{"id":2,"result":{}}')
+        tracer.close()
+        records = list(read_trace(path, format))
+        self.assertEqual(
+            [it[3] for it in records],
+            [b"\x00\xff\x01", b"not json", {"id": 2, "result": {}}],
+        )
+
+    def test_jsonl(self):
+        self._test_format(EnumTraceFormat.JSONL)
+
+    def test_binary(self):
+        self._test_format(EnumTraceFormat.BINARY)
+
+    def test_non_json_frame(self):
+        self._test_non_json(EnumTraceFormat.JSONL)
+        self._test_non_json(EnumTraceFormat.BINARY)
+
+    def test_rotate(self):
+        path = os.path.join(self._temp_dir, "trace.jsonl")
+        tracer = ProtocolTracer(path, max_bytes=200, backup_count=2)
+        for i in range(20):
+            tracer.record("send", '{"id":%d,"method":"Page.enable"}' % i)
+        tracer.close()
+        self.assertTrue(os.path.getsize(path) <= 200)
+        self.assertTrue(os.path.exists(path + ".2"))
+        self.assertFalse(os.path.exists(path + ".3"))